@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量輸入讀取模組
+按塊流式讀取 CSV / JSONL 客戶資料，內存佔用只與塊大小有關。
+出生日期及時間以 NumPy 按塊向量化解析，校驗規則與 get_user_input 相同
+（日期有效、不早於1900年、不是未來日期，時間有效，性別為男或女，姓名非空），
+不合格的行連同原因寫入拒收文件（TSV：行號、原因、原始內容）
+
+輸入須有欄位 name, birth_date (YYYY-MM-DD), birth_time (HH:MM), gender，
+CSV 首行為表頭，欄位順序不限，多餘欄位忽略；CSV 欄位不支持引號。
+每塊返回 {line, name, birth_ordinal, birth_minute, gender} 列，
+可直接交給 chart_batch.compute_columns
+"""
+
+import argparse
+import datetime
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+from chart_batch import GENDER_CODES
+
+FIELDS = ('name', 'birth_date', 'birth_time', 'gender')
+
+# 每塊讀取的字節數
+DEFAULT_CHUNK_BYTES = 1 << 24
+
+# 拒收原因，按檢查順序排列（每行只記錄第一個原因）
+REJECT_REASONS = (
+    '',
+    '欄位數錯誤',
+    'CSV 欄位不支持引號',
+    'JSON 格式錯誤',
+    '姓名不能為空',
+    '日期格式錯誤',
+    '出生日期不能是未來日期',
+    '出生日期不能早於1900年',
+    '時間格式錯誤',
+    "性別須為'男'或'女'"
+)
+(OK, BAD_FIELDS, QUOTED, BAD_JSON, EMPTY_NAME, BAD_DATE, FUTURE_DATE,
+ BEFORE_1900, BAD_TIME, BAD_GENDER) = range(len(REJECT_REASONS))
+
+# UTF-8 編碼的性別
+_GENDER_BYTES = {value.encode('utf-8'): code for value, code in GENDER_CODES.items()}
+
+# 1970-01-01 的公曆序數
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+def _strip(buf, start, end):
+    """去掉欄位首尾空白（空格、製表符），返回新的 (start, end)"""
+    import numpy as np
+
+    last = len(buf) - 1
+    while True:
+        mask = (start < end) & np.isin(buf[np.minimum(start, last)], (32, 9))
+        if not mask.any():
+            break
+        start = start + mask
+    while True:
+        mask = (start < end) & np.isin(buf[np.maximum(end - 1, 0)], (32, 9))
+        if not mask.any():
+            break
+        end = end - mask
+    return start, end
+
+
+def _gather(buf, start, width: int):
+    """按行取出 [start, start + width) 字節，返回 (N, width) uint8 矩陣"""
+    import numpy as np
+
+    columns = start[:, None] + np.arange(width)
+    return buf[np.minimum(columns, len(buf) - 1)]
+
+
+def _parse_components(buf, start, end, sep: int, widths: Tuple[Tuple[int, int], ...]):
+    """解析以 sep 分隔的數字欄位（如 1985-5-29、9:05）
+
+    widths 為各段允許的 (最少, 最多) 位數。返回 (各段數值 (k, N), 是否合格)。
+    """
+    import numpy as np
+
+    n, k = len(start), len(widths)
+    width = sum(hi for _, hi in widths) + k - 1
+    length = end - start
+    ok = (length > 0) & (length <= width)
+    matrix = _gather(buf, start, width)
+    inside = np.arange(width) < length[:, None]
+    part = np.zeros(n, dtype=np.int8)
+    values = np.zeros((k, n), dtype=np.int32)
+    digits = np.zeros((k, n), dtype=np.int8)
+    for j in range(width):
+        char = matrix[:, j]
+        live = inside[:, j]
+        is_digit = live & (char >= 48) & (char <= 57)
+        is_sep = live & (char == sep)
+        ok &= ~live | is_digit | is_sep
+        part += is_sep
+        for i in range(k):
+            take = is_digit & (part == i)
+            values[i] = np.where(take, values[i] * 10 + (char.astype(np.int32) - 48), values[i])
+            digits[i] += take
+    ok &= part == k - 1
+    for i, (lo, hi) in enumerate(widths):
+        ok &= (digits[i] >= lo) & (digits[i] <= hi)
+    return values, ok
+
+
+def _fixed_digits(matrix, positions):
+    """從定寬矩陣取出指定位置的數字，返回 (數值, 是否全為數字)"""
+    import numpy as np
+
+    value = np.zeros(len(matrix), dtype=np.int32)
+    ok = np.ones(len(matrix), dtype=bool)
+    for pos in positions:
+        digit = matrix[:, pos] - np.uint8(48)
+        ok &= digit <= 9
+        value = value * 10 + digit
+    return value, ok
+
+
+def parse_dates(buf, start, end):
+    """解析 YYYY-MM-DD 日期（月、日可為一位），返回 (公曆序數, 是否合格, 年)
+
+    標準十位格式走定寬快速路徑，其餘再按分段解析。
+    """
+    import numpy as np
+
+    n = len(start)
+    matrix = _gather(buf, start, 10)
+    fixed = (end - start == 10) & (matrix[:, 4] == 45) & (matrix[:, 7] == 45)
+    year, ok_y = _fixed_digits(matrix, (0, 1, 2, 3))
+    month, ok_m = _fixed_digits(matrix, (5, 6))
+    day, ok_d = _fixed_digits(matrix, (8, 9))
+    ok = fixed & ok_y & ok_m & ok_d
+
+    other = np.flatnonzero(~fixed)
+    if len(other):
+        values, ok_other = _parse_components(buf, start[other], end[other], 45, ((4, 4), (1, 2), (1, 2)))
+        year[other], month[other], day[other] = values
+        ok[other] = ok_other
+
+    # 月份及當月天數
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_days = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=np.int32)
+    ok &= (month >= 1) & (month <= 12)
+    days = month_days[np.where(ok, month, 0)] + (leap & (month == 2))
+    ok &= (day >= 1) & (day <= days) & (year >= 1)
+
+    # 公曆日期 -> 序數（以三月為年首的民用曆算法）
+    y = year.astype(np.int64) - (month <= 2)
+    era = np.floor_divide(y, 400)
+    yoe = y - era * 400
+    mp = (month.astype(np.int64) + 9) % 12
+    doy = (153 * mp + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    ordinals = era * 146097 + doe - 719468 + _EPOCH_ORDINAL
+    return np.where(ok, ordinals, 0), ok, year
+
+
+def parse_times(buf, start, end):
+    """解析 HH:MM 時間（時、分可為一位），返回 (當日第幾分鐘, 是否合格)"""
+    import numpy as np
+
+    matrix = _gather(buf, start, 5)
+    fixed = (end - start == 5) & (matrix[:, 2] == 58)
+    hour, ok_h = _fixed_digits(matrix, (0, 1))
+    minute, ok_m = _fixed_digits(matrix, (3, 4))
+    ok = fixed & ok_h & ok_m
+
+    other = np.flatnonzero(~fixed)
+    if len(other):
+        values, ok_other = _parse_components(buf, start[other], end[other], 58, ((1, 2), (1, 2)))
+        hour[other], minute[other] = values
+        ok[other] = ok_other
+    ok &= (hour <= 23) & (minute <= 59)
+    return np.where(ok, hour * 60 + minute, 0), ok
+
+
+def parse_genders(buf, start, end):
+    """解析性別欄位，返回 (性別編碼, 是否合格)"""
+    import numpy as np
+
+    matrix = _gather(buf, start, 3)
+    codes = np.zeros(len(start), dtype=np.int8)
+    ok = np.zeros(len(start), dtype=bool)
+    for value, code in _GENDER_BYTES.items():
+        match = (end - start == len(value)) & (matrix == np.frombuffer(value, dtype=np.uint8)).all(axis=1)
+        codes[match] = code
+        ok |= match
+    return codes, ok
+
+
+def extract_strings(buf, start, end):
+    """按行取出 [start, end) 字節，返回 NumPy 定長字節串數組（UTF-8）"""
+    import numpy as np
+
+    length = end - start
+    width = max(int(length.max()) if len(length) else 0, 1)
+    matrix = _gather(buf, start, width)
+    matrix[np.arange(width) >= length[:, None]] = 0
+    return np.ascontiguousarray(matrix).view(f'S{width}').ravel()
+
+
+class BatchReader:
+    """流式批量讀取器
+
+    逐塊迭代合格記錄；拒收記錄寫入 reject_path（省略時只計數）。
+    讀取完成後 stats() 給出總行數、接收數及各原因的拒收數。
+    """
+
+    def __init__(self, path: str, fmt: str = None, reject_path: str = None,
+                 chunk_bytes: int = DEFAULT_CHUNK_BYTES, today: datetime.date = None):
+        """fmt 為 'csv' 或 'jsonl'，省略時按擴展名推斷"""
+        if fmt is None:
+            fmt = 'jsonl' if os.path.splitext(path)[1].lower() in ('.jsonl', '.ndjson') else 'csv'
+        if fmt not in ('csv', 'jsonl'):
+            raise ValueError(f"未知的輸入格式：{fmt}")
+        self.path = path
+        self.fmt = fmt
+        self.reject_path = reject_path
+        self.chunk_bytes = chunk_bytes
+        self.today = today or datetime.date.today()
+        self.rows = 0
+        self.accepted = 0
+        self.reject_counts = [0] * len(REJECT_REASONS)
+        self._columns: Optional[List[int]] = None
+        self._rejects = None
+
+    def stats(self) -> Dict:
+        return {
+            'rows': self.rows,
+            'accepted': self.accepted,
+            'rejected': self.rows - self.accepted,
+            'reasons': {REJECT_REASONS[code]: count for code, count in enumerate(self.reject_counts)
+                        if code != OK and count}
+        }
+
+    def __iter__(self) -> Iterator[Dict]:
+        if self.reject_path:
+            self._rejects = open(self.reject_path, 'wb')
+            self._rejects.write('line\treason\trecord\n'.encode('utf-8'))
+        try:
+            line = 0
+            for block in self._blocks():
+                chunk, count = self._parse_block(block, line)
+                line += count
+                if chunk is not None and len(chunk['line']):
+                    yield chunk
+        finally:
+            if self._rejects is not None:
+                self._rejects.close()
+                self._rejects = None
+
+    def _blocks(self) -> Iterator[bytes]:
+        """按塊讀取完整的行"""
+        with open(self.path, 'rb') as f:
+            rest = b''
+            while True:
+                data = f.read(self.chunk_bytes)
+                if not data:
+                    break
+                data = rest + data
+                cut = data.rfind(b'\n') + 1
+                if cut == 0:
+                    rest = data
+                    continue
+                rest = data[cut:]
+                yield data[:cut]
+            if rest:
+                yield rest + b'\n'
+
+    def _parse_block(self, block: bytes, first_line: int) -> Tuple[Optional[Dict], int]:
+        """解析一塊完整的行，返回 (合格記錄列, 行數)"""
+        import numpy as np
+
+        buf = np.frombuffer(block, dtype=np.uint8)
+        newlines = np.flatnonzero(buf == 10)
+        starts = np.concatenate([[0], newlines[:-1] + 1])
+        ends = newlines - ((newlines > starts) & (buf[np.maximum(newlines - 1, 0)] == 13))
+        lines = first_line + 1 + np.arange(len(starts), dtype=np.int64)
+
+        if self.fmt == 'csv' and self._columns is None:
+            # 首行為表頭
+            self._read_header(block[starts[0]:ends[0]])
+            starts, ends, lines = starts[1:], ends[1:], lines[1:]
+        keep = ends > starts
+        starts, ends, lines = starts[keep], ends[keep], lines[keep]
+        if not len(starts):
+            return None, len(newlines)
+
+        if self.fmt == 'csv':
+            fields, reasons = self._split_csv(buf, starts, ends)
+        else:
+            buf, fields, reasons = self._split_jsonl(block, starts, ends)
+
+        result = self._validate(buf, fields, reasons)
+        reasons = result.pop('reason')
+        self._write_rejects(block, starts, ends, lines, reasons)
+        good = reasons == OK
+        self.rows += len(reasons)
+        self.accepted += int(good.sum())
+        for code, count in enumerate(np.bincount(reasons, minlength=len(REJECT_REASONS))):
+            self.reject_counts[code] += int(count)
+        chunk = {'line': lines[good]}
+        chunk.update({name: column[good] for name, column in result.items()})
+        return chunk, len(newlines)
+
+    def _read_header(self, header: bytes):
+        names = [name.strip().lstrip('\ufeff') for name in header.decode('utf-8').split(',')]
+        missing = [field for field in FIELDS if field not in names]
+        if missing:
+            raise ValueError(f"輸入缺少欄位：{', '.join(missing)}")
+        self._columns = [names.index(field) for field in FIELDS]
+        self._width = len(names)
+
+    def _split_csv(self, buf, starts, ends):
+        """按逗號定位各欄位，返回 ({欄位: (start, end)}, 原因)"""
+        import numpy as np
+
+        commas = np.flatnonzero(buf == 44)
+        first = np.searchsorted(commas, starts)
+        count = np.searchsorted(commas, ends) - first
+        reasons = np.where(count == self._width - 1, OK, BAD_FIELDS).astype(np.int8)
+        quotes = np.flatnonzero(buf == 34)
+        if len(quotes):
+            quoted = np.searchsorted(quotes, ends) > np.searchsorted(quotes, starts)
+            reasons[quoted & (reasons == OK)] = QUOTED
+
+        # 欄位數錯誤的行按空欄位處理，之後只記錄第一個原因
+        valid = reasons == OK
+        bounds = np.concatenate([commas, [len(buf)]])
+        fields = {}
+        for field, column in zip(FIELDS, self._columns):
+            if column == 0:
+                start = starts.copy()
+            else:
+                start = bounds[np.minimum(first + column - 1, len(commas))] + 1
+            if column == self._width - 1:
+                end = ends.copy()
+            else:
+                end = bounds[np.minimum(first + column, len(commas))]
+            start = np.where(valid, start, 0)
+            end = np.where(valid, end, 0)
+            fields[field] = _strip(buf, start, end)
+        return fields, reasons
+
+    def _split_jsonl(self, block: bytes, starts, ends):
+        """逐行 json.loads 取出字串欄位，再拼成定長緩衝區供向量化解析"""
+        import numpy as np
+
+        n = len(starts)
+        reasons = np.zeros(n, dtype=np.int8)
+        values = {field: [b''] * n for field in FIELDS}
+        for i, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+            try:
+                record = json.loads(block[start:end])
+                items = [('' if record.get(field) is None else str(record[field])).strip().encode('utf-8')
+                         for field in FIELDS]
+            except (ValueError, AttributeError):
+                reasons[i] = BAD_JSON
+                continue
+            for field, item in zip(FIELDS, items):
+                values[field][i] = item
+
+        # 各欄位依次放入同一緩衝區：第 f 個欄位第 i 行位於 (f * n + i) * width
+        arrays = [np.array(values[field], dtype='S') for field in FIELDS]
+        width = max(array.dtype.itemsize for array in arrays)
+        buf = np.concatenate([array.astype(f'S{width}').view(np.uint8) for array in arrays])
+        rows = np.arange(n, dtype=np.int64)
+        fields = {}
+        for f, field in enumerate(FIELDS):
+            start = (f * n + rows) * width
+            fields[field] = (start, start + np.array([len(v) for v in values[field]], dtype=np.int64))
+        return buf, fields, reasons
+
+    def _validate(self, buf, fields: Dict, reasons):
+        """按 get_user_input 的規則校驗，返回各列及原因"""
+        import numpy as np
+
+        name_start, name_end = fields['name']
+        ordinals, date_ok, year = parse_dates(buf, *fields['birth_date'])
+        minutes, time_ok = parse_times(buf, *fields['birth_time'])
+        genders, gender_ok = parse_genders(buf, *fields['gender'])
+
+        # 後面的檢查先寫，前面的覆蓋，保留第一個失敗原因
+        checks = [
+            (~gender_ok, BAD_GENDER),
+            (~time_ok, BAD_TIME),
+            (date_ok & (year < 1900), BEFORE_1900),
+            (date_ok & (ordinals > self.today.toordinal()), FUTURE_DATE),
+            (~date_ok, BAD_DATE),
+            (name_end <= name_start, EMPTY_NAME)
+        ]
+        result = np.zeros(len(reasons), dtype=np.int8)
+        for failed, code in checks:
+            result[failed] = code
+        result = np.where(reasons != OK, reasons, result)
+        return {
+            'name': extract_strings(buf, name_start, name_end),
+            'birth_ordinal': ordinals.astype(np.int32),
+            'birth_minute': minutes.astype(np.int16),
+            'gender': genders,
+            'reason': result
+        }
+
+    def _write_rejects(self, block: bytes, starts, ends, lines, reasons):
+        if self._rejects is None:
+            return
+        import numpy as np
+
+        for i in np.flatnonzero(reasons != OK).tolist():
+            prefix = f"{lines[i]}\t{REJECT_REASONS[reasons[i]]}\t".encode('utf-8')
+            self._rejects.write(prefix + block[starts[i]:ends[i]] + b'\n')
+
+
+def read_batches(path: str, fmt: str = None, reject_path: str = None,
+                 chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> Iterator[Dict]:
+    """逐塊讀取合格記錄"""
+    return iter(BatchReader(path, fmt, reject_path, chunk_bytes))
+
+
+def main(argv=None) -> int:
+    """主函數：讀取並校驗，可選批量排盤後導出"""
+    parser = argparse.ArgumentParser(description="批量讀取客戶資料")
+    parser.add_argument('input', help="CSV 或 JSONL 文件")
+    parser.add_argument('--format', choices=('csv', 'jsonl'), help="輸入格式，默認按擴展名推斷")
+    parser.add_argument('--rejects', help="拒收記錄文件（TSV）")
+    parser.add_argument('--export', help="批量排盤並導出到該路徑（見 chart_export）")
+    parser.add_argument('--export-format', default='columns', help="導出格式")
+    parser.add_argument('--chunk-mb', type=int, default=DEFAULT_CHUNK_BYTES >> 20, help="每塊讀取的MB數")
+    args = parser.parse_args(argv)
+
+    reader = BatchReader(args.input, args.format, args.rejects, args.chunk_mb << 20)
+    if args.export:
+        from chart_batch import compute_columns
+        from chart_export import write_chunks
+
+        chunks = (compute_columns(c['birth_ordinal'], c['birth_minute'], c['gender']) for c in reader)
+        write_chunks(args.export, chunks, args.export_format)
+    else:
+        for _ in reader:
+            pass
+    print(json.dumps(reader.stats(), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -6,8 +6,29 @@
 """
 
 import datetime
-from lunar_python import Lunar, Solar
-from typing import Tuple, List, Dict
+from collections import OrderedDict
+from typing import Tuple, List, Dict, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from lunar_python import Lunar
+
+class BaziChart(dict):
+    """不可變的八字盤
+
+    由 BaziCalculator 的緩存返回，多個請求共享同一對象，因此禁止修改。
+    需要修改時請先 dict(chart) 複製一份。
+    """
+    
+    __slots__ = ()
+    
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("BaziChart 為共享的不可變對象，請先複製再修改")
+    
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    
+    def __reduce__(self):
+        return (BaziChart, (dict(self),))
 
 class BaziCalculator:
     """八字計算器"""
@@ -32,6 +53,14 @@ class BaziCalculator:
     # 生肖對應
     SHENGXIAO = ['鼠', '牛', '虎', '兔', '龍', '蛇', '馬', '羊', '猴', '雞', '狗', '豬']
     
+    # 地支藏干（本氣、中氣、餘氣）
+    CANGGAN = {
+        '子': ('癸',), '丑': ('己', '癸', '辛'), '寅': ('甲', '丙', '戊'),
+        '卯': ('乙',), '辰': ('戊', '乙', '癸'), '巳': ('丙', '戊', '庚'),
+        '午': ('丁', '己'), '未': ('己', '丁', '乙'), '申': ('庚', '壬', '戊'),
+        '酉': ('辛',), '戌': ('戊', '辛', '丁'), '亥': ('壬', '甲')
+    }
+    
     # 時辰對應
     SHICHEN = {
         '子': (23, 1), '丑': (1, 3), '寅': (3, 5), '卯': (5, 7),
@@ -39,12 +68,43 @@ class BaziCalculator:
         '申': (15, 17), '酉': (17, 19), '戌': (19, 21), '亥': (21, 23)
     }
     
-    def __init__(self):
-        """初始化計算器"""
-        pass
+    def __init__(self, cache_size: int = 4096, late_zi_next_day: bool = False,
+                 wuxing_method: str = 'count'):
+        """初始化計算器
+
+        cache_size: 八字盤緩存容量，0 表示不緩存
+        late_zi_next_day: 夜子時（23時後）是否按次日起日柱，默認按當日
+        wuxing_method: 五行分析方法，'count' 為干支計數，'weighted' 為藏干及月令加權
+        """
+        self.cache_size = cache_size
+        self.late_zi_next_day = late_zi_next_day
+        self.wuxing_method = wuxing_method
+        # 四柱只在時辰及日界變化，以（日期, 時支, 子時規則）為鍵緩存
+        self._chart_cache: OrderedDict = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+    
+    def cache_info(self) -> Dict:
+        """獲取緩存命中統計"""
+        total = self.cache_hits + self.cache_misses
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'hit_rate': self.cache_hits / total if total else 0.0,
+            'size': len(self._chart_cache),
+            'maxsize': self.cache_size
+        }
     
-    def get_lunar_date(self, solar_date: datetime.date, solar_time: datetime.time) -> Lunar:
+    def clear_cache(self):
+        """清空八字盤緩存及統計"""
+        self._chart_cache.clear()
+        self.cache_hits = 0
+        self.cache_misses = 0
+    
+    def get_lunar_date(self, solar_date: datetime.date, solar_time: datetime.time) -> 'Lunar':
         """獲取農曆日期"""
+        # 延遲導入，首次計算時才加載 lunar_python
+        from lunar_python import Solar
         solar = Solar(solar_date.year, solar_date.month, solar_date.day, 
                      solar_time.hour, solar_time.minute, solar_time.second)
         return solar.getLunar()
@@ -66,8 +126,43 @@ class BaziCalculator:
         hour_gan_index = (day_gan_index * 2 + hour_zhi_index) % 10
         return self.TIANGAN[hour_gan_index]
     
-    def calculate_bazi(self, birth_date: datetime.date, birth_time: datetime.time) -> Dict:
-        """計算八字"""
+    def calculate_bazi(self, birth_date: datetime.date, birth_time: datetime.time,
+                       longitude: float = None, timezone: str = None) -> Dict:
+        """計算八字
+
+        同一日期、同一時辰的結果相同，返回緩存中共享的 BaziChart。
+        其中 lunar_date 為該時辰首次計算時的農曆對象。
+        提供出生地經度或時區時，先把鐘錶時間換算為真太陽時再排盤。
+        """
+        if longitude is not None or timezone is not None:
+            from solar_time import true_solar_time
+            solar = true_solar_time(datetime.datetime.combine(birth_date, birth_time), longitude, timezone)
+            birth_date, birth_time = solar.date(), solar.time()
+        
+        hour_zhi = self.get_hour_dizhi(birth_time.hour)
+        if self.late_zi_next_day and birth_time.hour >= 23:
+            # 夜子時按次日計算
+            birth_date = birth_date + datetime.timedelta(days=1)
+            birth_time = datetime.time(0, birth_time.minute, birth_time.second)
+        
+        key = (birth_date, hour_zhi, self.late_zi_next_day)
+        cache = self._chart_cache
+        chart = cache.get(key)
+        if chart is not None:
+            self.cache_hits += 1
+            cache.move_to_end(key)
+            return chart
+        
+        self.cache_misses += 1
+        chart = self._compute_bazi(birth_date, birth_time)
+        if self.cache_size > 0:
+            cache[key] = chart
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return chart
+    
+    def _compute_bazi(self, birth_date: datetime.date, birth_time: datetime.time) -> BaziChart:
+        """實際計算八字（不經緩存）"""
         # 獲取農曆日期
         lunar = self.get_lunar_date(birth_date, birth_time)
         
@@ -98,7 +193,7 @@ class BaziCalculator:
         # 日主五行
         day_master_wuxing = self.WUXING_TIANGAN[day_gan]
         
-        return {
+        return BaziChart({
             'year_pillar': year_pillar,
             'month_pillar': month_pillar,
             'day_pillar': day_pillar,
@@ -107,9 +202,13 @@ class BaziCalculator:
             'day_master_wuxing': day_master_wuxing,
             'shengxiao': shengxiao,
             'lunar_date': lunar,
-            'tiangan': [year_gan, month_gan, day_gan, hour_gan],
-            'dizhi': [year_zhi, month_zhi, day_zhi, hour_zhi]
-        }
+            'tiangan': (year_gan, month_gan, day_gan, hour_gan),
+            'dizhi': (year_zhi, month_zhi, day_zhi, hour_zhi),
+            # 干支序號（甲=0…癸=9，子=0…亥=11），供各分析引擎查表
+            'tiangan_codes': tuple(self.TIANGAN.index(g) for g in (year_gan, month_gan, day_gan, hour_gan)),
+            'dizhi_codes': (year_zhi_index, self.DIZHI.index(month_zhi),
+                            self.DIZHI.index(day_zhi), self.DIZHI.index(hour_zhi))
+        })
     
     def calculate_dayun(self, bazi_info: Dict, gender: str, birth_date: datetime.date) -> List[Dict]:
         """計算大運"""
@@ -163,8 +262,18 @@ class BaziCalculator:
         
         return dayun_list
     
-    def analyze_wuxing_balance(self, bazi_info: Dict) -> Dict:
-        """分析五行平衡"""
+    def analyze_wuxing_balance(self, bazi_info: Dict, method: str = None) -> Dict:
+        """分析五行平衡
+
+        method 為 'weighted' 時，最強最弱五行及喜用神改按藏干、月令加權的
+        五行力量判斷，並附帶 wuxing_strength；未指定時使用 self.wuxing_method。
+        """
+        method = method or self.wuxing_method
+        if method == 'weighted':
+            return self._analyze_wuxing_weighted(bazi_info)
+        if method != 'count':
+            raise ValueError(f"未知的五行分析方法：{method}")
+        
         wuxing_count = {'木': 0, '火': 0, '土': 0, '金': 0, '水': 0}
         
         # 統計天干五行
@@ -216,6 +325,27 @@ class BaziCalculator:
             'min_wuxing': min_wuxing,
             'favorable_elements': favorable_elements
         }
+    
+    def _analyze_wuxing_weighted(self, bazi_info: Dict) -> Dict:
+        """藏干及月令加權的五行分析"""
+        from wuxing_strength import chart_strength
+        
+        # 干支計數仍保留，供內容生成中按個數描述的段落使用
+        wuxing_count = {'木': 0, '火': 0, '土': 0, '金': 0, '水': 0}
+        for gan in bazi_info['tiangan']:
+            wuxing_count[self.WUXING_TIANGAN[gan]] += 1
+        for zhi in bazi_info['dizhi']:
+            wuxing_count[self.WUXING_DIZHI[zhi]] += 1
+        
+        result = chart_strength(bazi_info)
+        strength = result['wuxing_strength']
+        return {
+            'wuxing_count': wuxing_count,
+            'wuxing_strength': strength,
+            'max_wuxing': max(strength, key=strength.get),
+            'min_wuxing': min(strength, key=strength.get),
+            'favorable_elements': result['favorable_elements']
+        }
 
 # 測試代碼
 if __name__ == "__main__":
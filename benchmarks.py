@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能基準測試
+覆蓋八字計算、五行分析、大運、各章節內容生成、PDF生成及端到端報告，
+結果可保存為 JSON 基線，並在性能退化超過閾值時返回失敗
+
+用法：
+    python benchmarks.py --save-baseline           # 記錄基線
+    python benchmarks.py --threshold 0.25          # 與基線比較，退化超過25%即失敗
+    python benchmarks.py --filter generate_        # 只運行名稱包含 generate_ 的項目
+    python benchmarks.py --import-budget           # 檢查冷啟動導入耗時是否在預算內
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# 冷啟動導入耗時預算（微秒，python -X importtime 的累計值）。
+# 延遲導入 ReportLab / lunar_python 前 fortune_teller 約需 210ms，目標為其一半以內
+IMPORT_TIME_BUDGET_US = {
+    'fortune_teller': 100_000,
+    'bazi_calculator': 30_000,
+    'content_generator': 30_000,
+    'pdf_generator': 60_000
+}
+
+# 註冊的基準項目：名稱 -> (準備函數, 每輪迭代次數)
+BENCHMARKS: Dict[str, tuple] = {}
+
+
+def benchmark(name: str, number: int = 1):
+    """註冊基準項目
+
+    被裝飾的函數負責準備數據，並返回一個無參數的待測函數。
+    """
+    def decorator(setup: Callable):
+        BENCHMARKS[name] = (setup, number)
+        return setup
+    return decorator
+
+
+class _Fixture:
+    """共享測試數據"""
+
+    _instance = None
+
+    def __init__(self):
+        from bazi_calculator import BaziCalculator
+        from content_generator import ContentGenerator
+
+        self.calculator = BaziCalculator()
+        self.generator = ContentGenerator()
+        self.name = "測試"
+        self.birth_date = datetime.date(1985, 5, 29)
+        self.birth_time = datetime.time(14, 5)
+        self.gender = '男'
+        self.bazi_info = self.calculator.calculate_bazi(self.birth_date, self.birth_time)
+        self.wuxing_analysis = self.calculator.analyze_wuxing_balance(self.bazi_info)
+        self.dayun_list = self.calculator.calculate_dayun(self.bazi_info, self.gender, self.birth_date)
+        self.all_contents = generate_all_contents(
+            self.generator, self.bazi_info, self.wuxing_analysis,
+            self.dayun_list, self.birth_date, self.gender
+        )
+
+        # 批量數據：固定隨機種子，保證每次運行輸入一致
+        rng = random.Random(20240101)
+        self.bulk_inputs = []
+        for _ in range(1000):
+            day = datetime.date(1900, 1, 1) + datetime.timedelta(days=rng.randrange(365 * 124))
+            moment = datetime.time(rng.randrange(24), rng.randrange(60))
+            self.bulk_inputs.append((day, moment))
+
+    @classmethod
+    def get(cls) -> '_Fixture':
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+
+def generate_all_contents(generator, bazi_info, wuxing_analysis, dayun_list, birth_date, gender) -> Dict:
+    """生成全部章節內容（與 EnhancedFortuneTeller.generate_content 相同的調用）"""
+    return {
+        'life_summary': generator.generate_life_summary(bazi_info, wuxing_analysis),
+        'career_summary': generator.generate_career_summary(bazi_info, wuxing_analysis),
+        'wealth_summary': generator.generate_wealth_summary(bazi_info, wuxing_analysis),
+        'marriage_summary': generator.generate_marriage_summary(bazi_info, gender),
+        'health_summary': generator.generate_health_summary(bazi_info, wuxing_analysis),
+        'family_summary': generator.generate_family_summary(bazi_info),
+        'shensha_summary': generator.generate_shensha_summary(bazi_info),
+        'dayun_summary': generator.generate_dayun_summary(dayun_list, bazi_info=bazi_info),
+        'liunian_prediction': generator.generate_liunian_prediction(
+            birth_date.year, bazi_info=bazi_info, dayun_list=dayun_list),
+        'feng_shui_guide': generator.generate_feng_shui_guide(wuxing_analysis)
+    }
+
+
+@benchmark('calculate_bazi', number=200)
+def bench_calculate_bazi():
+    fx = _Fixture.get()
+    return lambda: fx.calculator.calculate_bazi(fx.birth_date, fx.birth_time)
+
+
+@benchmark('calculate_bazi_uncached', number=200)
+def bench_calculate_bazi_uncached():
+    from bazi_calculator import BaziCalculator
+
+    fx = _Fixture.get()
+    calculator = BaziCalculator(cache_size=0)
+    return lambda: calculator.calculate_bazi(fx.birth_date, fx.birth_time)
+
+
+@benchmark('calculate_bazi_bulk_1000')
+def bench_calculate_bazi_bulk():
+    from bazi_calculator import BaziCalculator
+
+    fx = _Fixture.get()
+    inputs = fx.bulk_inputs
+
+    def run():
+        # 每輪使用新的計算器，緩存從空開始
+        calculate = BaziCalculator().calculate_bazi
+        for day, moment in inputs:
+            calculate(day, moment)
+    return run
+
+
+@benchmark('calculate_dayun', number=2000)
+def bench_calculate_dayun():
+    fx = _Fixture.get()
+    return lambda: fx.calculator.calculate_dayun(fx.bazi_info, fx.gender, fx.birth_date)
+
+
+@benchmark('analyze_wuxing_balance', number=2000)
+def bench_analyze_wuxing_balance():
+    fx = _Fixture.get()
+    return lambda: fx.calculator.analyze_wuxing_balance(fx.bazi_info)
+
+
+@benchmark('date_selection_year', number=200)
+def bench_date_selection():
+    from date_selection import DateSelector
+
+    fx = _Fixture.get()
+    selector = DateSelector()
+    start, end = datetime.date(2025, 1, 1), datetime.date(2025, 12, 31)
+    return lambda: selector.select(fx.bazi_info, fx.wuxing_analysis, start, end, 'wedding')
+
+
+def _register_generator_benchmarks():
+    """為 ContentGenerator 的每個 generate_* 方法註冊基準項目"""
+    calls = {
+        'generate_personal_info': lambda fx: (
+            fx.name, fx.bazi_info, fx.wuxing_analysis, fx.birth_date, fx.birth_time, fx.gender),
+        'generate_life_summary': lambda fx: (fx.bazi_info, fx.wuxing_analysis),
+        'generate_career_summary': lambda fx: (fx.bazi_info, fx.wuxing_analysis),
+        'generate_wealth_summary': lambda fx: (fx.bazi_info, fx.wuxing_analysis),
+        'generate_marriage_summary': lambda fx: (fx.bazi_info, fx.gender),
+        'generate_health_summary': lambda fx: (fx.bazi_info, fx.wuxing_analysis),
+        'generate_family_summary': lambda fx: (fx.bazi_info,),
+        'generate_shensha_summary': lambda fx: (fx.bazi_info,),
+        'generate_dayun_summary': lambda fx: (fx.dayun_list, 30, fx.bazi_info),
+        'generate_liunian_prediction': lambda fx: (fx.birth_date.year, 2024, fx.bazi_info, fx.dayun_list),
+        'generate_feng_shui_guide': lambda fx: (fx.wuxing_analysis,)
+    }
+    for method_name, make_args in calls.items():
+        def setup(method_name=method_name, make_args=make_args):
+            fx = _Fixture.get()
+            method = getattr(fx.generator, method_name)
+            args = make_args(fx)
+            return lambda: method(*args)
+        BENCHMARKS[method_name] = (setup, 500)
+
+
+_register_generator_benchmarks()
+
+
+@benchmark('generate_all_contents', number=200)
+def bench_generate_all_contents(locale: str = None):
+    from content_generator import ContentGenerator
+
+    fx = _Fixture.get()
+    generator = ContentGenerator(locale) if locale else fx.generator
+    return lambda: generate_all_contents(generator, fx.bazi_info, fx.wuxing_analysis,
+                                         fx.dayun_list, fx.birth_date, fx.gender)
+
+
+@benchmark('template_catalog_load', number=100)
+def bench_template_catalog_load():
+    # 新進程首次取模板：從內存映射的二進制緩存加載繁簡兩個語系
+    from content_generator import template_catalog
+    from template_catalog import TemplateCatalog
+
+    shared = template_catalog()
+    shared.compile_all()
+
+    def run():
+        catalog = TemplateCatalog(shared.path, shared.cache_dir, terms=shared._terms)
+        catalog.compile_all()
+    return run
+
+
+@benchmark('generate_all_contents_simplified', number=200)
+def bench_generate_all_contents_simplified():
+    # 簡體模板在載入時轉換一次，每份報告的生成開銷應與繁體相同
+    return bench_generate_all_contents('zh-Hans')
+
+
+@benchmark('traditional_pdf_render', number=5)
+def bench_traditional_pdf(page_shells: bool = True):
+    from pdf_generator import FortuneReportPDF
+
+    fx = _Fixture.get()
+    with contextlib.redirect_stdout(io.StringIO()):
+        pdf = FortuneReportPDF(page_shells=page_shells)
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            pdf.generate_pdf(
+                io.BytesIO(), fx.name, fx.bazi_info, fx.wuxing_analysis, fx.dayun_list,
+                fx.birth_date, fx.birth_time, fx.gender, fx.all_contents
+            )
+    return run
+
+
+@benchmark('traditional_pdf_render_no_shells', number=5)
+def bench_traditional_pdf_no_shells():
+    # 對照：每頁重新繪製背景、邊框及靜態標題
+    return bench_traditional_pdf(page_shells=False)
+
+
+@benchmark('watermark_stamp', number=20)
+def bench_watermark_stamp():
+    from pdf_generator import FortuneReportPDF
+    from watermark import stamp_pdf
+
+    fx = _Fixture.get()
+    buffer = io.BytesIO()
+    with contextlib.redirect_stdout(io.StringIO()):
+        FortuneReportPDF().generate_pdf(
+            buffer, fx.name, fx.bazi_info, fx.wuxing_analysis, fx.dayun_list,
+            fx.birth_date, fx.birth_time, fx.gender, fx.all_contents
+        )
+    base = buffer.getvalue()
+    stamp_pdf(base, fx.name, 'ORDER-0')
+
+    state = {'i': 0}
+
+    def run():
+        state['i'] += 1
+        stamp_pdf(base, fx.name, f"ORDER-{state['i']}")
+    return run
+
+
+@benchmark('preview_png', number=10)
+def bench_preview_png():
+    from preview_renderer import PreviewCache, PreviewRenderer
+
+    fx = _Fixture.get()
+    with contextlib.redirect_stdout(io.StringIO()):
+        renderer = PreviewRenderer(cache=PreviewCache(max_entries=1))
+        renderer.render_png(fx.name, fx.bazi_info, fx.birth_date, fx.birth_time, fx.gender, fx.all_contents)
+
+    state = {'i': 0}
+
+    def run():
+        # 每次使用新的報告鍵，量度未命中緩存時的繪製及編碼
+        state['i'] += 1
+        renderer.render_png(fx.name, fx.bazi_info, fx.birth_date, fx.birth_time, fx.gender,
+                            fx.all_contents, key=str(state['i']))
+    return run
+
+
+def _register_text_report_benchmarks():
+    """為每種文本報告格式註冊基準項目"""
+    from report_renderers import FORMATS
+
+    for fmt in FORMATS:
+        def setup(fmt=fmt):
+            from report_renderers import render
+
+            fx = _Fixture.get()
+            args = (fx.name, fx.bazi_info, fx.wuxing_analysis, fx.dayun_list,
+                    fx.birth_date, fx.birth_time, fx.gender, fx.all_contents)
+            return lambda: render(fmt, *args)
+        BENCHMARKS[f'text_report_{fmt}'] = (setup, 200)
+
+
+_register_text_report_benchmarks()
+
+
+@benchmark('end_to_end_report', number=5)
+def bench_end_to_end():
+    from bazi_calculator import BaziCalculator
+    from content_generator import ContentGenerator
+    from pdf_generator import FortuneReportPDF
+
+    fx = _Fixture.get()
+    calculator = BaziCalculator()
+    generator = ContentGenerator()
+    with contextlib.redirect_stdout(io.StringIO()):
+        pdf = FortuneReportPDF()
+    inputs = fx.bulk_inputs
+
+    state = {'i': 0}
+
+    def run():
+        day, moment = inputs[state['i'] % len(inputs)]
+        state['i'] += 1
+        bazi_info = calculator.calculate_bazi(day, moment)
+        wuxing_analysis = calculator.analyze_wuxing_balance(bazi_info)
+        dayun_list = calculator.calculate_dayun(bazi_info, fx.gender, day)
+        all_contents = generate_all_contents(
+            generator, bazi_info, wuxing_analysis, dayun_list, day, fx.gender)
+        with contextlib.redirect_stdout(io.StringIO()):
+            pdf.generate_pdf(
+                io.BytesIO(), fx.name, bazi_info, wuxing_analysis, dayun_list,
+                day, moment, fx.gender, all_contents
+            )
+    return run
+
+
+def run_benchmark(name: str, repeat: int = 5, warmup: int = 1) -> Dict:
+    """運行單個基準項目，返回每次調用耗時統計（秒）"""
+    setup, number = BENCHMARKS[name]
+    func = setup()
+    for _ in range(warmup):
+        func()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+
+    best = min(timings)
+    return {
+        'min': best,
+        'mean': statistics.mean(timings),
+        'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        'ops_per_sec': 1.0 / best if best else float('inf'),
+        'repeat': repeat,
+        'number': number
+    }
+
+
+def measure_import_time(module: str, runs: int = 5) -> int:
+    """在新進程中以 -X importtime 測量模組累計導入耗時（微秒），取中位數"""
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            cwd=repo_dir, capture_output=True, text=True, check=True
+        )
+        for line in proc.stderr.splitlines():
+            parts = line.split('|')
+            if len(parts) == 3 and parts[2].strip() == module:
+                samples.append(int(parts[1].strip()))
+                break
+    return int(statistics.median(samples))
+
+
+def check_import_budget(budgets: Dict[str, int] = None) -> List[str]:
+    """檢查各模組冷啟動導入耗時，返回超出預算的項目說明"""
+    failures = []
+    for module, budget in (budgets or IMPORT_TIME_BUDGET_US).items():
+        elapsed = measure_import_time(module)
+        status = "OK" if elapsed <= budget else "超出預算"
+        print(f"import {module:<24} {elapsed / 1000:>8.1f} ms  (預算 {budget / 1000:.0f} ms) {status}")
+        if elapsed > budget:
+            failures.append(f"{module}: {elapsed / 1000:.1f}ms > {budget / 1000:.0f}ms")
+    return failures
+
+
+def load_baseline(path: str) -> Dict:
+    """讀取基線文件"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('results', {})
+
+
+def save_baseline(path: str, results: Dict):
+    """保存基線文件"""
+    data = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'results': results
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def compare_results(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """與基線比較最短耗時，返回退化超過閾值的項目說明"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        ratio = result['min'] / base['min'] if base['min'] else 1.0
+        if ratio > 1.0 + threshold:
+            regressions.append(
+                f"{name}: {base['min'] * 1e6:.1f}µs -> {result['min'] * 1e6:.1f}µs "
+                f"(+{(ratio - 1) * 100:.1f}%，閾值 {threshold * 100:.0f}%)"
+            )
+    return regressions
+
+
+def main(argv=None) -> int:
+    """主函數"""
+    parser = argparse.ArgumentParser(description="八字算命程式性能基準測試")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="基線JSON文件路徑")
+    parser.add_argument('--save-baseline', action='store_true', help="將本次結果保存為基線")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="允許的退化比例，默認0.2即20%%")
+    parser.add_argument('--repeat', type=int, default=5, help="每個項目的重複輪數")
+    parser.add_argument('--filter', default='', help="只運行名稱包含該字串的項目")
+    parser.add_argument('--output', help="另存本次結果的JSON文件路徑")
+    parser.add_argument('--import-budget', action='store_true', help="只檢查冷啟動導入耗時預算")
+    args = parser.parse_args(argv)
+
+    if args.import_budget:
+        failures = check_import_budget()
+        return 1 if failures else 0
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    results = {}
+    for name in names:
+        result = run_benchmark(name, repeat=args.repeat)
+        results[name] = result
+        print(f"{name:<32} {result['min'] * 1e6:>12.1f} µs  {result['ops_per_sec']:>12.1f} ops/s")
+
+    if args.output:
+        save_baseline(args.output, results)
+
+    if args.save_baseline:
+        baseline = load_baseline(args.baseline)
+        baseline.update(results)
+        save_baseline(args.baseline, baseline)
+        print(f"基線已保存：{args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if not baseline:
+        print("未找到基線文件，跳過比較。使用 --save-baseline 記錄基線。")
+        return 0
+
+    regressions = compare_results(results, baseline, args.threshold)
+    if regressions:
+        print("\n性能退化：")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+
+    print("\n所有項目均在閾值範圍內。")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量排盤模組
+以干支曆表及各查表引擎，按列（NumPy 數組）一次計算整批八字、五行分析及大運，
+結果與 BaziCalculator 逐個計算一致，列名及類型見 CHART_SCHEMA
+"""
+
+from typing import Dict, List, Sequence, Tuple
+from pillar_calendar import PillarCalendar, get_calendar
+
+# 五行列名後綴，順序同 wuxing_strength.WUXING（木火土金水）
+ELEMENT_SUFFIXES = ('wood', 'fire', 'earth', 'metal', 'water')
+
+# 大運步數及起運年齡（與 BaziCalculator.calculate_dayun 一致）
+DAYUN_STEPS = 10
+QIYUN_AGE = 7
+
+# 列定義：(列名, NumPy 類型)
+CHART_SCHEMA: List[Tuple[str, str]] = (
+    [('birth_ordinal', 'int32'), ('birth_minute', 'int16'), ('gender', 'int8'),
+     ('year_pillar', 'int8'), ('month_pillar', 'int8'), ('day_pillar', 'int8'), ('hour_pillar', 'int8'),
+     ('day_master', 'int8')] +
+    [(f'count_{e}', 'int8') for e in ELEMENT_SUFFIXES] +
+    [(f'strength_{e}', 'float32') for e in ELEMENT_SUFFIXES] +
+    [('max_element', 'int8'), ('min_element', 'int8'),
+     ('favorable_1', 'int8'), ('favorable_2', 'int8'),
+     ('qiyun_age', 'int8'), ('dayun_forward', 'int8')] +
+    [(f'dayun_{i + 1}', 'int8') for i in range(DAYUN_STEPS)]
+)
+
+# 性別編碼
+GENDER_CODES = {'男': 0, '女': 1}
+
+
+def _branch_elements():
+    """地支本氣五行序號數組"""
+    import numpy as np
+    from bazi_calculator import BaziCalculator
+    from wuxing_strength import WUXING
+
+    return np.array([WUXING.index(BaziCalculator.WUXING_DIZHI[zhi]) for zhi in BaziCalculator.DIZHI])
+
+
+def compute_columns(ordinals, minutes, genders, method: str = 'count',
+                    late_zi_next_day: bool = False, calendar: PillarCalendar = None) -> Dict:
+    """批量排盤
+
+    ordinals 為公曆序數，minutes 為當日第幾分鐘，genders 為性別編碼（男0女1）。
+    method 同 analyze_wuxing_balance：'count' 按干支個數判斷喜用神，
+    'weighted' 按藏干及月令加權。返回 {列名: 數組}。
+    """
+    import numpy as np
+    from wuxing_strength import batch_strength, batch_favorable
+
+    if method not in ('count', 'weighted'):
+        raise ValueError(f"未知的五行分析方法：{method}")
+    calendar = calendar or get_calendar()
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    minutes = np.asarray(minutes, dtype=np.int64)
+    genders = np.asarray(genders, dtype=np.int8)
+    n = len(ordinals)
+
+    stems, branches = calendar.chart_codes(ordinals, minutes // 60, late_zi_next_day)
+    pillars = (6 * stems - 5 * branches) % 60
+
+    # 五行個數：天干、地支本氣各計一個
+    elements = np.concatenate([stems // 2, _branch_elements()[branches]], axis=1)
+    offsets = np.arange(n)[:, None] * 5
+    counts = np.bincount((elements + offsets).ravel(), minlength=n * 5).reshape(n, 5)
+    strength = batch_strength(stems, branches)
+
+    day_master = stems[:, 2] // 2
+    if method == 'count':
+        rows = np.arange(n)
+        weak = counts[rows, day_master] <= 2
+        favorable = np.stack([
+            np.where(weak, (day_master - 1) % 5, (day_master + 3) % 5),
+            np.where(weak, day_master, (day_master + 1) % 5)
+        ], axis=1)
+        ranking = counts
+    else:
+        favorable = batch_favorable(stems, strength)
+        # 與 analyze_wuxing_balance 相同，按保留4位小數的力量取最強最弱
+        ranking = np.round(strength, 4)
+
+    # 大運：陽年男命、陰年女命順排，從月柱起逐步加減一
+    forward = (stems[:, 0] % 2 == 0) == (genders == 0)
+    steps = np.arange(1, DAYUN_STEPS + 1)
+    direction = np.where(forward, 1, -1)[:, None]
+    dayun = (pillars[:, 1:2] + direction * steps) % 60
+
+    columns = {
+        'birth_ordinal': ordinals, 'birth_minute': minutes, 'gender': genders,
+        'year_pillar': pillars[:, 0], 'month_pillar': pillars[:, 1],
+        'day_pillar': pillars[:, 2], 'hour_pillar': pillars[:, 3],
+        'day_master': stems[:, 2],
+        'max_element': ranking.argmax(axis=1), 'min_element': ranking.argmin(axis=1),
+        'favorable_1': favorable[:, 0], 'favorable_2': favorable[:, 1],
+        'qiyun_age': np.full(n, QIYUN_AGE), 'dayun_forward': forward
+    }
+    for e, suffix in enumerate(ELEMENT_SUFFIXES):
+        columns[f'count_{suffix}'] = counts[:, e]
+        columns[f'strength_{suffix}'] = strength[:, e]
+    for i in range(DAYUN_STEPS):
+        columns[f'dayun_{i + 1}'] = dayun[:, i]
+    return {name: np.ascontiguousarray(columns[name], dtype=dtype) for name, dtype in CHART_SCHEMA}
+
+
+def columns_from_charts(items: Sequence[Tuple]) -> Dict:
+    """把已逐個計算的結果轉為列
+
+    items 為 (birth_date, birth_time, gender, bazi_info, wuxing_analysis, dayun_list) 序列，
+    即 EnhancedFortuneTeller.calculate_bazi 的輸入與輸出。
+    """
+    import numpy as np
+    from bazi_calculator import BaziCalculator
+    from pillar_calendar import parse_pillar
+    from wuxing_strength import WUXING, strength_vector
+    from shishen import chart_codes
+
+    rows = {name: [] for name, _ in CHART_SCHEMA}
+    for birth_date, birth_time, gender, bazi_info, wuxing_analysis, dayun_list in items:
+        stems, branches = chart_codes(bazi_info)
+        pillars = [parse_pillar(bazi_info[key]) for key in
+                   ('year_pillar', 'month_pillar', 'day_pillar', 'hour_pillar')]
+        counts = [wuxing_analysis['wuxing_count'][e] for e in WUXING]
+        strength = strength_vector(stems, branches)
+        favorable = [WUXING.index(e) for e in wuxing_analysis['favorable_elements']]
+        record = {
+            'birth_ordinal': birth_date.toordinal(),
+            'birth_minute': birth_time.hour * 60 + birth_time.minute,
+            'gender': GENDER_CODES[gender],
+            'year_pillar': pillars[0], 'month_pillar': pillars[1],
+            'day_pillar': pillars[2], 'hour_pillar': pillars[3],
+            'day_master': BaziCalculator.TIANGAN.index(bazi_info['day_master']),
+            'max_element': WUXING.index(wuxing_analysis['max_wuxing']),
+            'min_element': WUXING.index(wuxing_analysis['min_wuxing']),
+            'favorable_1': favorable[0], 'favorable_2': favorable[1],
+            'qiyun_age': dayun_list[0]['start_age'] if dayun_list else QIYUN_AGE,
+            'dayun_forward': int(len(dayun_list) > 0 and
+                                 (parse_pillar(dayun_list[0]['pillar']) - pillars[1]) % 60 == 1)
+        }
+        for e, suffix in enumerate(ELEMENT_SUFFIXES):
+            record[f'count_{suffix}'] = counts[e]
+            record[f'strength_{suffix}'] = strength[e]
+        for i in range(DAYUN_STEPS):
+            record[f'dayun_{i + 1}'] = parse_pillar(dayun_list[i]['pillar']) if i < len(dayun_list) else -1
+        for name in rows:
+            rows[name].append(record[name])
+    return {name: np.asarray(rows[name], dtype=dtype) for name, dtype in CHART_SCHEMA}
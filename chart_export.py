@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+八字列式導出模組
+把批量排盤的結果按塊寫出為列式文件，供數據分析使用：
+    columns  每列一個原始二進制文件 + schema.json，以 np.memmap 零拷貝讀取
+    npz      未壓縮 NPZ，每列一個 .npy 成員
+    arrow    Arrow IPC 文件，以 pyarrow.memory_map 零拷貝讀取（需安裝 pyarrow）
+    parquet  Parquet，每塊一個 row group（需安裝 pyarrow）
+寫出時每次只持有一塊數據，內存佔用與總行數無關
+"""
+
+import json
+import os
+import zipfile
+from typing import Dict, Iterable, Iterator
+from chart_batch import CHART_SCHEMA, compute_columns
+
+FORMATS = ('columns', 'npz', 'arrow', 'parquet')
+
+# 每塊行數
+DEFAULT_CHUNK = 1 << 18
+
+SCHEMA_FILE = 'schema.json'
+
+
+def _require_pyarrow():
+    """導入 pyarrow，未安裝時給出提示"""
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise ImportError("Arrow/Parquet 格式需要 pyarrow，請執行 pip install pyarrow") from e
+    return pyarrow
+
+
+def _arrow_schema(pa):
+    """CHART_SCHEMA -> pyarrow.Schema"""
+    return pa.schema([(name, pa.from_numpy_dtype(dtype)) for name, dtype in CHART_SCHEMA])
+
+
+class ColumnarWriter:
+    """按塊寫出列式文件"""
+
+    def __init__(self, path: str, fmt: str = 'columns'):
+        """path 對 columns 格式為目錄，其餘格式為文件"""
+        if fmt not in FORMATS:
+            raise ValueError(f"未知的導出格式：{fmt}")
+        self.path = path
+        self.fmt = fmt
+        self.rows = 0
+        self._files = {}
+        self._writer = None
+
+        if fmt in ('columns', 'npz'):
+            # npz 先逐列寫入臨時目錄，關閉時再按列流式打包
+            self._dir = path if fmt == 'columns' else path + '.parts'
+            os.makedirs(self._dir, exist_ok=True)
+            self._files = {name: open(os.path.join(self._dir, f'{name}.bin'), 'wb')
+                           for name, _ in CHART_SCHEMA}
+        else:
+            pa = _require_pyarrow()
+            schema = _arrow_schema(pa)
+            if fmt == 'arrow':
+                self._writer = pa.ipc.new_file(path, schema)
+            else:
+                self._writer = pa.parquet.ParquetWriter(path, schema)
+            self._schema = schema
+
+    def write(self, columns: Dict):
+        """寫出一塊，columns 為 compute_columns 的結果"""
+        import numpy as np
+
+        count = len(columns[CHART_SCHEMA[0][0]])
+        if self._files:
+            for name, dtype in CHART_SCHEMA:
+                np.ascontiguousarray(columns[name], dtype=dtype).tofile(self._files[name])
+        else:
+            import pyarrow as pa
+
+            batch = pa.record_batch([pa.array(np.asarray(columns[name], dtype=dtype))
+                                     for name, dtype in CHART_SCHEMA], schema=self._schema)
+            if self.fmt == 'arrow':
+                self._writer.write_batch(batch)
+            else:
+                self._writer.write_table(pa.Table.from_batches([batch]))
+        self.rows += count
+
+    def close(self):
+        """完成寫出"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            return
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+        if self.fmt == 'columns':
+            self._write_schema(self.path)
+        else:
+            self._pack_npz()
+
+    def _write_schema(self, directory: str):
+        with open(os.path.join(directory, SCHEMA_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'rows': self.rows, 'columns': CHART_SCHEMA}, f)
+
+    def _pack_npz(self):
+        """把各列臨時文件打包為未壓縮 NPZ（np.lib.format 按塊寫出）"""
+        import numpy as np
+
+        with zipfile.ZipFile(self.path, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for name, dtype in CHART_SCHEMA:
+                part = os.path.join(self._dir, f'{name}.bin')
+                data = np.memmap(part, dtype=dtype, mode='r', shape=(self.rows,)) if self.rows else \
+                    np.empty(0, dtype=dtype)
+                with archive.open(f'{name}.npy', 'w', force_zip64=True) as member:
+                    np.lib.format.write_array(member, data, allow_pickle=False)
+                del data
+                os.remove(part)
+        os.rmdir(self._dir)
+
+    def __enter__(self) -> 'ColumnarWriter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_chunks(ordinals, minutes, genders, chunk: int = DEFAULT_CHUNK, **options) -> Iterator[Dict]:
+    """按塊批量排盤，options 傳給 compute_columns"""
+    for start in range(0, len(ordinals), chunk):
+        stop = start + chunk
+        yield compute_columns(ordinals[start:stop], minutes[start:stop], genders[start:stop], **options)
+
+
+def write_chunks(path: str, chunks: Iterable[Dict], fmt: str = 'columns') -> int:
+    """把列塊流寫出，返回總行數"""
+    with ColumnarWriter(path, fmt) as writer:
+        for columns in chunks:
+            writer.write(columns)
+    return writer.rows
+
+
+def export_charts(path: str, ordinals, minutes, genders, fmt: str = 'columns',
+                  chunk: int = DEFAULT_CHUNK, **options) -> int:
+    """批量排盤並導出，輸入可為內存映射數組"""
+    return write_chunks(path, iter_chunks(ordinals, minutes, genders, chunk, **options), fmt)
+
+
+def read_columns(path: str, fmt: str = None) -> Dict:
+    """讀回導出的列
+
+    columns 格式返回 np.memmap；arrow 格式自內存映射文件讀取，多塊時拼接，
+    需逐塊零拷貝時用 iter_arrow_batches；npz 及 parquet 格式讀入內存。
+    fmt 省略時按路徑推斷。
+    """
+    import numpy as np
+
+    if fmt is None:
+        fmt = 'columns' if os.path.isdir(path) else os.path.splitext(path)[1].lstrip('.')
+    if fmt == 'columns':
+        with open(os.path.join(path, SCHEMA_FILE), encoding='utf-8') as f:
+            schema = json.load(f)
+        rows = schema['rows']
+        return {name: np.memmap(os.path.join(path, f'{name}.bin'), dtype=dtype, mode='r', shape=(rows,))
+                if rows else np.empty(0, dtype=dtype)
+                for name, dtype in schema['columns']}
+    if fmt == 'npz':
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+    pa = _require_pyarrow()
+    if fmt == 'arrow':
+        table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    elif fmt == 'parquet':
+        table = pa.parquet.read_table(path, memory_map=True)
+    else:
+        raise ValueError(f"未知的導出格式：{fmt}")
+    return {name: table.column(name).to_numpy() for name in table.column_names}
+
+
+def iter_arrow_batches(path: str) -> Iterator[Dict]:
+    """逐塊讀取 Arrow 文件，返回指向內存映射區的 NumPy 視圖（零拷貝）"""
+    pa = _require_pyarrow()
+    reader = pa.ipc.open_file(pa.memory_map(path, 'r'))
+    for i in range(reader.num_record_batches):
+        batch = reader.get_batch(i)
+        yield {name: batch.column(j).to_numpy(zero_copy_only=True)
+               for j, name in enumerate(batch.schema.names)}
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+八字相似檢索模組
+把客戶八字存為緊湊的數值向量（四柱六十甲子序號 + 歸一化五行力量），
+以內存映射文件保存；四柱及日主精確篩選走預先建立的倒排表，
+相似查詢在五行向量上分塊求最近鄰
+"""
+
+import json
+import os
+from typing import Dict, Optional, Tuple
+from shishen import chart_codes
+from wuxing_strength import strength_vector
+
+INDEX_VERSION = 1
+
+# 倒排表鍵：四柱各60個序號，之後10個日主天干
+PILLAR_KEYS = 60
+DAY_MASTER_BASE = 4 * PILLAR_KEYS
+POSTING_KEYS = DAY_MASTER_BASE + 10
+
+# 分塊大小（行）
+DEFAULT_CHUNK = 1 << 20
+
+
+def _pillar_codes(stems, branches):
+    """(N, 4) 干支序號 -> (N, 4) 六十甲子序號"""
+    import numpy as np
+
+    return ((6 * np.asarray(stems, dtype=np.int16) - 5 * np.asarray(branches, dtype=np.int16)) % 60).astype(np.int8)
+
+
+def _normalize(strength):
+    """五行力量按行歸一化為比例"""
+    import numpy as np
+
+    strength = np.asarray(strength, dtype=np.float32)
+    total = strength.sum(axis=-1, keepdims=True)
+    return strength / np.where(total > 0, total, 1)
+
+
+class ChartIndex:
+    """八字相似檢索索引
+
+    目錄內容：
+        pillars.npy           (N, 4) int8   年月日時柱序號
+        strength.npy          (N, 5) float32 歸一化五行力量
+        postings_offsets.npy  (POSTING_KEYS + 1,) int64
+        postings_rows.npy     (5N,) int32   按鍵排列的行號，每個鍵內升序
+        meta.json
+    """
+
+    def __init__(self, path: str):
+        """打開已建立的索引（內存映射，只讀）"""
+        import numpy as np
+
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != INDEX_VERSION:
+            raise ValueError(f"索引版本不符：{self.meta.get('version')}")
+        self.path = path
+        self.pillars = np.load(os.path.join(path, 'pillars.npy'), mmap_mode='r')
+        self.strength = np.load(os.path.join(path, 'strength.npy'), mmap_mode='r')
+        self.offsets = np.load(os.path.join(path, 'postings_offsets.npy'))
+        self.rows = np.load(os.path.join(path, 'postings_rows.npy'), mmap_mode='r')
+
+    def __len__(self) -> int:
+        return len(self.pillars)
+
+    @classmethod
+    def build(cls, path: str, stem_codes, branch_codes, strength=None,
+              chunk: int = DEFAULT_CHUNK) -> 'ChartIndex':
+        """由 (N, 4) 干支序號建立索引
+
+        strength 省略時以 wuxing_strength.batch_strength 分塊計算。
+        輸入可為內存映射數組，按塊寫入，不會一次載入全部數據。
+        """
+        import numpy as np
+        from numpy.lib.format import open_memmap
+        from wuxing_strength import batch_strength
+
+        os.makedirs(path, exist_ok=True)
+        n = len(stem_codes)
+        pillars = open_memmap(os.path.join(path, 'pillars.npy'), mode='w+', dtype=np.int8, shape=(n, 4))
+        vectors = open_memmap(os.path.join(path, 'strength.npy'), mode='w+', dtype=np.float32, shape=(n, 5))
+        for start in range(0, n, chunk):
+            stop = min(start + chunk, n)
+            stems = np.asarray(stem_codes[start:stop])
+            branches = np.asarray(branch_codes[start:stop])
+            pillars[start:stop] = _pillar_codes(stems, branches)
+            block = strength[start:stop] if strength is not None else batch_strength(stems, branches)
+            vectors[start:stop] = _normalize(block)
+        pillars.flush()
+        vectors.flush()
+
+        # 倒排表：按（鍵, 行號）排序，等價於逐鍵的升序行號列表
+        counts = np.zeros(POSTING_KEYS, dtype=np.int64)
+        rows = open_memmap(os.path.join(path, 'postings_rows.npy'), mode='w+', dtype=np.int32, shape=(5 * n,))
+        columns = [(pos * PILLAR_KEYS, lambda p, pos=pos: p[:, pos].astype(np.int64))
+                   for pos in range(4)]
+        columns.append((DAY_MASTER_BASE, lambda p: p[:, 2].astype(np.int64) % 10))
+        cursor = 0
+        for base, key_of in columns:
+            keys = key_of(pillars) + base
+            order = np.argsort(keys, kind='stable')
+            rows[cursor:cursor + n] = order
+            counts += np.bincount(keys, minlength=POSTING_KEYS)
+            cursor += n
+        rows.flush()
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        np.save(os.path.join(path, 'postings_offsets.npy'), offsets)
+
+        with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'count': n}, f)
+        del pillars, vectors, rows
+        return cls(path)
+
+    def postings(self, key: int):
+        """某鍵的行號列表（升序）"""
+        return self.rows[self.offsets[key]:self.offsets[key + 1]]
+
+    def candidates(self, year: Optional[int] = None, month: Optional[int] = None,
+                   day: Optional[int] = None, hour: Optional[int] = None,
+                   day_master: Optional[int] = None):
+        """按四柱序號及日主天干精確篩選，返回升序行號；無條件時返回 None（全部）"""
+        import numpy as np
+
+        keys = [pos * PILLAR_KEYS + code for pos, code in enumerate((year, month, day, hour))
+                if code is not None]
+        if day_master is not None:
+            keys.append(DAY_MASTER_BASE + day_master)
+        if not keys:
+            return None
+        lists = sorted((self.postings(key) for key in keys), key=len)
+        result = np.asarray(lists[0])
+        for other in lists[1:]:
+            if not len(result) or not len(other):
+                return result[:0]
+            # 短表逐個在長表中二分查找
+            found = np.minimum(np.searchsorted(other, result), len(other) - 1)
+            result = result[np.asarray(other[found]) == result]
+        return result
+
+    def nearest(self, vector, k: int = 10, rows=None, chunk: int = DEFAULT_CHUNK) -> Tuple:
+        """五行向量最近鄰（歐氏距離）
+
+        rows 為候選行號（如 candidates() 的結果），省略時掃描全部。
+        返回 (行號, 距離)，按距離由近到遠排列。
+        """
+        import numpy as np
+
+        query = _normalize(vector).reshape(5)
+        total = len(self) if rows is None else len(rows)
+        best_rows = np.empty(0, dtype=np.int64)
+        best_dist = np.empty(0, dtype=np.float32)
+        for start in range(0, total, chunk):
+            stop = min(start + chunk, total)
+            if rows is None:
+                ids = np.arange(start, stop)
+                block = self.strength[start:stop]
+            else:
+                ids = np.asarray(rows[start:stop], dtype=np.int64)
+                block = self.strength[ids]
+            dist = ((block - query) ** 2).sum(axis=1)
+            # 與目前的前 k 名合併，只保留 k 個
+            ids = np.concatenate([best_rows, ids])
+            dist = np.concatenate([best_dist, dist])
+            if len(dist) > k:
+                keep = np.argpartition(dist, k - 1)[:k]
+                ids, dist = ids[keep], dist[keep]
+            best_rows, best_dist = ids, dist
+        order = np.lexsort((best_rows, best_dist))
+        return best_rows[order], np.sqrt(best_dist[order])
+
+    def similar(self, bazi_info: Dict, k: int = 10, same_day_master: bool = True,
+                shared_pillars: Tuple[str, ...] = ()) -> Tuple:
+        """查找與給定八字相似的客戶
+
+        shared_pillars 為須相同的柱，取值 'year'、'month'、'day'、'hour'。
+        """
+        stems, branches = chart_codes(bazi_info)
+        codes = [int(c) for c in _pillar_codes([stems], [branches])[0]]
+        names = ('year', 'month', 'day', 'hour')
+        filters = {name: codes[pos] for pos, name in enumerate(names) if name in shared_pillars}
+        rows = self.candidates(day_master=stems[2] if same_day_master else None, **filters)
+        return self.nearest(strength_vector(stems, branches), k, rows)
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+八字存儲模組
+以本地 SQLite 文件保存客戶、八字盤、五行分析及報告記錄，
+出生時間、日柱、日主均建索引；WAL 模式下以 executemany 批量寫入
+"""
+
+import datetime
+import sqlite3
+from typing import Dict, List, Optional, Sequence, Union
+from chart_batch import ELEMENT_SUFFIXES, GENDER_CODES
+
+DEFAULT_DB = 'askbazi.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS customers (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    gender INTEGER NOT NULL,
+    birth_datetime TEXT NOT NULL,
+    longitude REAL,
+    timezone TEXT,
+    created_at TEXT NOT NULL DEFAULT (datetime('now')),
+    UNIQUE (name, gender, birth_datetime)
+);
+CREATE TABLE IF NOT EXISTS charts (
+    id INTEGER PRIMARY KEY,
+    customer_id INTEGER REFERENCES customers(id),
+    birth_datetime TEXT NOT NULL,
+    gender INTEGER NOT NULL,
+    year_pillar INTEGER NOT NULL,
+    month_pillar INTEGER NOT NULL,
+    day_pillar INTEGER NOT NULL,
+    hour_pillar INTEGER NOT NULL,
+    day_master INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS analyses (
+    chart_id INTEGER PRIMARY KEY REFERENCES charts(id),
+    method TEXT NOT NULL,
+    count_wood INTEGER, count_fire INTEGER, count_earth INTEGER, count_metal INTEGER, count_water INTEGER,
+    max_element INTEGER, min_element INTEGER,
+    favorable_1 INTEGER, favorable_2 INTEGER,
+    qiyun_age INTEGER, dayun_forward INTEGER
+);
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    customer_id INTEGER REFERENCES customers(id),
+    chart_id INTEGER REFERENCES charts(id),
+    style TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size_bytes INTEGER,
+    created_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+CREATE INDEX IF NOT EXISTS idx_customers_birth ON customers(birth_datetime);
+CREATE INDEX IF NOT EXISTS idx_charts_birth ON charts(birth_datetime);
+CREATE INDEX IF NOT EXISTS idx_charts_day_pillar ON charts(day_pillar);
+CREATE INDEX IF NOT EXISTS idx_charts_day_master ON charts(day_master);
+CREATE INDEX IF NOT EXISTS idx_charts_customer ON charts(customer_id);
+CREATE INDEX IF NOT EXISTS idx_reports_customer ON reports(customer_id);
+"""
+
+CHART_COLUMNS = ('id', 'customer_id', 'birth_datetime', 'gender', 'year_pillar', 'month_pillar',
+                 'day_pillar', 'hour_pillar', 'day_master')
+ANALYSIS_COLUMNS = (('chart_id', 'method') + tuple(f'count_{e}' for e in ELEMENT_SUFFIXES) +
+                    ('max_element', 'min_element', 'favorable_1', 'favorable_2', 'qiyun_age', 'dayun_forward'))
+
+
+def analysis_method(wuxing_analysis: Dict) -> str:
+    """五行分析的計算方法（記錄於 analyses.method）"""
+    return 'weighted' if 'wuxing_strength' in wuxing_analysis else 'count'
+
+
+def format_birth(birth_date: datetime.date, birth_time: datetime.time) -> str:
+    """出生時間 -> 'YYYY-MM-DD HH:MM'（可按字串排序）"""
+    return f"{birth_date.isoformat()} {birth_time.hour:02d}:{birth_time.minute:02d}"
+
+
+def _pillar_code(pillar: Union[int, str]) -> int:
+    """接受六十甲子序號或干支字串"""
+    if isinstance(pillar, str):
+        from pillar_calendar import parse_pillar
+        return parse_pillar(pillar)
+    return int(pillar)
+
+
+def _stem_code(stem: Union[int, str]) -> int:
+    """接受天干序號或天干字"""
+    if isinstance(stem, str):
+        from bazi_calculator import BaziCalculator
+        return BaziCalculator.TIANGAN.index(stem)
+    return int(stem)
+
+
+class ChartStore:
+    """八字存儲"""
+
+    def __init__(self, path: str = DEFAULT_DB):
+        """打開（或創建）數據庫文件"""
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA foreign_keys=ON')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self) -> 'ChartStore':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # 寫入
+
+    def add_customer(self, name: str, gender: str, birth_date: datetime.date, birth_time: datetime.time,
+                     longitude: float = None, timezone: str = None) -> int:
+        """登記客戶，同名同性別同出生時間視為同一人，返回客戶 id
+
+        已有的客戶更新為本次提供的經度及時區（未提供的保留原值）。
+        """
+        birth = format_birth(birth_date, birth_time)
+        with self.conn:
+            row = self.conn.execute(
+                'INSERT INTO customers (name, gender, birth_datetime, longitude, timezone) '
+                'VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (name, gender, birth_datetime) DO UPDATE SET '
+                'longitude = COALESCE(excluded.longitude, longitude), '
+                'timezone = COALESCE(excluded.timezone, timezone) '
+                'RETURNING id',
+                (name, GENDER_CODES[gender], birth, longitude, timezone)).fetchone()
+        return row['id']
+
+    def insert_columns(self, columns: Dict, customer_ids: Sequence[Optional[int]] = None,
+                       method: str = 'count') -> List[int]:
+        """批量寫入八字盤及分析結果
+
+        columns 為 chart_batch.compute_columns 或 columns_from_charts 的結果。
+        在同一事務內以 executemany 寫入，返回新八字盤的 id 列表。
+        """
+        import numpy as np
+
+        n = len(columns['birth_ordinal'])
+        if not n:
+            return []
+        # 出生時間字串按數組一次格式化
+        epoch = datetime.date(1970, 1, 1).toordinal()
+        moments = ((np.asarray(columns['birth_ordinal'], dtype=np.int64) - epoch) * 1440 +
+                   np.asarray(columns['birth_minute'], dtype=np.int64)).astype('datetime64[m]')
+        births = np.char.replace(moments.astype(str), 'T', ' ').tolist()
+        if customer_ids is None:
+            customer_ids = [None] * n
+
+        with self.conn:
+            # 先取得寫鎖再分配 id：多個進程同時寫入時，讀取 MAX(id) 與插入之間不會被插隊
+            self.conn.execute('BEGIN IMMEDIATE')
+            start = self.conn.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM charts').fetchone()[0]
+            ids = list(range(start, start + n))
+            chart_rows = zip(ids, customer_ids, births,
+                             *(columns[name].tolist() for name in CHART_COLUMNS[3:]))
+            self.conn.executemany(
+                f"INSERT INTO charts ({', '.join(CHART_COLUMNS)}) VALUES ({', '.join('?' * len(CHART_COLUMNS))})",
+                chart_rows)
+            analysis_rows = zip(ids, [method] * n, *(columns[name].tolist() for name in ANALYSIS_COLUMNS[2:]))
+            self.conn.executemany(
+                f"INSERT INTO analyses ({', '.join(ANALYSIS_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(ANALYSIS_COLUMNS))})",
+                analysis_rows)
+        return ids
+
+    def save_chart(self, customer_id: Optional[int], birth_date: datetime.date, birth_time: datetime.time,
+                   gender: str, bazi_info: Dict, wuxing_analysis: Dict, dayun_list: List[Dict]) -> int:
+        """保存單個八字盤及其分析，返回八字盤 id"""
+        from chart_batch import columns_from_charts
+
+        columns = columns_from_charts([(birth_date, birth_time, gender, bazi_info, wuxing_analysis, dayun_list)])
+        method = analysis_method(wuxing_analysis)
+        return self.insert_columns(columns, [customer_id], method)[0]
+
+    def find_matching_chart(self, customer_id: int, birth_date: datetime.date, birth_time: datetime.time,
+                            gender: str, bazi_info: Dict, method: str = 'count') -> Optional[int]:
+        """客戶已保存、且出生資料、四柱及分析方法與本次排盤一致的八字盤 id，沒有時返回None"""
+        row = self.conn.execute(
+            'SELECT c.id FROM charts c JOIN analyses a ON a.chart_id = c.id '
+            'WHERE c.customer_id = ? AND c.birth_datetime = ? AND c.gender = ? AND c.year_pillar = ? '
+            'AND c.month_pillar = ? AND c.day_pillar = ? AND c.hour_pillar = ? AND a.method = ? '
+            'ORDER BY c.id DESC LIMIT 1',
+            (customer_id, format_birth(birth_date, birth_time), GENDER_CODES[gender],
+             *(_pillar_code(bazi_info[key]) for key in ('year_pillar', 'month_pillar', 'day_pillar', 'hour_pillar')),
+             method)).fetchone()
+        return row['id'] if row else None
+
+    def record_report(self, customer_id: Optional[int], chart_id: Optional[int], style: str,
+                      path: str, size_bytes: int = None) -> int:
+        """記錄已生成的報告文件，返回報告 id"""
+        with self.conn:
+            cursor = self.conn.execute(
+                'INSERT INTO reports (customer_id, chart_id, style, path, size_bytes) VALUES (?, ?, ?, ?, ?)',
+                (customer_id, chart_id, style, path, size_bytes))
+        return cursor.lastrowid
+
+    # 查詢
+
+    def find_customers(self, name: str = None, birth_date: datetime.date = None) -> List[Dict]:
+        """按姓名及（或）出生日期查找客戶"""
+        sql, params = 'SELECT * FROM customers WHERE 1 = 1', []
+        if name is not None:
+            sql += ' AND name = ?'
+            params.append(name)
+        if birth_date is not None:
+            sql += ' AND birth_datetime >= ? AND birth_datetime < ?'
+            params += [birth_date.isoformat(), (birth_date + datetime.timedelta(days=1)).isoformat()]
+        return [dict(row) for row in self.conn.execute(sql + ' ORDER BY id', params)]
+
+    def get_chart(self, chart_id: int) -> Optional[Dict]:
+        """按 id 讀取八字盤及分析"""
+        row = self.conn.execute(
+            'SELECT c.*, a.* FROM charts c LEFT JOIN analyses a ON a.chart_id = c.id WHERE c.id = ?',
+            (chart_id,)).fetchone()
+        return dict(row) if row else None
+
+    def charts_for_customer(self, customer_id: int) -> List[Dict]:
+        """客戶的全部八字盤"""
+        return [dict(row) for row in self.conn.execute(
+            'SELECT * FROM charts WHERE customer_id = ? ORDER BY id', (customer_id,))]
+
+    def find_charts(self, day_pillar: Union[int, str] = None, day_master: Union[int, str] = None,
+                    born_from: datetime.datetime = None, born_to: datetime.datetime = None,
+                    limit: int = None) -> List[Dict]:
+        """按日柱、日主及出生時間範圍 [born_from, born_to) 查詢八字盤"""
+        sql, params = 'SELECT * FROM charts WHERE 1 = 1', []
+        if day_pillar is not None:
+            sql += ' AND day_pillar = ?'
+            params.append(_pillar_code(day_pillar))
+        if day_master is not None:
+            sql += ' AND day_master = ?'
+            params.append(_stem_code(day_master))
+        if born_from is not None:
+            sql += ' AND birth_datetime >= ?'
+            params.append(format_birth(born_from.date(), born_from.time()))
+        if born_to is not None:
+            sql += ' AND birth_datetime < ?'
+            params.append(format_birth(born_to.date(), born_to.time()))
+        sql += ' ORDER BY id'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def reports_for_customer(self, customer_id: int) -> List[Dict]:
+        """客戶的報告記錄，按生成時間排列"""
+        return [dict(row) for row in self.conn.execute(
+            'SELECT * FROM reports WHERE customer_id = ? ORDER BY id', (customer_id,))]
+
+    def stats(self) -> Dict:
+        """各表記錄數"""
+        return {table: self.conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                for table in ('customers', 'charts', 'analyses', 'reports')}
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合婚配對模組
+以預先計算的干支關係分數表為兩個八字評分，並支持 N×M 分塊批量配對及每人前K名查詢
+"""
+
+from functools import lru_cache
+from typing import Dict, Iterator, Sequence, Tuple
+from ganzhi_relations import (BRANCH_RELATIONS, STEM_RELATIONS, LIUHE, CHONG, XING, HAI, BANHE,
+                              STEM_HE, STEM_CHONG, relation_names, score_table, STEM_RELATION_NAMES)
+from shishen import chart_codes
+from wuxing_strength import WUXING, strength_vector, favorable_elements
+
+# 基礎分
+BASE_SCORE = 50.0
+
+# 日干：五合為佳，相沖不利
+DAY_STEM_SCORES = score_table(STEM_RELATIONS, {STEM_HE: 15.0, STEM_CHONG: -10.0})
+
+# 日支（夫妻宮）：六合、半合為佳，沖刑害不利
+DAY_BRANCH_SCORES = score_table(BRANCH_RELATIONS, {
+    LIUHE: 15.0, BANHE: 8.0, CHONG: -15.0, XING: -8.0, HAI: -8.0
+})
+
+# 年支（生肖）
+YEAR_BRANCH_SCORES = score_table(BRANCH_RELATIONS, {
+    LIUHE: 10.0, BANHE: 6.0, CHONG: -10.0, XING: -5.0, HAI: -6.0
+})
+
+# 五行互補：對方五行力量落在己方喜用神上的比例，雙向各佔此分數
+COMPLEMENT_WEIGHT = 10.0
+
+
+def chart_profile(bazi_info: Dict) -> Dict:
+    """提取配對所需的八字特徵"""
+    stems, branches = chart_codes(bazi_info)
+    strength = strength_vector(stems, branches)
+    total = sum(strength) or 1.0
+    return {
+        'day_gan': stems[2],
+        'day_zhi': branches[2],
+        'year_zhi': branches[0],
+        'strength': tuple(v / total for v in strength),
+        'favorable': tuple(favorable_elements(stems[2] // 2, strength))
+    }
+
+
+def score_pair(bazi_a: Dict, bazi_b: Dict) -> Dict:
+    """為兩個八字評分，返回總分及各項明細"""
+    a = chart_profile(bazi_a)
+    b = chart_profile(bazi_b)
+
+    day_stem = DAY_STEM_SCORES[a['day_gan']][b['day_gan']]
+    day_branch = DAY_BRANCH_SCORES[a['day_zhi']][b['day_zhi']]
+    year_branch = YEAR_BRANCH_SCORES[a['year_zhi']][b['year_zhi']]
+    complement = COMPLEMENT_WEIGHT * (
+        sum(b['strength'][e] for e in a['favorable']) +
+        sum(a['strength'][e] for e in b['favorable'])
+    )
+
+    return {
+        'score': BASE_SCORE + day_stem + day_branch + year_branch + complement,
+        'day_stem': day_stem,
+        'day_branch': day_branch,
+        'year_branch': year_branch,
+        'complement': complement,
+        'day_stem_relations': relation_names(
+            STEM_RELATIONS[a['day_gan']][b['day_gan']] & (STEM_HE | STEM_CHONG), STEM_RELATION_NAMES),
+        'day_branch_relations': relation_names(BRANCH_RELATIONS[a['day_zhi']][b['day_zhi']]),
+        'year_branch_relations': relation_names(BRANCH_RELATIONS[a['year_zhi']][b['year_zhi']]),
+        'favorable_a': [WUXING[e] for e in a['favorable']],
+        'favorable_b': [WUXING[e] for e in b['favorable']]
+    }
+
+
+@lru_cache(maxsize=None)
+def _numpy_tables():
+    """NumPy 版分數表，首次批量計算時建立"""
+    import numpy as np
+
+    return (np.asarray(DAY_STEM_SCORES, dtype=np.float32),
+            np.asarray(DAY_BRANCH_SCORES, dtype=np.float32),
+            np.asarray(YEAR_BRANCH_SCORES, dtype=np.float32))
+
+
+class ProfileArrays:
+    """一組八字的配對特徵（列式數組）"""
+
+    def __init__(self, stem_codes, branch_codes):
+        """由 (N, 4) 干支序號數組建立"""
+        import numpy as np
+        from wuxing_strength import batch_strength, batch_favorable
+
+        stems = np.asarray(stem_codes, dtype=np.intp)
+        branches = np.asarray(branch_codes, dtype=np.intp)
+        strength = batch_strength(stems, branches)
+        favorable = batch_favorable(stems, strength)
+
+        self.day_gan = stems[:, 2].astype(np.int8)
+        self.day_zhi = branches[:, 2].astype(np.int8)
+        self.year_zhi = branches[:, 0].astype(np.int8)
+        totals = strength.sum(axis=1, keepdims=True)
+        totals[totals == 0] = 1.0
+        self.strength = (strength / totals).astype(np.float32)
+        # 喜用神以 0/1 掩碼表示，互補分即掩碼與對方力量的內積
+        self.favorable_mask = np.zeros((len(stems), 5), dtype=np.float32)
+        rows = np.arange(len(stems))
+        self.favorable_mask[rows, favorable[:, 0]] = 1.0
+        self.favorable_mask[rows, favorable[:, 1]] = 1.0
+
+    @classmethod
+    def from_charts(cls, charts: Sequence[Dict]) -> 'ProfileArrays':
+        """由八字字典列表建立"""
+        codes = [chart_codes(chart) for chart in charts]
+        return cls([c[0] for c in codes], [c[1] for c in codes])
+
+    def __len__(self) -> int:
+        return len(self.day_gan)
+
+
+def score_block(a: ProfileArrays, b: ProfileArrays, rows: slice, cols: slice):
+    """計算 a[rows] × b[cols] 的分數塊，返回 float32 數組"""
+    stem_scores, day_branch_scores, year_branch_scores = _numpy_tables()
+
+    scores = stem_scores[a.day_gan[rows, None], b.day_gan[None, cols]]
+    scores += day_branch_scores[a.day_zhi[rows, None], b.day_zhi[None, cols]]
+    scores += year_branch_scores[a.year_zhi[rows, None], b.year_zhi[None, cols]]
+    complement = a.favorable_mask[rows] @ b.strength[cols].T
+    complement += a.strength[rows] @ b.favorable_mask[cols].T
+    scores += COMPLEMENT_WEIGHT * complement
+    scores += BASE_SCORE
+    return scores
+
+
+def iter_score_blocks(a: ProfileArrays, b: ProfileArrays, block_rows: int = 1024,
+                      block_cols: int = 8192) -> Iterator[Tuple[slice, slice, object]]:
+    """逐塊產出 N×M 配對分數，任何時刻只保留一個分數塊"""
+    for r in range(0, len(a), block_rows):
+        rows = slice(r, min(r + block_rows, len(a)))
+        for c in range(0, len(b), block_cols):
+            cols = slice(c, min(c + block_cols, len(b)))
+            yield rows, cols, score_block(a, b, rows, cols)
+
+
+def top_k_matches(a: ProfileArrays, b: ProfileArrays, k: int = 10, block_rows: int = 1024,
+                  block_cols: int = 8192, exclude_self: bool = False):
+    """為 a 中每個八字找出 b 中分數最高的 k 個
+
+    按塊計算並逐塊合併當前前K名，內存只與 block_rows × block_cols 有關。
+    exclude_self 為 True 時（a、b 為同一組），排除與自身的配對。
+    返回 (indices, scores)，形狀均為 (len(a), k)，按分數由高到低排列。
+    """
+    import numpy as np
+
+    k = min(k, len(b))
+    best_scores = np.full((len(a), k), -np.inf, dtype=np.float32)
+    best_indices = np.full((len(a), k), -1, dtype=np.int64)
+
+    for rows, cols, block in iter_score_blocks(a, b, block_rows, block_cols):
+        if exclude_self:
+            lo = max(rows.start, cols.start)
+            hi = min(rows.stop, cols.stop)
+            if lo < hi:
+                diag = np.arange(lo, hi)
+                block[diag - rows.start, diag - cols.start] = -np.inf
+
+        col_ids = np.arange(cols.start, cols.stop)
+        merged_scores = np.concatenate([best_scores[rows], block], axis=1)
+        merged_indices = np.concatenate(
+            [best_indices[rows], np.broadcast_to(col_ids, block.shape)], axis=1)
+        part = np.argpartition(-merged_scores, k - 1, axis=1)[:, :k]
+        best_scores[rows] = np.take_along_axis(merged_scores, part, axis=1)
+        best_indices[rows] = np.take_along_axis(merged_indices, part, axis=1)
+
+    order = np.argsort(-best_scores, axis=1, kind='stable')
+    return (np.take_along_axis(best_indices, order, axis=1),
+            np.take_along_axis(best_scores, order, axis=1))
@@ -2,759 +2,793 @@
 # -*- coding: utf-8 -*-
 """
 算命內容生成模組
-根據八字信息生成各章節的算命內容
+根據八字信息生成各章節的算命內容；
+各章節的段落格式及查表描述保存在 templates/content_templates.json，
+由 template_catalog 按語系（繁體 / 簡體）編譯緩存，文件更新後自動換用新版本
 """
 
+import datetime
+import os
 import random
+from functools import lru_cache
 from typing import Dict, List
+from shishen import (TEN_GODS, ten_god_counts, dominant, BIJIAN, JIECAI,
+                     PIANCAI, ZHENGCAI, QISHA, ZHENGGUAN, PIANYIN, ZHENGYIN)
+from shensha import chart_shensha, SHENSHA_DESCRIPTIONS
+from ganzhi_relations import (relation_names, BRANCH_RELATION_NAMES, STEM_HE, STEM_CHONG,
+                              CHONG, XING, HAI, LIUHE, BANHE)
+from interactions import (chart_luck_interactions, dayun_index, PILLAR_NAMES, PILLAR_DOMAINS,
+                          SANHE_ELEMENTS)
+from zh_convert import DEFAULT_LOCALE, convert, normalize_locale
+
+# 報告章節順序：（章節標題, all_contents 中的鍵）
+REPORT_CHAPTERS = [
+    ("人生總論", 'life_summary'),
+    ("事業總論", 'career_summary'),
+    ("財運總論", 'wealth_summary'),
+    ("姻緣總論", 'marriage_summary'),
+    ("健康總論", 'health_summary'),
+    ("六親總論", 'family_summary'),
+    ("神煞總論", 'shensha_summary'),
+    ("五十年大運總論", 'dayun_summary'),
+    ("十年流年預測", 'liunian_prediction'),
+    ("簡易催運指南", 'feng_shui_guide')
+]
+
+@lru_cache(maxsize=None)
+def report_chapters(locale: str = DEFAULT_LOCALE) -> List[tuple]:
+    """指定語系的報告章節 [(章節標題, 鍵)]"""
+    return [(convert(title, locale), key) for title, key in REPORT_CHAPTERS]
+
+def iter_chapters(all_contents: Dict, locale: str = DEFAULT_LOCALE):
+    """按報告章節順序逐個返回有內容的章節 (章節標題, 鍵, 內容)，各輸出格式共用"""
+    for chapter_title, key in report_chapters(locale):
+        content = all_contents.get(key, '')
+        if content:
+            yield chapter_title, key, content
+
+def external_terms() -> List[str]:
+    """其他模組提供、會出現在正文中的名稱（神煞、柱位、刑沖合害、生肖等），編譯模板時一併轉換語系"""
+    from bazi_calculator import BaziCalculator
+
+    terms = list(SHENSHA_DESCRIPTIONS) + list(SHENSHA_DESCRIPTIONS.values())
+    terms += list(PILLAR_NAMES) + list(PILLAR_DOMAINS) + list(BRANCH_RELATION_NAMES.values())
+    terms += list(BaziCalculator.SHENGXIAO) + list(TEN_GODS)
+    return terms
+
+
+# 模板結構：ContentGenerator 讀取的表及必須具備的鍵，模板文件更新時據此檢查（validate_templates）
+ELEMENT_KEYS = ('木', '火', '土', '金', '水')
+WEALTH_KEYS = tuple(TEN_GODS[god] for god in (ZHENGCAI, PIANCAI, JIECAI, BIJIAN))
+SPOUSE_KEYS = tuple(TEN_GODS[god] for god in (ZHENGGUAN, QISHA, ZHENGYIN, PIANYIN, ZHENGCAI, PIANCAI))
+LEVEL_KEYS = ('strong', 'weak', 'balanced')
+
+KEYED_TABLES = {
+    **{table: ELEMENT_KEYS for table in (
+        'personality', 'career', 'relationship', 'work_style', 'career_advice', 'health_concerns',
+        'health_prevention', 'dietary_restrictions', 'exercise', 'dayun', 'dietary', 'colors',
+        'unfavorable_colors', 'directions', 'lucky_numbers', 'accessories', 'plants')},
+    **{table: WEALTH_KEYS for table in (
+        'wealth', 'wealth_star', 'wealth_pattern', 'wealth_method', 'investment', 'financial')},
+    **{table: SPOUSE_KEYS for table in (
+        'marriage', 'spouse_star', 'spouse_traits', 'spouse_selection', 'relationship_advice',
+        'marriage_precautions')},
+    **{table: LEVEL_KEYS for table in ('strength', 'life_pattern', 'entrepreneurship', 'constitution')},
+    'shensha_headings': ('吉', '中', '凶'),
+    'defaults': (
+        'relationship', 'work_style', 'career_advice', 'wealth_star', 'wealth_pattern', 'wealth_method',
+        'investment', 'financial', 'spouse_star', 'marriage', 'spouse_traits', 'spouse_selection',
+        'relationship_advice', 'marriage_precautions', 'health_concerns', 'health_prevention',
+        'dietary_restrictions', 'exercise', 'dayun', 'dietary', 'colors', 'unfavorable_colors',
+        'directions', 'lucky_numbers', 'accessories', 'plants'),
+}
+
+# 查表值的類型：str 為字串，list 為字串列表（career 等隨機抽取或取首項）；personality 為特質字典，另行檢查
+TABLE_VALUE_TYPES = {
+    **dict.fromkeys(KEYED_TABLES, str),
+    'career': list, 'wealth': list, 'marriage': list,
+    'personality': dict,
+}
+
+# 列表表的最少項數（clash_advice / harmony_advice 按四柱索引），各項均為字串
+LIST_TABLES = {'clash_advice': 4, 'harmony_advice': 4, 'liunian': 1}
+
+# 性格特質的最少項數（generate_life_summary 隨機抽取）
+PERSONALITY_TRAITS = {'正面': 3, '負面': 2, '特質': 2}
+
+# text / sections 各項可用的格式字段；None 表示直接輸出、不經 format
+TEXT_FIELDS = {
+    'unfavorable_period': None, 'marriage_timing': None, 'parent_relationship': None,
+    'family_role': None, 'sibling_relationship': None, 'sibling_interaction': None,
+    'children_fortune': None, 'parenting': None, 'benefactor': None, 'dayun_advice': None,
+    'daily_precautions': None, 'dietary_prefix': None, 'dayun_label': None, 'liunian_label': None,
+    'dayun_calm': None, 'liunian_calm': None, 'liunian_good': None, 'liunian_bad': None,
+    'liunian_even': None,
+    'health_concerns_extra': ('main', 'extra'),
+    'health_constitution': ('wuxing', 'strength'),
+    'wellness': ('first', 'second'),
+    'interaction_branch': ('label', 'zhi', 'pillar', 'names', 'domain'),
+    'interaction_stem_he': ('label', 'gan'),
+    'interaction_stem_chong': ('label', 'gan'),
+    'dayun_advice_prefix': ('advice',),
+    'liunian_cross': ('pillar', 'names'),
+    'liunian_sanhe': ('element',),
+}
+
+SECTION_FIELDS = {
+    'personal_info': ('name', 'birth_date', 'birth_time', 'gender', 'shengxiao', 'day_master_wuxing',
+                      'favorable', 'year_pillar', 'month_pillar', 'day_pillar', 'hour_pillar',
+                      'tiangan', 'dizhi'),
+    'life_summary': ('wuxing', 'positive', 'negative', 'special', 'strength', 'life_pattern',
+                     'favorable', 'relationship'),
+    'career_summary': ('wuxing', 'work_style', 'favorable', 'careers', 'career_advice',
+                       'strength_trait', 'weakness_trait', 'entrepreneurship'),
+    'wealth_summary': ('wealth_star', 'wealth_pattern', 'wealth_method', 'investment', 'favorable',
+                       'financial', 'unfavorable_period'),
+    'marriage_summary': ('spouse_star', 'marriage_pattern', 'spouse_traits', 'spouse_selection',
+                         'marriage_timing', 'relationship_advice', 'marriage_precautions'),
+    'health_summary': ('constitution_description', 'constitution', 'concerns', 'prevention', 'wellness',
+                       'dietary', 'dietary_restrictions', 'exercise'),
+    'family_summary': ('parent_relationship', 'family_role', 'sibling_relationship', 'sibling_interaction',
+                       'children_fortune', 'parenting', 'benefactor'),
+    'shensha_none': None, 'shensha_header': None, 'shensha_footer': None,
+    'shensha_group': ('heading',),
+    'shensha_star': ('name', 'pillars', 'description'),
+    'dayun_header': None,
+    'dayun_item': ('number', 'pillar', 'start_age', 'end_age'),
+    'dayun_body': ('wuxing', 'description'),
+    'liunian_header': None,
+    'liunian_item': ('year', 'age', 'ganzhi'),
+    'feng_shui_guide': ('colors', 'unfavorable_colors', 'directions', 'lucky_numbers', 'accessories',
+                        'plants', 'daily_precautions'),
+}
+
+# 檢查格式字串時代入的樣本值：日期時間及列表字段按實際傳入的類型和項數，其餘為字串
+PROBE_VALUES = {
+    'birth_date': datetime.date(2000, 1, 1),
+    'birth_time': datetime.time(0, 0),
+    'positive': ['正面'] * PERSONALITY_TRAITS['正面'],
+    'negative': ['負面'] * PERSONALITY_TRAITS['負面'],
+    'special': ['特質'] * PERSONALITY_TRAITS['特質'],
+    'favorable': list(ELEMENT_KEYS[:2]),
+}
+
+
+def _is_str_list(value) -> bool:
+    """是否為字串列表"""
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def _check_formats(group: str, templates: Dict, fields: Dict[str, tuple]):
+    """檢查 text / sections 各項存在，且格式字串能以樣本值代入"""
+    for key, names in fields.items():
+        if not isinstance(templates.get(key), str):
+            raise ValueError(f"{group} 缺少 {key}")
+        if names is None:
+            continue
+        probe = {name: PROBE_VALUES.get(name, name) for name in names}
+        try:
+            templates[key].format(**probe)
+        except (KeyError, IndexError, AttributeError, ValueError, TypeError) as e:
+            raise ValueError(f"{group}.{key} 格式有誤：{type(e).__name__}: {e}") from e
+
+
+def validate_templates(templates: Dict):
+    """檢查模板是否具備 ContentGenerator 讀取的全部內容，不符時拋出 ValueError
+
+    各查表須含全部五行 / 十神 / 強弱等級的鍵，值須為 TABLE_VALUE_TYPES 指定的類型；
+    sections 及 text 的格式字串須能以樣本值代入。
+    """
+    for table, keys in KEYED_TABLES.items():
+        if not isinstance(templates.get(table), dict):
+            raise ValueError(f"缺少表 {table}")
+        missing = [key for key in keys if key not in templates[table]]
+        if missing:
+            raise ValueError(f"{table} 缺少：{', '.join(missing)}")
+        value_type = TABLE_VALUE_TYPES[table]
+        for key, value in templates[table].items():
+            if value_type is str and not isinstance(value, str):
+                raise ValueError(f"{table}.{key} 應為字串")
+            if value_type is list and not _is_str_list(value):
+                raise ValueError(f"{table}.{key} 應為字串列表")
+            if value_type is dict and not isinstance(value, dict):
+                raise ValueError(f"{table}.{key} 應為字典")
+    for element, traits in templates['personality'].items():
+        for trait, size in PERSONALITY_TRAITS.items():
+            if not _is_str_list(traits.get(trait)) or len(traits[trait]) < size:
+                raise ValueError(f"personality.{element}.{trait} 應為至少 {size} 項的字串列表")
+    for table, size in LIST_TABLES.items():
+        if not _is_str_list(templates.get(table)) or len(templates[table]) < size:
+            raise ValueError(f"{table} 應為至少 {size} 項的字串列表")
+    for table in ('text', 'sections'):
+        if not isinstance(templates.get(table), dict):
+            raise ValueError(f"缺少表 {table}")
+    _check_formats('text', templates['text'], TEXT_FIELDS)
+    _check_formats('sections', templates['sections'], SECTION_FIELDS)
+
+
+@lru_cache(maxsize=None)
+def template_catalog():
+    """進程共用的內容模板目錄（template_catalog.TemplateCatalog，首次取模板時導入）
+
+    模板文件默認為 templates/content_templates.json，可由 ASKBAZI_TEMPLATES 指定；
+    二進制緩存目錄可由 ASKBAZI_TEMPLATE_CACHE 指定，設為空字串則只在內存中編譯。
+    """
+    from template_catalog import TemplateCatalog, DEFAULT_TEMPLATE_FILE, DEFAULT_CACHE_DIR
+
+    return TemplateCatalog(
+        os.environ.get('ASKBAZI_TEMPLATES', DEFAULT_TEMPLATE_FILE),
+        os.environ.get('ASKBAZI_TEMPLATE_CACHE', DEFAULT_CACHE_DIR) or None,
+        terms=external_terms,
+        validate=validate_templates
+    )
+
+
+def load_templates(locale: str = DEFAULT_LOCALE) -> Dict:
+    """指定語系的當前內容模板，所有 ContentGenerator 實例共用
+
+    模板表見 templates/content_templates.json：sections 為各章節的段落格式字串，其餘為查表描述，
+    字典的鍵是程式內部的查表鍵（五行、十神、強弱等級等），轉換語系時保持不變。
+    返回值另含 version（模板版本標記）及 terms（其他模組名稱原文 -> 譯文）。
+    """
+    return template_catalog().templates(locale)
+
 
 class ContentGenerator:
     """內容生成器"""
-    
+
     # 天干地支常量
     TIANGAN = ['甲', '乙', '丙', '丁', '戊', '己', '庚', '辛', '壬', '癸']
     DIZHI = ['子', '丑', '寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥']
-    
-    def __init__(self):
-        """初始化內容生成器"""
-        self.load_content_templates()
-    
-    def load_content_templates(self):
-        """加載內容模板"""
-        # 性格特質模板
-        self.personality_templates = {
-            '木': {
-                '正面': ['仁慈善良', '積極進取', '富有創造力', '適應能力強', '有理想抱負'],
-                '負面': ['固執己見', '容易急躁', '缺乏耐性', '過於理想化'],
-                '特質': ['喜歡自然', '重視成長', '具有領導才能', '善於規劃']
-            },
-            '火': {
-                '正面': ['熱情開朗', '積極主動', '富有感染力', '勇於表達', '樂觀向上'],
-                '負面': ['性情急躁', '容易衝動', '缺乏持久力', '過於直率'],
-                '特質': ['喜歡熱鬧', '重視名聲', '具有表演天賦', '善於交際']
-            },
-            '土': {
-                '正面': ['穩重踏實', '忠誠可靠', '勤勞務實', '包容寬厚', '責任心強'],
-                '負面': ['過於保守', '缺乏變通', '行動遲緩', '容易固執'],
-                '特質': ['重視安全感', '善於理財', '具有組織能力', '注重實際']
-            },
-            '金': {
-                '正面': ['意志堅強', '果斷決絕', '重視原則', '追求完美', '執行力強'],
-                '負面': ['過於嚴厲', '缺乏彈性', '容易孤僻', '過分挑剔'],
-                '特質': ['重視品質', '善於分析', '具有領導威嚴', '注重效率']
-            },
-            '水': {
-                '正面': ['聰明機智', '靈活變通', '善於溝通', '富有智慧', '適應性強'],
-                '負面': ['缺乏恆心', '容易多變', '過於圓滑', '缺乏原則'],
-                '特質': ['重視學習', '善於思考', '具有洞察力', '注重人際關係']
-            }
-        }
-        
-        # 事業運模板
-        self.career_templates = {
-            '木': ['教育培訓', '文化創意', '環保綠化', '醫療保健', '農林牧漁'],
-            '火': ['媒體傳播', '娛樂表演', '廣告行銷', '電子科技', '能源化工'],
-            '土': ['房地產', '建築工程', '農業種植', '礦業開採', '物流運輸'],
-            '金': ['金融投資', '機械製造', '軍警執法', '珠寶首飾', '五金工具'],
-            '水': ['貿易商業', '旅遊服務', '水產養殖', '清潔環衛', '運輸物流']
-        }
-        
-        # 財運模板
-        self.wealth_templates = {
-            '偏財': ['投資理財運佳', '容易有意外之財', '適合多元化投資', '財來財去較頻繁'],
-            '正財': ['穩定收入來源', '勤勞致富', '適合長期投資', '財富累積穩健'],
-            '劫財': ['財運起伏較大', '容易破財', '需謹慎理財', '避免借貸擔保'],
-            '比肩': ['財運平穩', '適合合夥經營', '收入穩定', '開支有度']
-        }
-        
-        # 婚姻模板
-        self.marriage_templates = {
-            '正官': ['婚姻穩定', '配偶品格端正', '家庭責任感強', '夫妻恩愛'],
-            '七殺': ['感情波折較多', '配偶性格強勢', '需要磨合', '晚婚較佳'],
-            '正印': ['配偶賢慧', '家庭和睦', '子女孝順', '婚姻美滿'],
-            '偏印': ['感情複雜', '容易有第三者', '需要包容理解', '溝通重要']
-        }
-    
-    def generate_personal_info(self, name: str, bazi_info: Dict, wuxing_analysis: Dict, 
+    WUXING = ['木', '火', '土', '金', '水']
+
+    # 配偶星：男命以財為妻，女命以官殺為夫；原局不見時以印星論
+    SPOUSE_STAR_CANDIDATES = {
+        '男': (ZHENGCAI, PIANCAI),
+        '女': (ZHENGGUAN, QISHA)
+    }
+    SPOUSE_STAR_FALLBACK = (ZHENGYIN, PIANYIN)
+
+    def __init__(self, locale: str = None, templates: Dict = None):
+        """初始化內容生成器
+
+        locale: 輸出語系，'zh-Hant'（繁體，默認）或 'zh-Hans'（簡體），亦接受 zh-TW、zh-CN 等別名
+        templates: 已加載的模板（load_templates 的返回值），默認取模板目錄的當前版本
+        """
+        self.locale = normalize_locale(locale)
+        self.load_content_templates(templates)
+
+    def load_content_templates(self, templates: Dict = None):
+        """加載內容模板（模板目錄共用的只讀模板，勿就地修改）
+
+        生成器在兩次調用之間固定使用同一版本；模板文件更新後再次調用即換用新版本。
+        """
+        self.templates = templates or load_templates(self.locale)
+        self.template_version = self.templates['version']
+        self.personality_templates = self.templates['personality']
+        self.career_templates = self.templates['career']
+        self.wealth_templates = self.templates['wealth']
+        self.marriage_templates = self.templates['marriage']
+        self.sections = self.templates['sections']
+        self.text = self.templates['text']
+        self.terms = self.templates['terms']
+
+    def _lookup(self, table: str, key: str) -> str:
+        """查表描述，未命中時返回默認描述"""
+        return self.templates[table].get(key, self.templates['defaults'][table])
+
+    def _join_lookup(self, table: str, elements: List[str]) -> str:
+        """按多個五行查表並以頓號連接，全部未命中時返回默認描述"""
+        found = [self.templates[table][element] for element in elements if element in self.templates[table]]
+        return "、".join(found) if found else self.templates['defaults'][table]
+
+    def _term(self, term: str) -> str:
+        """其他模組提供的名稱 -> 當前語系"""
+        return self.terms.get(term, term)
+
+    def generate_personal_info(self, name: str, bazi_info: Dict, wuxing_analysis: Dict,
                               birth_date, birth_time, gender: str) -> str:
         """生成命主資料"""
-        lunar_date = bazi_info['lunar_date']
-        shengxiao = bazi_info['shengxiao']
-        day_master_wuxing = bazi_info['day_master_wuxing']
-        favorable_elements = wuxing_analysis['favorable_elements']
-        
-        content = f"""命主：{name}
-
-出生日期(西曆)：{birth_date.year}年{birth_date.month}月{birth_date.day}日
-出生時間：{birth_time.hour}時{birth_time.minute}分
-性別：{gender}
-生肖：{shengxiao}
-
-日主五行：{day_master_wuxing}
-喜用神五行：{', '.join(favorable_elements)}
+        return self.sections['personal_info'].format(
+            name=name, birth_date=birth_date, birth_time=birth_time, gender=gender,
+            shengxiao=self._term(bazi_info['shengxiao']),
+            day_master_wuxing=bazi_info['day_master_wuxing'],
+            favorable=', '.join(wuxing_analysis['favorable_elements']),
+            year_pillar=bazi_info['year_pillar'], month_pillar=bazi_info['month_pillar'],
+            day_pillar=bazi_info['day_pillar'], hour_pillar=bazi_info['hour_pillar'],
+            tiangan=' '.join(bazi_info['tiangan']), dizhi=' '.join(bazi_info['dizhi'])
+        )
 
-八字：{bazi_info['year_pillar']} {bazi_info['month_pillar']} {bazi_info['day_pillar']} {bazi_info['hour_pillar']}
-天干：{' '.join(bazi_info['tiangan'])}
-地支：{' '.join(bazi_info['dizhi'])}"""
-        
-        return content
-    
     def generate_life_summary(self, bazi_info: Dict, wuxing_analysis: Dict) -> str:
         """生成人生總論"""
         day_master_wuxing = bazi_info['day_master_wuxing']
         personality = self.personality_templates[day_master_wuxing]
-        
+
         positive_traits = random.sample(personality['正面'], 3)
         negative_traits = random.sample(personality['負面'], 2)
         special_traits = random.sample(personality['特質'], 2)
-        
-        content = f"""● 命主性格分析
-
-您的日主五行為{day_master_wuxing}，具有{day_master_wuxing}性人的典型特質。在性格方面，您{positive_traits[0]}，{positive_traits[1]}，{positive_traits[2]}，這些都是您的優勢所在。
-
-● 人生特點
-
-從八字組合來看，您{special_traits[0]}，{special_traits[1]}。在人生道路上，您容易因為{negative_traits[0]}而遇到一些挫折，但只要能夠克服{negative_traits[1]}的缺點，必能在人生路上取得不錯的成就。
 
-● 總體運勢
+        return self.sections['life_summary'].format(
+            wuxing=day_master_wuxing, positive=positive_traits, negative=negative_traits,
+            special=special_traits, strength=self._get_strength_description(wuxing_analysis),
+            life_pattern=self._get_life_pattern_description(wuxing_analysis),
+            favorable=wuxing_analysis['favorable_elements'],
+            relationship=self._get_relationship_description(day_master_wuxing)
+        )
 
-您的八字中{day_master_wuxing}氣較為{self._get_strength_description(wuxing_analysis)}，這表示您在人生中{self._get_life_pattern_description(wuxing_analysis)}。建議您在日常生活中多接觸{wuxing_analysis['favorable_elements'][0]}、{wuxing_analysis['favorable_elements'][1]}相關的事物，有助於提升整體運勢。
-
-● 人際關係
-
-在人際交往方面，您{self._get_relationship_description(day_master_wuxing)}。與人相處時，建議您發揮{positive_traits[0]}的優點，同時注意控制{negative_traits[0]}的傾向，這樣能夠建立更好的人際關係網絡。"""
-        
-        return content
-    
     def generate_career_summary(self, bazi_info: Dict, wuxing_analysis: Dict) -> str:
         """生成事業總論"""
         day_master_wuxing = bazi_info['day_master_wuxing']
         favorable_elements = wuxing_analysis['favorable_elements']
-        
+
         suitable_careers = []
         for element in favorable_elements:
             suitable_careers.extend(self.career_templates.get(element, []))
-        
-        selected_careers = random.sample(suitable_careers, min(5, len(suitable_careers)))
-        
-        content = f"""● 事業運勢分析
 
-從您的八字來看，事業發展方面具有一定的優勢。您的日主{day_master_wuxing}性，在工作中展現出{self._get_work_style_description(day_master_wuxing)}的特點。
-
-● 適合的職業方向
-
-根據您的八字喜用神分析，比較適合從事與{favorable_elements[0]}、{favorable_elements[1]}相關的行業，具體包括：{', '.join(selected_careers)}等領域。
-
-● 事業發展建議
-
-在事業發展過程中，建議您{self._get_career_advice(day_master_wuxing)}。同時要注意發揮自身{self.personality_templates[day_master_wuxing]['正面'][0]}的優勢，避免因{self.personality_templates[day_master_wuxing]['負面'][0]}而影響事業進展。
+        selected_careers = random.sample(suitable_careers, min(5, len(suitable_careers)))
+        personality = self.personality_templates[day_master_wuxing]
 
-● 創業與就業
+        return self.sections['career_summary'].format(
+            wuxing=day_master_wuxing, work_style=self._get_work_style_description(day_master_wuxing),
+            favorable=favorable_elements, careers=', '.join(selected_careers),
+            career_advice=self._get_career_advice(day_master_wuxing),
+            strength_trait=personality['正面'][0], weakness_trait=personality['負面'][0],
+            entrepreneurship=self._get_entrepreneurship_advice(wuxing_analysis)
+        )
 
-從命理角度來看，您{self._get_entrepreneurship_advice(wuxing_analysis)}。無論選擇創業還是就業，都要充分考慮自身的五行喜忌，選擇合適的合作夥伴和工作環境。"""
-        
-        return content
-    
     def generate_wealth_summary(self, bazi_info: Dict, wuxing_analysis: Dict) -> str:
         """生成財運總論"""
-        day_master = bazi_info['day_master']
         wealth_type = self._analyze_wealth_star(bazi_info)
-        
-        content = f"""● 財運基本分析
-
-您的八字中財星{self._get_wealth_star_description(wealth_type)}，這表示您在財富累積方面{self._get_wealth_pattern_description(wealth_type)}。
-
-● 求財方式
-
-根據您的命理特點，比較適合通過{self._get_wealth_method_description(wealth_type)}的方式來獲取財富。在投資理財方面，建議您{self._get_investment_advice(wealth_type)}。
-
-● 財運週期
 
-從大運流年來看，您的財運會有一定的週期性變化。一般來說，在{wuxing_analysis['favorable_elements'][0]}、{wuxing_analysis['favorable_elements'][1]}當旺的年份，財運會相對較好。
+        return self.sections['wealth_summary'].format(
+            wealth_star=self._get_wealth_star_description(wealth_type),
+            wealth_pattern=self._get_wealth_pattern_description(wealth_type),
+            wealth_method=self._get_wealth_method_description(wealth_type),
+            investment=self._get_investment_advice(wealth_type),
+            favorable=wuxing_analysis['favorable_elements'],
+            financial=self._get_financial_advice(wealth_type),
+            unfavorable_period=self._get_unfavorable_period()
+        )
 
-● 理財建議
-
-在日常理財方面，建議您{self._get_financial_advice(wealth_type)}。同時要注意避免在{self._get_unfavorable_period()}期間進行大額投資，以免造成不必要的損失。"""
-        
-        return content
-    
     def generate_marriage_summary(self, bazi_info: Dict, gender: str) -> str:
         """生成姻緣總論"""
         spouse_star = self._analyze_spouse_star(bazi_info, gender)
-        
-        content = f"""● 婚姻基本分析
-
-從您的八字來看，配偶星{self._get_spouse_star_description(spouse_star)}，這表示您在感情婚姻方面{self._get_marriage_pattern_description(spouse_star)}。
-
-● 配偶特徵
-
-根據命理分析，您的配偶可能具有{self._get_spouse_characteristics(spouse_star)}的特點。在選擇伴侶時，建議您{self._get_spouse_selection_advice(spouse_star)}。
 
-● 婚姻時機
+        return self.sections['marriage_summary'].format(
+            spouse_star=self._get_spouse_star_description(spouse_star),
+            marriage_pattern=self._get_marriage_pattern_description(spouse_star),
+            spouse_traits=self._get_spouse_characteristics(spouse_star),
+            spouse_selection=self._get_spouse_selection_advice(spouse_star),
+            marriage_timing=self._get_marriage_timing(bazi_info),
+            relationship_advice=self._get_relationship_advice(spouse_star),
+            marriage_precautions=self._get_marriage_precautions(spouse_star)
+        )
 
-從大運流年來看，您比較適合在{self._get_marriage_timing(bazi_info)}歲左右考慮婚姻大事。這個時期的感情運勢相對較好，容易遇到合適的對象。
-
-● 感情建議
-
-在感情交往中，建議您{self._get_relationship_advice(spouse_star)}。同時要注意{self._get_marriage_precautions(spouse_star)}，這樣有助於維持穩定和諧的感情關係。"""
-        
-        return content
-    
     def generate_health_summary(self, bazi_info: Dict, wuxing_analysis: Dict) -> str:
         """生成健康總論"""
         day_master_wuxing = bazi_info['day_master_wuxing']
         weak_elements = [k for k, v in wuxing_analysis['wuxing_count'].items() if v == 0]
-        
-        content = f"""● 健康基本分析
+        favorable_elements = wuxing_analysis['favorable_elements']
 
-從您的八字五行配置來看，{self._get_health_constitution_description(day_master_wuxing, wuxing_analysis)}。整體而言，您的體質{self._get_constitution_type(wuxing_analysis)}。
+        return self.sections['health_summary'].format(
+            constitution_description=self._get_health_constitution_description(day_master_wuxing, wuxing_analysis),
+            constitution=self._get_constitution_type(wuxing_analysis),
+            concerns=self._get_health_concerns(day_master_wuxing, weak_elements),
+            prevention=self._get_health_prevention_advice(day_master_wuxing),
+            wellness=self._get_wellness_advice(day_master_wuxing, favorable_elements),
+            dietary=self._get_dietary_advice(favorable_elements),
+            dietary_restrictions=self._get_dietary_restrictions(day_master_wuxing),
+            exercise=self._get_exercise_recommendations(day_master_wuxing)
+        )
 
-● 易患疾病
+    def generate_family_summary(self, bazi_info: Dict) -> str:
+        """生成六親總論"""
+        return self.sections['family_summary'].format(
+            parent_relationship=self._get_parent_relationship_description(bazi_info),
+            family_role=self._get_family_role_description(bazi_info),
+            sibling_relationship=self._get_sibling_relationship_description(bazi_info),
+            sibling_interaction=self._get_sibling_interaction_description(bazi_info),
+            children_fortune=self._get_children_fortune_description(bazi_info),
+            parenting=self._get_parenting_advice(bazi_info),
+            benefactor=self._get_benefactor_description(bazi_info)
+        )
+
+    def generate_shensha_summary(self, bazi_info: Dict) -> str:
+        """生成神煞總論"""
+        stars = chart_shensha(bazi_info)
+        if not stars:
+            return self.sections['shensha_none']
+
+        term = self._term
+        content = self.sections['shensha_header']
+        for nature, heading in self.templates['shensha_headings'].items():
+            group = [star for star in stars if star['nature'] == nature]
+            if not group:
+                continue
+            content += self.sections['shensha_group'].format(heading=heading)
+            for star in group:
+                content += self.sections['shensha_star'].format(
+                    name=term(star['name']), pillars='、'.join(term(p) for p in star['pillars']),
+                    description=term(SHENSHA_DESCRIPTIONS[star['name']])
+                )
+            content += "\n"
+
+        content += self.sections['shensha_footer']
+        return content
 
-根據五行理論，您需要特別注意{self._get_health_concerns(day_master_wuxing, weak_elements)}方面的健康問題。平時應該{self._get_health_prevention_advice(day_master_wuxing)}。
+    def generate_dayun_summary(self, dayun_list: List[Dict], current_age: int = 30,
+                               bazi_info: Dict = None) -> str:
+        """生成五十年大運總論
 
-● 養生建議
+        提供 bazi_info 時，按大運與原局的刑沖合害給出分析。
+        """
+        content = self.sections['dayun_header']
 
-在日常養生方面，建議您{self._get_wellness_advice(day_master_wuxing, wuxing_analysis['favorable_elements'])}。飲食上宜{self._get_dietary_advice(wuxing_analysis['favorable_elements'])}，避免{self._get_dietary_restrictions(day_master_wuxing)}。
+        shown = dayun_list[:5]  # 顯示前5步大運，共50年
+        relations = chart_luck_interactions(bazi_info, shown, []) if bazi_info else None
 
-● 運動保健
+        for i, dayun in enumerate(shown):
+            content += self.sections['dayun_item'].format(
+                number=i + 1, pillar=dayun['pillar'], start_age=dayun['start_age'], end_age=dayun['end_age'])
+            content += self.sections['dayun_body'].format(
+                wuxing=dayun['wuxing'], description=self._get_dayun_description(dayun, i))
+            if relations is not None:
+                content += self._get_dayun_interaction(relations, dayun, i)
+            content += f"{self._get_dayun_advice(dayun, i)}\n\n"
 
-適合您的運動方式包括{self._get_exercise_recommendations(day_master_wuxing)}。定期進行這些運動有助於調和五行，增強體質，預防疾病。"""
-        
         return content
-    
-    def generate_family_summary(self, bazi_info: Dict) -> str:
-        """生成六親總論"""
-        content = f"""● 父母關係
 
-從您的八字來看，與父母的關係{self._get_parent_relationship_description(bazi_info)}。在家庭中，您{self._get_family_role_description(bazi_info)}。
+    def generate_liunian_prediction(self, birth_year: int, current_year: int = 2024,
+                                    bazi_info: Dict = None, dayun_list: List[Dict] = None) -> str:
+        """生成十年流年預測
 
-● 兄弟姊妹
+        提供 bazi_info（及 dayun_list）時，按流年與原局、大運的刑沖合害推斷；
+        否則給出一般性提示。
+        """
+        content = self.sections['liunian_header']
 
-兄弟姊妹方面，{self._get_sibling_relationship_description(bazi_info)}。與兄弟姊妹的相處{self._get_sibling_interaction_description(bazi_info)}。
+        years = range(current_year, current_year + 10)
+        dayun_list = dayun_list or []
+        relations = chart_luck_interactions(bazi_info, dayun_list, years) if bazi_info else None
 
-● 子女運勢
-
-子女方面，{self._get_children_fortune_description(bazi_info)}。在教育子女時，建議您{self._get_parenting_advice(bazi_info)}。
-
-● 人際貴人
-
-在人際關係中，您的貴人多為{self._get_benefactor_description(bazi_info)}。與這些人保持良好關係，對您的人生發展會有很大幫助。"""
-        
-        return content
-    
-    def generate_dayun_summary(self, dayun_list: List[Dict], current_age: int = 30) -> str:
-        """生成五十年大運總論"""
-        content = "● 大運總體分析\n\n"
-        
-        for i, dayun in enumerate(dayun_list[:5]):  # 顯示前5步大運，共50年
-            pillar = dayun['pillar']
-            start_age = dayun['start_age']
-            end_age = dayun['end_age']
-            wuxing = dayun['wuxing']
-            
-            content += f"第{i+1}步大運：{pillar}（{start_age}-{end_age}歲）\n"
-            content += f"這個大運期間，{wuxing}氣當旺，{self._get_dayun_description(dayun, i)}。"
-            content += f"{self._get_dayun_advice(dayun, i)}\n\n"
-        
-        return content
-    
-    def generate_liunian_prediction(self, birth_year: int, current_year: int = 2024) -> str:
-        """生成十年流年預測"""
-        content = "● 十年流年預測\n\n"
-        
-        for year in range(current_year, current_year + 10):
+        for y, year in enumerate(years):
             year_gan_zhi = self._get_year_ganzhi(year)
             age = year - birth_year + 1
-            
-            content += f"{year}年（{age}歲）- {year_gan_zhi}年：\n"
-            content += f"{self._get_liunian_prediction(year_gan_zhi, age)}\n\n"
-        
+
+            content += self.sections['liunian_item'].format(year=year, age=age, ganzhi=year_gan_zhi)
+            if relations is not None:
+                d = dayun_index(dayun_list, age)
+                content += f"{self._get_liunian_interaction(relations, dayun_list, d, y, year_gan_zhi)}\n\n"
+            else:
+                content += f"{self._get_liunian_prediction(year_gan_zhi, age)}\n\n"
+
         return content
-    
+
     def generate_feng_shui_guide(self, wuxing_analysis: Dict) -> str:
         """生成簡易催運指南"""
         favorable_elements = wuxing_analysis['favorable_elements']
-        
-        content = f"""● 顏色運用
-
-根據您的喜用神，建議多使用{self._get_favorable_colors(favorable_elements)}等顏色，有助於提升運勢。避免過多使用{self._get_unfavorable_colors(wuxing_analysis)}。
-
-● 方位選擇
-
-在居住和工作環境的選擇上，{self._get_favorable_directions(favorable_elements)}方位對您比較有利。座位或床位朝向這些方位，有助於事業和健康運勢。
-
-● 數字運用
-
-幸運數字：{self._get_lucky_numbers(favorable_elements)}
-在選擇電話號碼、車牌號碼等時，可以多考慮這些數字。
-
-● 飾品佩戴
 
-建議佩戴{self._get_favorable_accessories(favorable_elements)}材質的飾品，有助於補強五行，提升個人氣場。
+        return self.sections['feng_shui_guide'].format(
+            colors=self._get_favorable_colors(favorable_elements),
+            unfavorable_colors=self._get_unfavorable_colors(wuxing_analysis),
+            directions=self._get_favorable_directions(favorable_elements),
+            lucky_numbers=self._get_lucky_numbers(favorable_elements),
+            accessories=self._get_favorable_accessories(favorable_elements),
+            plants=self._get_favorable_plants(favorable_elements),
+            daily_precautions=self._get_daily_precautions(wuxing_analysis)
+        )
 
-● 植物擺放
-
-在家中或辦公室擺放{self._get_favorable_plants(favorable_elements)}，既能美化環境，又能調和五行能量。
-
-● 日常注意事項
-
-{self._get_daily_precautions(wuxing_analysis)}"""
-        
-        return content
-    
     # 輔助方法
-    def _get_strength_description(self, wuxing_analysis: Dict) -> str:
-        """獲取五行強弱描述"""
+    def _strength_level(self, wuxing_analysis: Dict) -> str:
+        """五行強弱等級：strong / weak / balanced"""
         max_count = max(wuxing_analysis['wuxing_count'].values())
         if max_count >= 4:
-            return "偏強"
+            return 'strong'
         elif max_count <= 2:
-            return "偏弱"
+            return 'weak'
         else:
-            return "中和"
-    
+            return 'balanced'
+
+    def _get_strength_description(self, wuxing_analysis: Dict) -> str:
+        """獲取五行強弱描述"""
+        return self.templates['strength'][self._strength_level(wuxing_analysis)]
+
     def _get_life_pattern_description(self, wuxing_analysis: Dict) -> str:
         """獲取人生模式描述"""
-        strength = self._get_strength_description(wuxing_analysis)
-        if strength == "偏強":
-            return "需要適當的挑戰和壓力來激發潛能"
-        elif strength == "偏弱":
-            return "需要更多的支持和幫助來實現目標"
-        else:
-            return "能夠在穩定中求發展，平衡發展各方面能力"
-    
+        return self.templates['life_pattern'][self._strength_level(wuxing_analysis)]
+
     def _get_relationship_description(self, wuxing: str) -> str:
         """獲取人際關係描述"""
-        descriptions = {
-            '木': "善於與人建立深度關係，重視友情，但有時過於理想化",
-            '火': "熱情開朗，容易與人打成一片，但需要注意情緒管理",
-            '土': "忠誠可靠，是很好的朋友和夥伴，但有時過於保守",
-            '金': "原則性強，重視品質勝過數量，朋友不多但很深交",
-            '水': "靈活變通，善於處理各種人際關係，但需要保持真誠"
-        }
-        return descriptions.get(wuxing, "具有獨特的人際魅力")
-    
+        return self._lookup('relationship', wuxing)
+
     def _get_work_style_description(self, wuxing: str) -> str:
         """獲取工作風格描述"""
-        descriptions = {
-            '木': "積極進取，富有創新精神",
-            '火': "熱情主動，善於表達和溝通",
-            '土': "穩重踏實，注重細節和品質",
-            '金': "嚴謹認真，執行力強",
-            '水': "靈活變通，適應能力強"
-        }
-        return descriptions.get(wuxing, "具有獨特的工作風格")
-    
+        return self._lookup('work_style', wuxing)
+
     def _get_career_advice(self, wuxing: str) -> str:
         """獲取事業建議"""
-        advice = {
-            '木': "保持創新思維，勇於嘗試新的發展方向",
-            '火': "發揮溝通優勢，建立良好的人脈關係",
-            '土': "注重基礎建設，穩步推進事業發展",
-            '金': "堅持原則，追求專業化發展",
-            '水': "善用變通能力，抓住市場機遇"
-        }
-        return advice.get(wuxing, "發揮個人優勢，持續學習成長")
-    
+        return self._lookup('career_advice', wuxing)
+
     def _get_entrepreneurship_advice(self, wuxing_analysis: Dict) -> str:
         """獲取創業建議"""
-        strength = self._get_strength_description(wuxing_analysis)
-        if strength == "偏強":
-            return "具有創業的勇氣和決心，適合自主創業"
-        elif strength == "偏弱":
-            return "建議先積累經驗和資源，或選擇合夥創業"
-        else:
-            return "創業和就業都有不錯的發展前景，可根據實際情況選擇"
-    
+        return self.templates['entrepreneurship'][self._strength_level(wuxing_analysis)]
+
     def _analyze_wealth_star(self, bazi_info: Dict) -> str:
-        """分析財星類型"""
-        # 簡化的財星分析
-        day_master = bazi_info['day_master']
-        tiangan = bazi_info['tiangan']
-        
-        # 這裡使用簡化的邏輯，實際應該更複雜
-        if '甲' in tiangan or '乙' in tiangan:
-            return '正財'
-        elif '丙' in tiangan or '丁' in tiangan:
-            return '偏財'
-        else:
-            return '比肩'
-    
+        """分析財星類型（依十神計數）"""
+        counts = ten_god_counts(bazi_info)
+
+        # 正偏財以出現次數多者為主；財星不現則看比劫
+        god = dominant(counts, (ZHENGCAI, PIANCAI))
+        if god < 0:
+            god = JIECAI if counts[JIECAI] > counts[BIJIAN] else BIJIAN
+        return TEN_GODS[god]
+
     def _get_wealth_star_description(self, wealth_type: str) -> str:
         """獲取財星描述"""
-        descriptions = {
-            '正財': "透出有力",
-            '偏財': "暗藏不露",
-            '劫財': "過於旺盛",
-            '比肩': "平衡適中"
-        }
-        return descriptions.get(wealth_type, "配置合理")
-    
+        return self._lookup('wealth_star', wealth_type)
+
     def _get_wealth_pattern_description(self, wealth_type: str) -> str:
         """獲取財運模式描述"""
-        patterns = {
-            '正財': "穩健踏實，適合長期投資",
-            '偏財': "機會較多，但需要把握時機",
-            '劫財': "起伏較大，需要謹慎理財",
-            '比肩': "平穩發展，收支平衡"
-        }
-        return patterns.get(wealth_type, "有一定的財運基礎")
-    
+        return self._lookup('wealth_pattern', wealth_type)
+
     def _get_wealth_method_description(self, wealth_type: str) -> str:
         """獲取求財方式描述"""
-        methods = {
-            '正財': "勤勞工作，穩定收入",
-            '偏財': "投資理財，多元發展",
-            '劫財': "合作經營，風險分擔",
-            '比肩': "團隊合作，共同發展"
-        }
-        return methods.get(wealth_type, "發揮個人優勢")
-    
+        return self._lookup('wealth_method', wealth_type)
+
     def _get_investment_advice(self, wealth_type: str) -> str:
         """獲取投資建議"""
-        advice = {
-            '正財': "選擇穩健的投資產品，如定期存款、債券等",
-            '偏財': "可以適當進行股票、基金等投資，但要控制風險",
-            '劫財': "避免高風險投資，不宜借貸投資",
-            '比肩': "可以考慮合夥投資，分散風險"
-        }
-        return advice.get(wealth_type, "根據個人風險承受能力選擇")
-    
+        return self._lookup('investment', wealth_type)
+
     def _get_financial_advice(self, wealth_type: str) -> str:
         """獲取理財建議"""
-        advice = {
-            '正財': "制定預算計劃，養成儲蓄習慣",
-            '偏財': "多元化投資，不要把雞蛋放在一個籃子裡",
-            '劫財': "謹慎消費，避免衝動購買",
-            '比肩': "平衡收支，適度消費"
-        }
-        return advice.get(wealth_type, "合理規劃財務")
-    
+        return self._lookup('financial', wealth_type)
+
     def _get_unfavorable_period(self) -> str:
         """獲取不利時期"""
-        return "五行相沖的年份"
-    
+        return self.text['unfavorable_period']
+
     def _analyze_spouse_star(self, bazi_info: Dict, gender: str) -> str:
-        """分析配偶星"""
-        # 簡化的配偶星分析
-        if gender == '男':
-            return '正官'
-        else:
-            return '正印'
-    
+        """分析配偶星（依十神計數）"""
+        counts = ten_god_counts(bazi_info)
+        candidates = self.SPOUSE_STAR_CANDIDATES.get(gender, self.SPOUSE_STAR_CANDIDATES['女'])
+
+        god = dominant(counts, candidates)
+        if god < 0:
+            god = dominant(counts, self.SPOUSE_STAR_FALLBACK)
+        if god < 0:
+            god = candidates[0]
+        return TEN_GODS[god]
+
     def _get_spouse_star_description(self, spouse_star: str) -> str:
         """獲取配偶星描述"""
-        descriptions = {
-            '正官': "清透有力",
-            '七殺': "混雜不清",
-            '正印': "溫和有情",
-            '偏印': "複雜多變"
-        }
-        return descriptions.get(spouse_star, "配置適中")
-    
+        return self._lookup('spouse_star', spouse_star)
+
     def _get_marriage_pattern_description(self, spouse_star: str) -> str:
         """獲取婚姻模式描述"""
-        return self.marriage_templates.get(spouse_star, ['婚姻運勢平穩'])[0]
-    
+        patterns = self.marriage_templates.get(spouse_star)
+        return patterns[0] if patterns else self.templates['defaults']['marriage']
+
     def _get_spouse_characteristics(self, spouse_star: str) -> str:
         """獲取配偶特徵"""
-        characteristics = {
-            '正官': "品格端正，有責任感",
-            '七殺': "性格強勢，有魄力",
-            '正印': "溫和賢慧，有愛心",
-            '偏印': "聰明機智，有個性"
-        }
-        return characteristics.get(spouse_star, "性格溫和")
-    
+        return self._lookup('spouse_traits', spouse_star)
+
     def _get_spouse_selection_advice(self, spouse_star: str) -> str:
         """獲取擇偶建議"""
-        advice = {
-            '正官': "選擇品格端正、有責任感的對象",
-            '七殺': "選擇能夠相互理解、包容的對象",
-            '正印': "選擇溫和體貼、有愛心的對象",
-            '偏印': "選擇聰明有趣、有共同話題的對象"
-        }
-        return advice.get(spouse_star, "選擇合適的對象")
-    
+        return self._lookup('spouse_selection', spouse_star)
+
     def _get_marriage_timing(self, bazi_info: Dict) -> str:
         """獲取結婚時機"""
         # 簡化的結婚時機分析
-        return "25-30"
-    
+        return self.text['marriage_timing']
+
     def _get_relationship_advice(self, spouse_star: str) -> str:
         """獲取感情建議"""
-        advice = {
-            '正官': "保持誠信，承擔責任",
-            '七殺': "學會溝通，相互理解",
-            '正印': "給予關愛，細心呵護",
-            '偏印': "保持新鮮感，增進了解"
-        }
-        return advice.get(spouse_star, "真誠相待")
-    
+        return self._lookup('relationship_advice', spouse_star)
+
     def _get_marriage_precautions(self, spouse_star: str) -> str:
         """獲取婚姻注意事項"""
-        precautions = {
-            '正官': "避免過於嚴肅，增加生活情趣",
-            '七殺': "避免爭強好勝，學會妥協",
-            '正印': "避免過度依賴，保持獨立",
-            '偏印': "避免三心二意，專一感情"
-        }
-        return precautions.get(spouse_star, "相互尊重")
-    
+        return self._lookup('marriage_precautions', spouse_star)
+
     def _get_health_constitution_description(self, wuxing: str, wuxing_analysis: Dict) -> str:
         """獲取健康體質描述"""
-        return f"您的體質偏向{wuxing}性，五行配置{self._get_strength_description(wuxing_analysis)}"
-    
+        return self.text['health_constitution'].format(
+            wuxing=wuxing, strength=self._get_strength_description(wuxing_analysis))
+
     def _get_constitution_type(self, wuxing_analysis: Dict) -> str:
         """獲取體質類型"""
-        strength = self._get_strength_description(wuxing_analysis)
-        if strength == "偏強":
-            return "較為強健，但需要適當調節"
-        elif strength == "偏弱":
-            return "相對較弱，需要加強調養"
-        else:
-            return "比較平衡，整體健康狀況良好"
-    
+        return self.templates['constitution'][self._strength_level(wuxing_analysis)]
+
     def _get_health_concerns(self, wuxing: str, weak_elements: List[str]) -> str:
         """獲取健康關注點"""
-        concerns = {
-            '木': "肝膽、神經系統",
-            '火': "心臟、血液循環",
-            '土': "脾胃、消化系統",
-            '金': "肺部、呼吸系統",
-            '水': "腎臟、泌尿系統"
-        }
-        main_concern = concerns.get(wuxing, "整體健康")
-        
+        concerns = self.templates['health_concerns']
+        main_concern = self._lookup('health_concerns', wuxing)
+
         if weak_elements:
             weak_concerns = [concerns.get(elem, "") for elem in weak_elements if elem in concerns]
             if weak_concerns:
-                return f"{main_concern}以及{', '.join(weak_concerns)}"
-        
+                return self.text['health_concerns_extra'].format(main=main_concern, extra=', '.join(weak_concerns))
+
         return main_concern
-    
+
     def _get_health_prevention_advice(self, wuxing: str) -> str:
         """獲取健康預防建議"""
-        advice = {
-            '木': "保持心情愉快，避免過度勞累",
-            '火': "注意心血管健康，避免過度興奮",
-            '土': "注意飲食規律，避免暴飲暴食",
-            '金': "注意呼吸道保健，避免吸煙",
-            '水': "注意腎臟保養，避免過度勞累"
-        }
-        return advice.get(wuxing, "保持良好的生活習慣")
-    
+        return self._lookup('health_prevention', wuxing)
+
     def _get_wellness_advice(self, wuxing: str, favorable_elements: List[str]) -> str:
         """獲取養生建議"""
-        return f"多接觸{favorable_elements[0]}、{favorable_elements[1]}相關的環境和活動"
-    
+        return self.text['wellness'].format(first=favorable_elements[0], second=favorable_elements[1])
+
     def _get_dietary_advice(self, favorable_elements: List[str]) -> str:
         """獲取飲食建議"""
-        dietary_map = {
-            '木': "綠色蔬菜、酸味食物",
-            '火': "紅色食物、苦味食物",
-            '土': "黃色食物、甘味食物",
-            '金': "白色食物、辛味食物",
-            '水': "黑色食物、鹹味食物"
-        }
-        
-        recommendations = []
-        for element in favorable_elements:
-            if element in dietary_map:
-                recommendations.append(dietary_map[element])
-        
-        return "多食用" + "、".join(recommendations) if recommendations else "均衡飲食"
-    
+        dietary_map = self.templates['dietary']
+        recommendations = [dietary_map[element] for element in favorable_elements if element in dietary_map]
+        if not recommendations:
+            return self.templates['defaults']['dietary']
+        return self.text['dietary_prefix'] + "、".join(recommendations)
+
     def _get_dietary_restrictions(self, wuxing: str) -> str:
         """獲取飲食禁忌"""
-        restrictions = {
-            '木': "過於辛辣的食物",
-            '火': "過於寒涼的食物",
-            '土': "過於油膩的食物",
-            '金': "過於酸澀的食物",
-            '水': "過於甘甜的食物"
-        }
-        return restrictions.get(wuxing, "刺激性食物")
-    
+        return self._lookup('dietary_restrictions', wuxing)
+
     def _get_exercise_recommendations(self, wuxing: str) -> str:
         """獲取運動建議"""
-        exercises = {
-            '木': "慢跑、瑜伽、太極拳",
-            '火': "游泳、騎車、球類運動",
-            '土': "散步、爬山、健身操",
-            '金': "武術、舉重、器械運動",
-            '水': "游泳、水上運動、冥想"
-        }
-        return exercises.get(wuxing, "適度的有氧運動")
-    
+        return self._lookup('exercise', wuxing)
+
     def _get_parent_relationship_description(self, bazi_info: Dict) -> str:
         """獲取父母關係描述"""
-        return "總體和諧，但需要多溝通理解"
-    
+        return self.text['parent_relationship']
+
     def _get_family_role_description(self, bazi_info: Dict) -> str:
         """獲取家庭角色描述"""
-        return "扮演著重要的角色，有一定的影響力"
-    
+        return self.text['family_role']
+
     def _get_sibling_relationship_description(self, bazi_info: Dict) -> str:
         """獲取兄弟姊妹關係描述"""
-        return "關係較為融洽"
-    
+        return self.text['sibling_relationship']
+
     def _get_sibling_interaction_description(self, bazi_info: Dict) -> str:
         """獲取兄弟姊妹互動描述"""
-        return "能夠相互支持，偶有小摩擦"
-    
+        return self.text['sibling_interaction']
+
     def _get_children_fortune_description(self, bazi_info: Dict) -> str:
         """獲取子女運勢描述"""
-        return "子女運勢不錯，能夠帶來快樂"
-    
+        return self.text['children_fortune']
+
     def _get_parenting_advice(self, bazi_info: Dict) -> str:
         """獲取育兒建議"""
-        return "注重品德教育，培養獨立能力"
-    
+        return self.text['parenting']
+
     def _get_benefactor_description(self, bazi_info: Dict) -> str:
         """獲取貴人描述"""
-        return "年長的長輩或有經驗的前輩"
-    
+        return self.text['benefactor']
+
     def _get_dayun_description(self, dayun: Dict, index: int) -> str:
         """獲取大運描述"""
-        wuxing = dayun['wuxing']
-        descriptions = {
-            '木': "事業發展順利，創新能力強",
-            '火': "名聲地位提升，人際關係活躍",
-            '土': "財運穩定，基礎建設完善",
-            '金': "決斷力強，執行效率高",
-            '水': "學習能力強，適應變化快"
-        }
-        return descriptions.get(wuxing, "運勢平穩發展")
-    
+        return self._lookup('dayun', dayun['wuxing'])
+
     def _get_dayun_advice(self, dayun: Dict, index: int) -> str:
         """獲取大運建議"""
-        return "建議把握機遇，穩步發展。"
-    
+        return self.text['dayun_advice']
+
+    def _describe_interactions(self, label: str, gan: str, zhi: str, branch_flags, stem_flags) -> List[str]:
+        """把歲運與原局四柱的關係旗標轉為描述"""
+        term = self._term
+        parts = []
+        for pos in range(4):
+            names = relation_names(int(branch_flags[pos]))
+            if names:
+                parts.append(self.text['interaction_branch'].format(
+                    label=label, zhi=zhi, pillar=term(PILLAR_NAMES[pos]),
+                    names='、'.join(term(name) for name in names), domain=term(PILLAR_DOMAINS[pos])))
+        day_stem = int(stem_flags[2])
+        if day_stem & STEM_HE:
+            parts.append(self.text['interaction_stem_he'].format(label=label, gan=gan))
+        if day_stem & STEM_CHONG:
+            parts.append(self.text['interaction_stem_chong'].format(label=label, gan=gan))
+        return parts
+
+    def _get_interaction_advice(self, branch_flags) -> str:
+        """按受沖刑害或逢合的柱位給出建議"""
+        clash_advice = self.templates['clash_advice']
+        harmony_advice = self.templates['harmony_advice']
+        advice = []
+        for pos in range(4):
+            flags = int(branch_flags[pos])
+            if flags & (CHONG | XING | HAI):
+                advice.append(clash_advice[pos])
+            elif flags & (LIUHE | BANHE):
+                advice.append(harmony_advice[pos])
+        return "，".join(advice)
+
+    def _get_dayun_interaction(self, relations: Dict, dayun: Dict, index: int) -> str:
+        """獲取大運與原局的刑沖合害分析"""
+        parts = self._describe_interactions(
+            self.text['dayun_label'], dayun['gan'], dayun['zhi'],
+            relations['dayun_branch'][index], relations['dayun_stem'][index]
+        )
+        if not parts:
+            return self.text['dayun_calm']
+
+        text = "；".join(parts) + "。"
+        advice = self._get_interaction_advice(relations['dayun_branch'][index])
+        if advice:
+            text += self.text['dayun_advice_prefix'].format(advice=advice)
+        return text
+
+    def _get_liunian_interaction(self, relations: Dict, dayun_list: List[Dict], dayun_idx: int,
+                                 year_idx: int, year_ganzhi: str) -> str:
+        """獲取流年與原局、大運的刑沖合害分析"""
+        parts = self._describe_interactions(
+            self.text['liunian_label'], year_ganzhi[0], year_ganzhi[1],
+            relations['year_branch'][year_idx], relations['year_stem'][year_idx]
+        )
+
+        if dayun_idx >= 0:
+            dayun = dayun_list[dayun_idx]
+            cross = relation_names(int(relations['cross_branch'][dayun_idx, year_idx]))
+            if cross:
+                parts.append(self.text['liunian_cross'].format(
+                    pillar=dayun['pillar'], names='、'.join(self._term(name) for name in cross)))
+            sanhe = int(relations['sanhe'][dayun_idx, year_idx])
+            for group, element in enumerate(SANHE_ELEMENTS):
+                if sanhe >> group & 1:
+                    parts.append(self.text['liunian_sanhe'].format(element=self.WUXING[element]))
+            score = float(relations['score'][dayun_idx, year_idx])
+        else:
+            score = float(relations['year_score'][year_idx])
+
+        text = "；".join(parts) + "。" if parts else self.text['liunian_calm']
+        if score >= 3:
+            text += self.text['liunian_good']
+        elif score <= -3:
+            text += self.text['liunian_bad']
+        else:
+            text += self.text['liunian_even']
+        advice = self._get_interaction_advice(relations['year_branch'][year_idx])
+        return text + (f"；{advice}。" if advice else "。")
+
     def _get_year_ganzhi(self, year: int) -> str:
         """獲取年份干支"""
         # 簡化的干支計算
         gan_index = (year - 4) % 10
         zhi_index = (year - 4) % 12
         return self.TIANGAN[gan_index] + self.DIZHI[zhi_index]
-    
+
     def _get_liunian_prediction(self, year_ganzhi: str, age: int) -> str:
         """獲取流年預測"""
-        predictions = [
-            "整體運勢平穩，適合穩健發展。",
-            "事業運勢不錯，有新的機遇出現。",
-            "財運有所提升，投資需謹慎。",
-            "感情運勢波動，需要多溝通。",
-            "健康狀況良好，注意休息。"
-        ]
-        return random.choice(predictions)
-    
+        return random.choice(self.templates['liunian'])
+
     def _get_favorable_colors(self, favorable_elements: List[str]) -> str:
         """獲取有利顏色"""
-        color_map = {
-            '木': "綠色、青色",
-            '火': "紅色、橙色",
-            '土': "黃色、棕色",
-            '金': "白色、金色",
-            '水': "黑色、藍色"
-        }
-        
-        colors = []
-        for element in favorable_elements:
-            if element in color_map:
-                colors.append(color_map[element])
-        
-        return "、".join(colors) if colors else "中性色調"
-    
+        return self._join_lookup('colors', favorable_elements)
+
     def _get_unfavorable_colors(self, wuxing_analysis: Dict) -> str:
         """獲取不利顏色"""
-        max_wuxing = wuxing_analysis['max_wuxing']
-        color_map = {
-            '木': "白色、金色",
-            '火': "黑色、藍色",
-            '土': "綠色、青色",
-            '金': "紅色、橙色",
-            '水': "黃色、棕色"
-        }
-        return color_map.get(max_wuxing, "過於鮮豔的顏色")
-    
+        return self._lookup('unfavorable_colors', wuxing_analysis['max_wuxing'])
+
     def _get_favorable_directions(self, favorable_elements: List[str]) -> str:
         """獲取有利方位"""
-        direction_map = {
-            '木': "東方",
-            '火': "南方",
-            '土': "中央",
-            '金': "西方",
-            '水': "北方"
-        }
-        
-        directions = []
-        for element in favorable_elements:
-            if element in direction_map:
-                directions.append(direction_map[element])
-        
-        return "、".join(directions) if directions else "適中方位"
-    
+        return self._join_lookup('directions', favorable_elements)
+
     def _get_lucky_numbers(self, favorable_elements: List[str]) -> str:
         """獲取幸運數字"""
-        number_map = {
-            '木': "3、8",
-            '火': "2、7",
-            '土': "5、0",
-            '金': "4、9",
-            '水': "1、6"
-        }
-        
-        numbers = []
-        for element in favorable_elements:
-            if element in number_map:
-                numbers.append(number_map[element])
-        
-        return "、".join(numbers) if numbers else "1、6"
-    
+        return self._join_lookup('lucky_numbers', favorable_elements)
+
     def _get_favorable_accessories(self, favorable_elements: List[str]) -> str:
         """獲取有利飾品"""
-        accessory_map = {
-            '木': "木質",
-            '火': "紅寶石、瑪瑙",
-            '土': "玉石、陶瓷",
-            '金': "金屬、水晶",
-            '水': "黑曜石、珍珠"
-        }
-        
-        accessories = []
-        for element in favorable_elements:
-            if element in accessory_map:
-                accessories.append(accessory_map[element])
-        
-        return "、".join(accessories) if accessories else "天然材質"
-    
+        return self._join_lookup('accessories', favorable_elements)
+
     def _get_favorable_plants(self, favorable_elements: List[str]) -> str:
         """獲取有利植物"""
-        plant_map = {
-            '木': "綠蘿、富貴竹",
-            '火': "紅掌、鳳仙花",
-            '土': "仙人掌、多肉植物",
-            '金': "白蘭花、茉莉花",
-            '水': "水仙、荷花"
-        }
-        
-        plants = []
-        for element in favorable_elements:
-            if element in plant_map:
-                plants.append(plant_map[element])
-        
-        return "、".join(plants) if plants else "綠色植物"
-    
+        return self._join_lookup('plants', favorable_elements)
+
     def _get_daily_precautions(self, wuxing_analysis: Dict) -> str:
         """獲取日常注意事項"""
-        return "保持積極樂觀的心態，注意五行平衡，定期檢視和調整生活方式。"
+        return self.text['daily_precautions']
 
 # 測試代碼
 if __name__ == "__main__":
     from bazi_calculator import BaziCalculator
-    import datetime
     
     # 創建實例
     calculator = BaziCalculator()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+擇日模組
+基於預先計算的干支曆表，按命主八字為日期範圍內每一天評分，
+返回嫁娶、開業、搬遷等事項的吉日排名，並支持多位命主批量查詢
+"""
+
+import datetime
+from typing import Dict, List, Optional, Sequence
+from bazi_calculator import BaziCalculator
+from ganzhi_relations import (BRANCH_RELATIONS, STEM_RELATIONS, LIUHE, CHONG, XING, HAI, BANHE,
+                              STEM_HE, STEM_CHONG, BRANCH_RELATION_NAMES, score_table)
+from pillar_calendar import PillarCalendar, get_calendar, pillar_name
+from shishen import chart_codes
+from wuxing_strength import WUXING
+
+# 地支本氣五行序號
+BRANCH_ELEMENT = tuple(WUXING.index(BaziCalculator.WUXING_DIZHI[zhi]) for zhi in BaziCalculator.DIZHI)
+
+# 流日地支與命主日支（夫妻宮、自身）的關係分
+DAY_BRANCH_SCORES = score_table(BRANCH_RELATIONS, {
+    LIUHE: 10.0, BANHE: 6.0, CHONG: -20.0, XING: -8.0, HAI: -6.0
+})
+
+# 流日地支與命主年支（生肖）的關係分
+YEAR_BRANCH_SCORES = score_table(BRANCH_RELATIONS, {
+    LIUHE: 6.0, BANHE: 4.0, CHONG: -15.0, XING: -5.0, HAI: -4.0
+})
+
+# 流日天干與日主的關係分
+DAY_STEM_SCORES = score_table(STEM_RELATIONS, {STEM_HE: 5.0, STEM_CHONG: -8.0})
+
+# 流日干支五行為喜用神時的加分（天干、地支各計）
+FAVORABLE_SCORE = 8.0
+
+# 月破：流日地支沖月支，諸事不宜
+MONTH_BREAK_SCORE = -10.0
+
+# 各事項對評分項的加權：(日支, 年支, 日干, 喜用神)
+EVENT_WEIGHTS = {
+    'general': (1.0, 1.0, 1.0, 1.0),
+    'wedding': (1.5, 1.0, 1.2, 0.8),   # 嫁娶重夫妻宮
+    'opening': (0.8, 1.0, 1.0, 1.5),   # 開業重喜用神
+    'moving': (1.0, 1.5, 0.8, 1.0)     # 搬遷重沖太歲
+}
+
+EVENT_NAMES = {'general': '諸事', 'wedding': '嫁娶', 'opening': '開業', 'moving': '搬遷'}
+
+
+def day_code_scores(day_gan: int, day_zhi: int, year_zhi: int, favorable: Sequence[int],
+                    event: str = 'general') -> List[float]:
+    """命主對六十甲子每一日柱的評分表（長度60，不含月破）"""
+    w_day, w_year, w_stem, w_fav = EVENT_WEIGHTS[event]
+    scores = []
+    for code in range(60):
+        gan, zhi = code % 10, code % 12
+        score = (w_day * DAY_BRANCH_SCORES[day_zhi][zhi] +
+                 w_year * YEAR_BRANCH_SCORES[year_zhi][zhi] +
+                 w_stem * DAY_STEM_SCORES[day_gan][gan])
+        if gan // 2 in favorable:
+            score += w_fav * FAVORABLE_SCORE
+        if BRANCH_ELEMENT[zhi] in favorable:
+            score += w_fav * FAVORABLE_SCORE
+        scores.append(score)
+    return scores
+
+
+class DateSelector:
+    """擇日器"""
+
+    def __init__(self, calendar: Optional[PillarCalendar] = None):
+        """初始化擇日器，未提供曆表時使用進程內共享曆表"""
+        import numpy as np
+
+        self.calendar = calendar or get_calendar()
+        day_zhi = self.calendar.day_codes.astype(np.int64) % 12
+        month_zhi = self.calendar.month_codes.astype(np.int64) % 12
+        # 每日的月破扣分，與命主無關，預先算好
+        self.month_break = np.where((day_zhi - month_zhi) % 12 == 6, MONTH_BREAK_SCORE, 0.0)
+
+    def _range(self, start: datetime.date, end: datetime.date) -> slice:
+        """日期範圍 [start, end] -> 曆表下標切片"""
+        return slice(self.calendar.index_of(start), self.calendar.index_of(end) + 1)
+
+    def score_days(self, bazi_info: Dict, favorable_elements: Sequence[str],
+                   start: datetime.date, end: datetime.date, event: str = 'general'):
+        """為日期範圍內每一天評分，返回與日期對應的分數數組"""
+        import numpy as np
+
+        stems, branches = chart_codes(bazi_info)
+        favorable = [WUXING.index(e) for e in favorable_elements]
+        table = np.asarray(day_code_scores(stems[2], branches[2], branches[0], favorable, event))
+        days = self._range(start, end)
+        return table[self.calendar.day_codes[days]] + self.month_break[days]
+
+    def select(self, bazi_info: Dict, wuxing_analysis: Dict, start: datetime.date,
+               end: datetime.date, event: str = 'general', top: int = 10) -> List[Dict]:
+        """選出日期範圍內分數最高的吉日
+
+        返回按分數由高到低排列的列表，每項含日期、日柱、分數及評語。
+        """
+        import numpy as np
+
+        scores = self.score_days(bazi_info, wuxing_analysis['favorable_elements'], start, end, event)
+        top = min(top, len(scores))
+        best = np.argpartition(-scores, top - 1)[:top] if top else np.arange(0)
+        best = best[np.argsort(-scores[best], kind='stable')]
+
+        offset = self.calendar.index_of(start)
+        return [
+            self._describe(bazi_info, wuxing_analysis, offset + int(i), float(scores[i]), event)
+            for i in best
+        ]
+
+    def _describe(self, bazi_info: Dict, wuxing_analysis: Dict, index: int,
+                  score: float, event: str) -> Dict:
+        """生成單個吉日的說明"""
+        stems, branches = chart_codes(bazi_info)
+        day_code = int(self.calendar.day_codes[index])
+        gan, zhi = day_code % 10, day_code % 12
+        reasons = []
+        for label, target in (('日支', branches[2]), ('生肖', branches[0])):
+            flags = BRANCH_RELATIONS[target][zhi]
+            for flag, name in BRANCH_RELATION_NAMES.items():
+                if flags & flag:
+                    reasons.append(f"流日{BaziCalculator.DIZHI[zhi]}與命主{label}{name}")
+        stem_flags = STEM_RELATIONS[stems[2]][gan]
+        if stem_flags & STEM_HE:
+            reasons.append(f"流日{BaziCalculator.TIANGAN[gan]}與日主相合")
+        if stem_flags & STEM_CHONG:
+            reasons.append(f"流日{BaziCalculator.TIANGAN[gan]}與日主相沖")
+        favorable = wuxing_analysis['favorable_elements']
+        for element in {WUXING[gan // 2], WUXING[BRANCH_ELEMENT[zhi]]} & set(favorable):
+            reasons.append(f"流日五行{element}為喜用神")
+        if self.month_break[index]:
+            reasons.append("月破日")
+        return {
+            'date': self.calendar.date_of(index),
+            'day_pillar': pillar_name(day_code),
+            'month_pillar': pillar_name(int(self.calendar.month_codes[index])),
+            'event': EVENT_NAMES.get(event, event),
+            'score': round(score, 2),
+            'reasons': reasons
+        }
+
+    def batch_select(self, stem_codes, branch_codes, favorable_codes, start: datetime.date,
+                     end: datetime.date, event: str = 'general', top: int = 10):
+        """多位命主批量擇日
+
+        stem_codes、branch_codes 為 (K, 4) 干支序號，favorable_codes 為 (K, 2) 喜用神五行序號。
+        返回 (dates, scores)：dates 為 (K, top) 的 datetime64[D] 數組，按分數由高到低排列。
+        """
+        import numpy as np
+
+        stems = np.asarray(stem_codes, dtype=np.intp)
+        branches = np.asarray(branch_codes, dtype=np.intp)
+        favorable = np.asarray(favorable_codes, dtype=np.intp)
+        w_day, w_year, w_stem, w_fav = EVENT_WEIGHTS[event]
+
+        # 每位命主對六十甲子的評分表 (K, 60)
+        codes = np.arange(60)
+        gan, zhi = codes % 10, codes % 12
+        table = (w_day * np.asarray(DAY_BRANCH_SCORES)[branches[:, 2:3], zhi] +
+                 w_year * np.asarray(YEAR_BRANCH_SCORES)[branches[:, 0:1], zhi] +
+                 w_stem * np.asarray(DAY_STEM_SCORES)[stems[:, 2:3], gan])
+        gan_element = gan // 2
+        zhi_element = np.asarray(BRANCH_ELEMENT)[zhi]
+        for k in range(favorable.shape[1]):
+            fav = favorable[:, k:k + 1]
+            table += w_fav * FAVORABLE_SCORE * (gan_element == fav)
+            table += w_fav * FAVORABLE_SCORE * (zhi_element == fav)
+
+        days = self._range(start, end)
+        scores = table[:, self.calendar.day_codes[days]] + self.month_break[days]
+
+        top = min(top, scores.shape[1])
+        best = np.argpartition(-scores, top - 1, axis=1)[:, :top]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        best = np.take_along_axis(best, order, axis=1)
+        first = np.datetime64(start, 'D')
+        return first + best, np.take_along_axis(best_scores, order, axis=1)
@@ -9,19 +9,47 @@ import datetime
 import os
 import sys
 from bazi_calculator import BaziCalculator
-from content_generator import ContentGenerator
-from pdf_generator import FortuneReportPDF
+from content_generator import ContentGenerator, REPORT_CHAPTERS, load_templates
 from pdf_generator import FortuneReportPDF
+from instrumentation import PipelineInstrumentation, default_instrumentation
+from chart_store import ChartStore, DEFAULT_DB, analysis_method
+from zh_convert import normalize_locale
+
+def report_filename(style, name, output_format='pdf', key=None):
+    """報告文件名：風格、姓名及生成時間（精確到秒）
+
+    key 附在姓名之後（如客戶 id），同一秒內為多個同名客戶生成報告時用以區分文件。
+    """
+    style_name = "現代" if style == 'modern' else "傳統"
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    extension = 'pdf'
+    if output_format != 'pdf':
+        from report_renderers import FORMATS
+        extension = FORMATS[output_format][0]
+    label = name if key is None else f"{name}_{key}"
+    return f"{style_name}風格_{label}_算命報告_{timestamp}.{extension}"
 
 class EnhancedFortuneTeller:
     """增強版算命程式"""
     
-    def __init__(self):
-        """初始化程式"""
+    def __init__(self, instrumentation: PipelineInstrumentation = None, store: ChartStore = None,
+                 locale: str = None):
+        """初始化程式
+
+        store 為八字存儲，提供時記錄客戶、八字盤及生成的報告。
+        locale 為默認輸出語系（zh-Hant 繁體 / zh-Hans 簡體），單份報告可另行指定。
+        """
+        self.instrumentation = instrumentation or default_instrumentation
+        self.store = store
+        self.locale = normalize_locale(locale)
         self.calculator = BaziCalculator()
-        self.generator = ContentGenerator()
-        self.modern_pdf = FortuneReportPDF()
-        self.traditional_pdf = FortuneReportPDF()
+        self.generator = ContentGenerator(self.locale)
+        self.modern_pdf = FortuneReportPDF(instrumentation=self.instrumentation, locale=self.locale)
+        self.traditional_pdf = FortuneReportPDF(instrumentation=self.instrumentation, locale=self.locale)
+        # 其他語系的內容生成器及PDF生成器，首次使用時創建
+        self._generators = {self.locale: self.generator}
+        self._pdf_renderers = {(self.locale, 'modern'): self.modern_pdf,
+                               (self.locale, 'traditional'): self.traditional_pdf}
     
     def display_welcome(self):
         """顯示歡迎信息"""
@@ -95,18 +123,23 @@ class EnhancedFortuneTeller:
             else:
                 print("請輸入1或2。")
     
-    def calculate_bazi(self, birth_date, birth_time, gender):
-        """計算八字信息"""
+    def calculate_bazi(self, birth_date, birth_time, gender, longitude=None, timezone=None):
+        """計算八字信息（提供經度或時區時按真太陽時排盤）"""
         print("\n正在計算八字...")
         
+        stage = self.instrumentation.stage
+        
         # 計算八字
-        bazi_info = self.calculator.calculate_bazi(birth_date, birth_time)
+        with stage('calculate_bazi'):
+            bazi_info = self.calculator.calculate_bazi(birth_date, birth_time, longitude, timezone)
         
         # 分析五行
-        wuxing_analysis = self.calculator.analyze_wuxing_balance(bazi_info)
+        with stage('analyze_wuxing_balance'):
+            wuxing_analysis = self.calculator.analyze_wuxing_balance(bazi_info)
         
         # 計算大運
-        dayun_list = self.calculator.calculate_dayun(bazi_info, gender, birth_date)
+        with stage('calculate_dayun'):
+            dayun_list = self.calculator.calculate_dayun(bazi_info, gender, birth_date)
         
         return bazi_info, wuxing_analysis, dayun_list
     
@@ -137,43 +170,72 @@ class EnhancedFortuneTeller:
         else:
             print("\n五行統計：未能計算")
     
-    def generate_content(self, bazi_info, wuxing_analysis, dayun_list, birth_date, gender):
+    def content_generator(self, locale=None):
+        """指定語系的內容生成器（模板按語系緩存，各語系的生成開銷相同）
+
+        模板文件更新後返回綁定新版本的生成器；進行中的報告仍持有原生成器，整份報告使用同一版本。
+        """
+        locale = normalize_locale(locale or self.locale)
+        templates = load_templates(locale)
+        generator = self._generators.get(locale)
+        if generator is None or generator.templates is not templates:
+            generator = self._generators[locale] = ContentGenerator(locale, templates)
+        return generator
+    
+    def pdf_renderer(self, style, locale=None):
+        """指定風格及語系的PDF生成器"""
+        locale = normalize_locale(locale or self.locale)
+        style = 'modern' if style == 'modern' else 'traditional'
+        if (locale, style) not in self._pdf_renderers:
+            self._pdf_renderers[locale, style] = FortuneReportPDF(
+                instrumentation=self.instrumentation, locale=locale)
+        return self._pdf_renderers[locale, style]
+    
+    def generate_content(self, bazi_info, wuxing_analysis, dayun_list, birth_date, gender, locale=None):
         """生成算命內容"""
         print("\n正在生成算命內容...")
         
-        all_contents = {
-            'life_summary': self.generator.generate_life_summary(bazi_info, wuxing_analysis),
-            'career_summary': self.generator.generate_career_summary(bazi_info, wuxing_analysis),
-            'wealth_summary': self.generator.generate_wealth_summary(bazi_info, wuxing_analysis),
-            'marriage_summary': self.generator.generate_marriage_summary(bazi_info, gender),
-            'health_summary': self.generator.generate_health_summary(bazi_info, wuxing_analysis),
-            'family_summary': self.generator.generate_family_summary(bazi_info),
-            'dayun_summary': self.generator.generate_dayun_summary(dayun_list),
-            'liunian_prediction': self.generator.generate_liunian_prediction(birth_date.year),
-            'feng_shui_guide': self.generator.generate_feng_shui_guide(wuxing_analysis)
+        generator = self.content_generator(locale)
+        tasks = [
+            ('life_summary', generator.generate_life_summary, (bazi_info, wuxing_analysis)),
+            ('career_summary', generator.generate_career_summary, (bazi_info, wuxing_analysis)),
+            ('wealth_summary', generator.generate_wealth_summary, (bazi_info, wuxing_analysis)),
+            ('marriage_summary', generator.generate_marriage_summary, (bazi_info, gender)),
+            ('health_summary', generator.generate_health_summary, (bazi_info, wuxing_analysis)),
+            ('family_summary', generator.generate_family_summary, (bazi_info,)),
+            ('shensha_summary', generator.generate_shensha_summary, (bazi_info,)),
+            ('dayun_summary', generator.generate_dayun_summary, (dayun_list,)),
+            ('liunian_prediction', generator.generate_liunian_prediction, (birth_date.year,)),
+            ('feng_shui_guide', generator.generate_feng_shui_guide, (wuxing_analysis,))
+        ]
+        
+        # 大運、流年章節按歲運與原局的刑沖合害推斷
+        options = {
+            'dayun_summary': {'bazi_info': bazi_info},
+            'liunian_prediction': {'bazi_info': bazi_info, 'dayun_list': dayun_list}
         }
         
+        all_contents = {}
+        for key, method, args in tasks:
+            with self.instrumentation.stage(method.__name__):
+                all_contents[key] = method(*args, **options.get(key, {}))
+        
         # 統計內容
         total_chars = sum(len(content) for content in all_contents.values())
+        self.instrumentation.count('chars_generated', total_chars)
         print(f"內容生成完成！總字數：{total_chars} 字符")
         
         return all_contents
     
     def generate_pdf(self, style, filename, name, bazi_info, wuxing_analysis, 
-                    dayun_list, birth_date, birth_time, gender, all_contents):
+                    dayun_list, birth_date, birth_time, gender, all_contents, locale=None):
         """生成PDF報告"""
         print(f"\n正在生成{style}風格PDF報告...")
         
-        if style == 'modern':
-            self.modern_pdf.generate_pdf(
-                filename, name, bazi_info, wuxing_analysis, dayun_list,
-                birth_date, birth_time, gender, all_contents
-            )
-        else:  # traditional
-            self.traditional_pdf.generate_pdf(
-                filename, name, bazi_info, wuxing_analysis, dayun_list,
-                birth_date, birth_time, gender, all_contents
-            )
+        self.pdf_renderer(style, locale).generate_pdf(
+            filename, name, bazi_info, wuxing_analysis, dayun_list,
+            birth_date, birth_time, gender, all_contents
+        )
         
         # 檢查文件
         if os.path.exists(filename):
@@ -187,6 +249,19 @@ class EnhancedFortuneTeller:
             print("❌ PDF報告生成失敗！")
             return False
     
+    def generate_text_report(self, output_format, style, filename, name, bazi_info, wuxing_analysis,
+                             dayun_list, birth_date, birth_time, gender, all_contents, locale=None):
+        """生成 JSON / Markdown / HTML 報告（不經 ReportLab）"""
+        from report_renderers import write_report
+        
+        with self.instrumentation.stage(f'render_{output_format}'):
+            with open(filename, 'w', encoding='utf-8') as f:
+                write_report(output_format, f, name, bazi_info, wuxing_analysis, dayun_list,
+                             birth_date, birth_time, gender, all_contents, style=style,
+                             locale=locale or self.locale)
+        print(f"✅ {output_format} 報告已生成：{filename}")
+        return True
+    
     def preview_content(self, all_contents):
         """預覽部分內容"""
         print("\n" + "=" * 50)
@@ -211,12 +286,22 @@ class EnhancedFortuneTeller:
             # 獲取用戶輸入
             name, birth_date, birth_time, gender = self.get_user_input()
             
+            # 查詢歷史記錄
+            customer_id = None
+            if self.store is not None:
+                customer_id = self.store.add_customer(name, gender, birth_date, birth_time)
+                previous = self.store.reports_for_customer(customer_id)
+                if previous:
+                    print(f"\n資料庫中已有該命主的 {len(previous)} 份報告，最近一份：{previous[-1]['path']}")
+            
             # 選擇輸出風格
             style = self.choose_style()
             style_name = "現代" if style == 'modern' else "傳統"
             
             # 計算八字
             bazi_info, wuxing_analysis, dayun_list = self.calculate_bazi(birth_date, birth_time, gender)
+            chart_id = self.save_chart(customer_id, birth_date, birth_time, gender,
+                                       bazi_info, wuxing_analysis, dayun_list)
             
             # 顯示基本信息
             self.display_basic_info(name, bazi_info, wuxing_analysis, birth_date, birth_time, gender)
@@ -226,32 +311,32 @@ class EnhancedFortuneTeller:
             confirm = input("請輸入 y/yes/是 確認，或 n/no/否 取消：").strip().lower()
             
             if confirm in ['y', 'yes', '是']:
-                # 生成內容
-                all_contents = self.generate_content(bazi_info, wuxing_analysis, dayun_list, birth_date, gender)
-                
-                # 預覽內容
-                self.preview_content(all_contents)
-                
-                # 生成PDF文件名
-                timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"{style_name}風格_{name}_算命報告_{timestamp}.pdf"
-                
-                # 生成PDF
-                success = self.generate_pdf(
-                    style, filename, name, bazi_info, wuxing_analysis,
-                    dayun_list, birth_date, birth_time, gender, all_contents
-                )
+                with self.instrumentation.request():
+                    # 生成內容
+                    all_contents = self.generate_content(bazi_info, wuxing_analysis, dayun_list, birth_date, gender)
+                    
+                    # 預覽內容
+                    self.preview_content(all_contents)
+                    
+                    # 生成PDF文件名
+                    filename = self.report_filename(style, name)
+                    
+                    # 生成PDF
+                    success = self.generate_pdf(
+                        style, filename, name, bazi_info, wuxing_analysis,
+                        dayun_list, birth_date, birth_time, gender, all_contents
+                    )
                 
                 if success:
+                    if self.store is not None:
+                        self.store.record_report(customer_id, chart_id, style, filename,
+                                                 os.path.getsize(filename))
                     print("\n" + "=" * 50)
                     print("算命報告生成完成！")
                     print("=" * 50)
                     print("報告包含以下章節：")
-                    chapters = [
-                        "1. 命主資料及八字大運",
-                        "2. 人生總論", "3. 事業總論", "4. 財運總論", "5. 姻緣總論",
-                        "6. 健康總論", "7. 六親總論", "8. 五十年大運總論",
-                        "9. 十年流年預測", "10. 簡易催運指南"
+                    chapters = ["1. 命主資料及八字大運"] + [
+                        f"{i}. {title}" for i, (title, _) in enumerate(REPORT_CHAPTERS, start=2)
                     ]
                     for chapter in chapters:
                         print(f"  {chapter}")
@@ -279,11 +364,83 @@ class EnhancedFortuneTeller:
             print(f"\n程式運行出錯：{e}")
             import traceback
             traceback.print_exc()
+        finally:
+            self.export_metrics()
+    
+    def report_filename(self, style, name, output_format='pdf'):
+        """默認報告文件名"""
+        return report_filename(style, name, output_format)
+    
+    def generate_report(self, name, birth_date, birth_time, gender, style='traditional',
+                        filename=None, longitude=None, timezone=None, output_format='pdf', locale=None):
+        """非交互生成一份報告（供任務隊列使用），返回報告文件名，失敗時拋出 RuntimeError
+
+        output_format 為 'pdf' 或 report_renderers.FORMATS 中的文本格式（json、markdown、html）；
+        locale 為輸出語系，默認沿用程式的語系。
+        """
+        customer_id = None
+        if self.store is not None:
+            customer_id = self.store.add_customer(name, gender, birth_date, birth_time, longitude, timezone)
+        
+        with self.instrumentation.request():
+            bazi_info, wuxing_analysis, dayun_list = self.calculate_bazi(
+                birth_date, birth_time, gender, longitude, timezone)
+            chart_id = self.save_chart(customer_id, birth_date, birth_time, gender,
+                                       bazi_info, wuxing_analysis, dayun_list)
+            all_contents = self.generate_content(bazi_info, wuxing_analysis, dayun_list, birth_date, gender,
+                                                 locale)
+            filename = filename or self.report_filename(style, name, output_format)
+            if output_format == 'pdf':
+                success = self.generate_pdf(
+                    style, filename, name, bazi_info, wuxing_analysis,
+                    dayun_list, birth_date, birth_time, gender, all_contents, locale
+                )
+            else:
+                success = self.generate_text_report(
+                    output_format, style, filename, name, bazi_info, wuxing_analysis,
+                    dayun_list, birth_date, birth_time, gender, all_contents, locale
+                )
+        
+        if not success:
+            raise RuntimeError(f"報告生成失敗：{filename}")
+        if self.store is not None:
+            self.store.record_report(customer_id, chart_id, style, filename, os.path.getsize(filename))
+        return filename
+    
+    def save_chart(self, customer_id, birth_date, birth_time, gender, bazi_info, wuxing_analysis, dayun_list):
+        """保存八字盤，返回八字盤 id（未啟用存儲時為 None）
+
+        客戶已有出生資料及四柱相同的八字盤時沿用；經度或時區改變使時柱不同時另存新盤。
+        """
+        if self.store is None:
+            return None
+        if customer_id is not None:
+            chart_id = self.store.find_matching_chart(customer_id, birth_date, birth_time, gender, bazi_info,
+                                                      analysis_method(wuxing_analysis))
+            if chart_id is not None:
+                return chart_id
+        return self.store.save_chart(customer_id, birth_date, birth_time, gender,
+                                     bazi_info, wuxing_analysis, dayun_list)
+    
+    def export_metrics(self):
+        """導出監測數據（設置 ASKBAZI_METRICS_FILE 時寫入 JSON Lines）"""
+        metrics_file = os.environ.get('ASKBAZI_METRICS_FILE')
+        if self.instrumentation.enabled and metrics_file:
+            self.instrumentation.write_json_lines(metrics_file)
+            print(f"監測數據已寫入：{metrics_file}")
 
 def main():
     """主函數"""
-    app = EnhancedFortuneTeller()
-    app.run()
+    # 數據庫文件路徑可由 ASKBAZI_DB 指定，設為空字串則不記錄
+    db_path = os.environ.get('ASKBAZI_DB', DEFAULT_DB)
+    store = ChartStore(db_path) if db_path else None
+    try:
+        # 輸出語系可由 ASKBAZI_LOCALE 指定（zh-Hant / zh-Hans），默認繁體
+        app = EnhancedFortuneTeller(store=store, locale=os.environ.get('ASKBAZI_LOCALE'))
+        app.run()
+    finally:
+        if store is not None:
+            store.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+干支關係表模組
+預先計算地支12×12（六合、沖、刑、害、半合）及天干10×10（五合、沖、克）關係，
+以位元旗標表示，供合婚、刑沖合害等分析查表使用
+"""
+
+from typing import Dict, List, Tuple
+
+# 地支關係旗標
+LIUHE = 1    # 六合
+CHONG = 2    # 六沖
+XING = 4     # 相刑（含自刑）
+HAI = 8      # 六害
+BANHE = 16   # 三合局中的兩支（半合）
+
+BRANCH_RELATION_NAMES = {
+    LIUHE: '六合', CHONG: '相沖', XING: '相刑', HAI: '相害', BANHE: '半合'
+}
+
+# 天干關係旗標
+STEM_HE = 1      # 五合
+STEM_CHONG = 2   # 相沖
+STEM_KE = 4      # 前者克後者
+STEM_KE_BY = 8   # 前者被後者克
+
+STEM_RELATION_NAMES = {
+    STEM_HE: '相合', STEM_CHONG: '相沖', STEM_KE: '相克', STEM_KE_BY: '受克'
+}
+
+# 六合：子丑、寅亥、卯戌、辰酉、巳申、午未
+LIUHE_PAIRS = [(0, 1), (2, 11), (3, 10), (4, 9), (5, 8), (6, 7)]
+
+# 六害：子未、丑午、寅巳、卯辰、申亥、酉戌
+HAI_PAIRS = [(0, 7), (1, 6), (2, 5), (3, 4), (8, 11), (9, 10)]
+
+# 相刑：子卯無禮之刑、寅巳申無恩之刑、丑戌未恃勢之刑
+XING_PAIRS = [(0, 3), (2, 5), (5, 8), (8, 2), (1, 10), (10, 7), (7, 1)]
+
+# 自刑：辰、午、酉、亥
+SELF_XING = [4, 6, 9, 11]
+
+# 三合局：(三支, 所化五行序號 木0 火1 土2 金3 水4)
+SANHE_GROUPS: List[Tuple[Tuple[int, int, int], int]] = [
+    ((8, 0, 4), 4),    # 申子辰 水局
+    ((11, 3, 7), 0),   # 亥卯未 木局
+    ((2, 6, 10), 1),   # 寅午戌 火局
+    ((5, 9, 1), 3)     # 巳酉丑 金局
+]
+
+# 天干五合：甲己、乙庚、丙辛、丁壬、戊癸（所化五行：土、金、水、木、火）
+STEM_HE_ELEMENTS = {0: 2, 1: 3, 2: 4, 3: 0, 4: 1}
+
+
+def _build_branch_relations() -> Tuple[Tuple[int, ...], ...]:
+    """建立地支關係表 BRANCH_RELATIONS[支1][支2] -> 旗標（對稱）"""
+    table = [[0] * 12 for _ in range(12)]
+
+    def mark(a: int, b: int, flag: int):
+        table[a][b] |= flag
+        table[b][a] |= flag
+
+    for a, b in LIUHE_PAIRS:
+        mark(a, b, LIUHE)
+    for a in range(12):
+        mark(a, (a + 6) % 12, CHONG)
+    for a, b in XING_PAIRS:
+        mark(a, b, XING)
+    for a in SELF_XING:
+        mark(a, a, XING)
+    for a, b in HAI_PAIRS:
+        mark(a, b, HAI)
+    for members, _ in SANHE_GROUPS:
+        for a in members:
+            for b in members:
+                if a != b:
+                    mark(a, b, BANHE)
+    return tuple(tuple(row) for row in table)
+
+
+def _build_stem_relations() -> Tuple[Tuple[int, ...], ...]:
+    """建立天干關係表 STEM_RELATIONS[干1][干2] -> 旗標"""
+    table = [[0] * 10 for _ in range(10)]
+    for a in range(10):
+        for b in range(10):
+            flags = 0
+            if (b - a) % 10 == 5:
+                flags |= STEM_HE
+            if (a < 4 and b == a + 6) or (b < 4 and a == b + 6):
+                flags |= STEM_CHONG
+            # 五行相克：木克土、土克水、水克火、火克金、金克木
+            if (b // 2 - a // 2) % 5 == 2:
+                flags |= STEM_KE
+            if (a // 2 - b // 2) % 5 == 2:
+                flags |= STEM_KE_BY
+            table[a][b] = flags
+    return tuple(tuple(row) for row in table)
+
+
+BRANCH_RELATIONS = _build_branch_relations()
+STEM_RELATIONS = _build_stem_relations()
+
+# 地支所屬三合局序號（SANHE_GROUPS 下標）
+BRANCH_SANHE_GROUP = tuple(
+    next(i for i, (members, _) in enumerate(SANHE_GROUPS) if zhi in members)
+    for zhi in range(12)
+)
+
+
+def relation_names(flags: int, names: Dict[int, str] = BRANCH_RELATION_NAMES) -> List[str]:
+    """將關係旗標轉為名稱列表"""
+    return [name for flag, name in names.items() if flags & flag]
+
+
+def score_table(table: Tuple[Tuple[int, ...], ...], weights: Dict[int, float]) -> Tuple[Tuple[float, ...], ...]:
+    """按旗標權重把關係表轉為分數表"""
+    return tuple(
+        tuple(sum(w for flag, w in weights.items() if flags & flag) for flags in row)
+        for row in table
+    )
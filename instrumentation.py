@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流程監測模組
+為八字計算、內容生成、PDF生成各階段提供計時、計數及採樣剖析，
+並支持導出為 JSON Lines 或 Prometheus 文本格式
+"""
+
+import json
+import os
+import time
+from typing import Dict, List
+
+
+class _NullStage:
+    """停用時使用的空計時器，不做任何事"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """階段計時器"""
+
+    __slots__ = ('stats', 'name', 'start')
+
+    def __init__(self, stats: Dict, name: str):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        record = self.stats.get(self.name)
+        if record is None:
+            self.stats[self.name] = [1, elapsed, elapsed, elapsed]
+        else:
+            record[0] += 1
+            record[1] += elapsed
+            if elapsed < record[2]:
+                record[2] = elapsed
+            if elapsed > record[3]:
+                record[3] = elapsed
+        return False
+
+
+class _Request:
+    """單次請求範圍，按需開啟 cProfile / tracemalloc 採樣"""
+
+    def __init__(self, owner: 'PipelineInstrumentation', request_num: int,
+                 profile: bool, trace_memory: bool):
+        # 剖析模組只在採樣時導入，不影響啟動時間
+        import cProfile
+        self.owner = owner
+        self.request_num = request_num
+        self.profiler = cProfile.Profile() if profile else None
+        self.trace_memory = trace_memory
+        self.started_tracing = False
+
+    def __enter__(self):
+        import tracemalloc
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        if self.profiler is not None:
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        import io
+        import pstats
+        import tracemalloc
+        record = {'request': self.request_num}
+        if self.profiler is not None:
+            self.profiler.disable()
+            stream = io.StringIO()
+            stats = pstats.Stats(self.profiler, stream=stream)
+            stats.sort_stats('cumulative').print_stats(self.owner.profile_top)
+            record['cprofile'] = stream.getvalue()
+        if self.trace_memory and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            record['memory_current_bytes'] = current
+            record['memory_peak_bytes'] = peak
+            record['memory_top'] = [
+                str(stat) for stat in snapshot.statistics('lineno')[:self.owner.profile_top]
+            ]
+            if self.started_tracing:
+                tracemalloc.stop()
+        self.owner.profiles.append(record)
+        return False
+
+
+class PipelineInstrumentation:
+    """流程監測器
+
+    enabled 為 False 時 stage() 返回共享的空計時器、count() 直接返回，
+    開銷只有一次屬性判斷。profile_every / trace_memory_every 為 N 時，
+    每 N 個請求對其中一個開啟 cProfile / tracemalloc 採樣。
+    """
+
+    def __init__(self, enabled: bool = False, profile_every: int = 0,
+                 trace_memory_every: int = 0, profile_top: int = 20,
+                 namespace: str = 'askbazi'):
+        """初始化監測器"""
+        self.enabled = enabled
+        self.profile_every = profile_every
+        self.trace_memory_every = trace_memory_every
+        self.profile_top = profile_top
+        self.namespace = namespace
+        self.reset()
+
+    @classmethod
+    def from_env(cls) -> 'PipelineInstrumentation':
+        """根據環境變量創建監測器
+
+        ASKBAZI_METRICS=1 開啟計時及計數；
+        ASKBAZI_PROFILE_EVERY=N 每 N 個請求採樣一次 cProfile；
+        ASKBAZI_TRACEMALLOC_EVERY=N 每 N 個請求採樣一次 tracemalloc。
+        """
+        return cls(
+            enabled=os.environ.get('ASKBAZI_METRICS', '') not in ('', '0'),
+            profile_every=int(os.environ.get('ASKBAZI_PROFILE_EVERY', '0') or 0),
+            trace_memory_every=int(os.environ.get('ASKBAZI_TRACEMALLOC_EVERY', '0') or 0)
+        )
+
+    def reset(self):
+        """清空已收集的數據"""
+        # 階段統計：名稱 -> [次數, 總耗時, 最短, 最長]
+        self.stages: Dict[str, List[float]] = {}
+        self.counters: Dict[str, float] = {}
+        self.profiles: List[Dict] = []
+        self.request_count = 0
+
+    def stage(self, name: str):
+        """返回階段計時器，用於 with 語句"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self.stages, name)
+
+    def count(self, name: str, value: float = 1):
+        """累加計數器"""
+        if not self.enabled:
+            return
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def request(self):
+        """返回單次請求範圍，按採樣間隔開啟剖析"""
+        if not self.enabled:
+            return _NULL_STAGE
+        self.request_count += 1
+        n = self.request_count
+        profile = bool(self.profile_every) and n % self.profile_every == 0
+        trace_memory = bool(self.trace_memory_every) and n % self.trace_memory_every == 0
+        self.counters['requests'] = self.counters.get('requests', 0) + 1
+        if not (profile or trace_memory):
+            return _NULL_STAGE
+        return _Request(self, n, profile, trace_memory)
+
+    def snapshot(self) -> Dict:
+        """獲取當前統計快照"""
+        stages = {}
+        for name, (calls, total, shortest, longest) in self.stages.items():
+            stages[name] = {
+                'calls': calls,
+                'total_seconds': total,
+                'mean_seconds': total / calls,
+                'min_seconds': shortest,
+                'max_seconds': longest
+            }
+        return {
+            'stages': stages,
+            'counters': dict(self.counters),
+            'profiles': list(self.profiles)
+        }
+
+    def to_json_lines(self) -> str:
+        """導出為 JSON Lines，每個階段、計數器及剖析結果各一行"""
+        timestamp = time.time()
+        snapshot = self.snapshot()
+        lines = []
+        for name, record in snapshot['stages'].items():
+            lines.append(json.dumps(
+                {'type': 'stage', 'name': name, 'timestamp': timestamp, **record},
+                ensure_ascii=False))
+        for name, value in snapshot['counters'].items():
+            lines.append(json.dumps(
+                {'type': 'counter', 'name': name, 'timestamp': timestamp, 'value': value},
+                ensure_ascii=False))
+        for record in snapshot['profiles']:
+            lines.append(json.dumps(
+                {'type': 'profile', 'timestamp': timestamp, **record},
+                ensure_ascii=False))
+        return ''.join(line + '\n' for line in lines)
+
+    def write_json_lines(self, path: str):
+        """將 JSON Lines 追加寫入文件"""
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(self.to_json_lines())
+
+    def to_prometheus(self) -> str:
+        """導出為 Prometheus 文本格式"""
+        ns = self.namespace
+        lines = [
+            f"# HELP {ns}_stage_seconds_total Total time spent in each pipeline stage.",
+            f"# TYPE {ns}_stage_seconds_total counter"
+        ]
+        for name, record in self.stages.items():
+            lines.append(f'{ns}_stage_seconds_total{{stage="{_escape_label(name)}"}} {record[1]!r}')
+        lines.append(f"# HELP {ns}_stage_calls_total Number of times each pipeline stage ran.")
+        lines.append(f"# TYPE {ns}_stage_calls_total counter")
+        for name, record in self.stages.items():
+            lines.append(f'{ns}_stage_calls_total{{stage="{_escape_label(name)}"}} {record[0]}')
+        lines.append(f"# HELP {ns}_stage_max_seconds Longest single run of each pipeline stage.")
+        lines.append(f"# TYPE {ns}_stage_max_seconds gauge")
+        for name, record in self.stages.items():
+            lines.append(f'{ns}_stage_max_seconds{{stage="{_escape_label(name)}"}} {record[3]!r}')
+        for name, value in self.counters.items():
+            metric = f"{ns}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+def _escape_label(value: str) -> str:
+    """轉義 Prometheus 標籤值"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# 全局默認監測器，未開啟時幾乎沒有開銷
+default_instrumentation = PipelineInstrumentation.from_env()
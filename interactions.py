@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+歲運刑沖合害模組
+以 12×12 地支及 10×10 天干關係表，一次性計算大運、流年與原局四柱之間的
+合、沖、刑、害及三合成局，供大運、流年章節使用
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Sequence
+from ganzhi_relations import (BRANCH_RELATIONS, STEM_RELATIONS, LIUHE, CHONG, XING, HAI, BANHE,
+                              STEM_HE, STEM_CHONG, SANHE_GROUPS, score_table)
+from shishen import chart_codes
+
+# 原局各柱所主之事
+PILLAR_DOMAINS = ('祖上長輩', '事業父母', '自身婚姻', '子女晚輩')
+PILLAR_NAMES = ('年柱', '月柱', '日柱', '時柱')
+
+# 各柱權重：日柱為自身及夫妻宮，影響最大
+PILLAR_WEIGHTS = (0.8, 1.0, 1.5, 0.7)
+
+# 關係分數
+BRANCH_SCORES = score_table(BRANCH_RELATIONS, {
+    LIUHE: 3.0, BANHE: 2.0, CHONG: -4.0, XING: -2.0, HAI: -1.0
+})
+STEM_SCORES = score_table(STEM_RELATIONS, {STEM_HE: 2.0, STEM_CHONG: -2.0})
+
+# 歲運與原局會成三合局的加分
+SANHE_SCORE = 3.0
+
+# 三合局地支掩碼及所化五行
+SANHE_MASKS = tuple(sum(1 << zhi for zhi in members) for members, _ in SANHE_GROUPS)
+SANHE_ELEMENTS = tuple(element for _, element in SANHE_GROUPS)
+
+# 只取對人事有明顯影響的天干關係
+STEM_FLAGS = STEM_HE | STEM_CHONG
+
+
+@lru_cache(maxsize=None)
+def _numpy_tables():
+    """NumPy 版關係表及分數表"""
+    import numpy as np
+
+    return (np.asarray(BRANCH_RELATIONS, dtype=np.uint8), np.asarray(STEM_RELATIONS, dtype=np.uint8),
+            np.asarray(BRANCH_SCORES), np.asarray(STEM_SCORES), np.asarray(PILLAR_WEIGHTS),
+            np.asarray(SANHE_MASKS, dtype=np.int64))
+
+
+def luck_interactions(natal_stems: Sequence[int], natal_branches: Sequence[int],
+                      dayun_stems: Sequence[int], dayun_branches: Sequence[int],
+                      year_stems: Sequence[int], year_branches: Sequence[int]) -> Dict:
+    """一次計算 D 步大運 × Y 個流年 × 原局四柱的全部關係
+
+    返回的數組（旗標取自 ganzhi_relations）：
+        dayun_branch / dayun_stem   (D, 4) 大運與原局各柱
+        year_branch / year_stem     (Y, 4) 流年與原局各柱
+        cross_branch / cross_stem   (D, Y) 流年與大運
+        sanhe                       (D, Y) 原局加歲運新會成的三合局（SANHE_GROUPS 下標位）
+        dayun_score                 (D,)   大運與原局的加權分
+        year_score                  (Y,)   流年與原局的加權分（未起運時即為綜合分）
+        score                       (D, Y) 流年在各大運中的綜合分
+    """
+    import numpy as np
+
+    branch_rel, stem_rel, branch_score, stem_score, weights, sanhe_masks = _numpy_tables()
+    ns = np.asarray(natal_stems, dtype=np.intp)
+    nb = np.asarray(natal_branches, dtype=np.intp)
+    ds = np.asarray(dayun_stems, dtype=np.intp)
+    db = np.asarray(dayun_branches, dtype=np.intp)
+    ys = np.asarray(year_stems, dtype=np.intp)
+    yb = np.asarray(year_branches, dtype=np.intp)
+
+    dayun_branch = branch_rel[db[:, None], nb]
+    dayun_stem = stem_rel[ds[:, None], ns] & STEM_FLAGS
+    year_branch = branch_rel[yb[:, None], nb]
+    year_stem = stem_rel[ys[:, None], ns] & STEM_FLAGS
+    cross_branch = branch_rel[db[:, None], yb]
+    cross_stem = stem_rel[ds[:, None], ys] & STEM_FLAGS
+
+    # 三合：原局已成的局不計，只計因歲運加入而湊齊者
+    natal_mask = int(np.bitwise_or.reduce(np.left_shift(1, nb)))
+    combined = natal_mask | (1 << db)[:, None] | (1 << yb)[None, :]
+    complete = (combined[:, :, None] & sanhe_masks) == sanhe_masks
+    complete &= (natal_mask & sanhe_masks) != sanhe_masks
+    sanhe = (complete * (1 << np.arange(len(sanhe_masks)))).sum(axis=2)
+
+    dayun_score = ((branch_score[db[:, None], nb] + stem_score[ds[:, None], ns]) * weights).sum(axis=1)
+    year_score = ((branch_score[yb[:, None], nb] + stem_score[ys[:, None], ns]) * weights).sum(axis=1)
+    score = (year_score[None, :] + branch_score[db[:, None], yb] + stem_score[ds[:, None], ys]
+             + SANHE_SCORE * complete.sum(axis=2))
+
+    return {
+        'dayun_branch': dayun_branch, 'dayun_stem': dayun_stem,
+        'year_branch': year_branch, 'year_stem': year_stem,
+        'cross_branch': cross_branch, 'cross_stem': cross_stem,
+        'sanhe': sanhe, 'dayun_score': dayun_score, 'year_score': year_score, 'score': score
+    }
+
+
+def year_codes(years: Sequence[int]):
+    """公曆年 -> 流年干支序號 (天干, 地支)，與 ContentGenerator._get_year_ganzhi 一致"""
+    return [(year - 4) % 10 for year in years], [(year - 4) % 12 for year in years]
+
+
+def chart_luck_interactions(bazi_info: Dict, dayun_list: List[Dict], years: Sequence[int]) -> Dict:
+    """按八字、大運列表及年份計算歲運關係"""
+    from bazi_calculator import BaziCalculator
+
+    stems, branches = chart_codes(bazi_info)
+    dayun_stems = [BaziCalculator.TIANGAN.index(d['gan']) for d in dayun_list]
+    dayun_branches = [BaziCalculator.DIZHI.index(d['zhi']) for d in dayun_list]
+    y_stems, y_branches = year_codes(years)
+    return luck_interactions(stems, branches, dayun_stems, dayun_branches, y_stems, y_branches)
+
+
+def dayun_index(dayun_list: List[Dict], age: int) -> int:
+    """某虛歲所行大運的下標，未起運時為 -1"""
+    for i, dayun in enumerate(dayun_list):
+        if dayun['start_age'] <= age <= dayun['end_age']:
+            return i
+    return -1
@@ -0,0 +1,507 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+報告任務隊列模組
+以本地 SQLite 文件保存待生成的報告請求，不依賴外部消息服務：
+    - 工作進程租用任務，處理期間定時續租，進程崩潰後租約到期即由其他進程接手
+    - 失敗按指數退避重試，超過次數後標記為 dead
+    - 按通道區分優先級，交互請求（interactive）優先於批量重繪（bulk）
+    - stats() 給出各狀態數量、排隊延遲及吞吐量
+"""
+
+import argparse
+import datetime
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+from chart_store import DEFAULT_DB
+from zh_convert import normalize_locale
+
+DEFAULT_QUEUE_DB = 'askbazi_jobs.db'
+
+# 通道 -> 優先級，數值小者先處理
+LANES = {'interactive': 0, 'bulk': 10}
+
+# 報告格式（文本格式見 report_renderers.FORMATS）
+REPORT_FORMATS = ('pdf', 'json', 'markdown', 'html')
+
+# 重試：第 n 次失敗後等待 RETRY_BASE * 2^(n-1) 秒，最多 RETRY_MAX 秒
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_BASE = 5.0
+RETRY_MAX = 300.0
+
+# 租約及續租間隔（秒）
+DEFAULT_LEASE = 60.0
+DEFAULT_HEARTBEAT = 20.0
+
+# 吞吐量統計窗口（秒）
+THROUGHPUT_WINDOW = 300.0
+
+# available_at 表示任務下次可被租用的時間：
+# queued 為入隊或退避結束時間，leased 為租約到期時間
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    lane TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    leased_by TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    last_error TEXT,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(status, priority, available_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs(finished_at);
+"""
+
+STATUSES = ('queued', 'leased', 'done', 'dead')
+
+
+def retry_delay(attempts: int) -> float:
+    """第 attempts 次失敗後的退避時間（秒）"""
+    return min(RETRY_BASE * 2 ** (attempts - 1), RETRY_MAX)
+
+
+class JobQueue:
+    """報告任務隊列"""
+
+    def __init__(self, path: str = DEFAULT_QUEUE_DB, clock: Callable[[], float] = time.time):
+        """打開（或創建）隊列文件，clock 為時間來源（秒）"""
+        self.path = path
+        self.clock = clock
+        # 手動管理事務，以便租用時使用 BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self) -> 'JobQueue':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # 入隊
+
+    def enqueue(self, payload: Dict, lane: str = 'bulk', max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                delay: float = 0) -> int:
+        """加入一個任務，返回任務 id"""
+        return self.enqueue_many([payload], lane, max_attempts, delay)[0]
+
+    def enqueue_many(self, payloads: Iterable[Dict], lane: str = 'bulk',
+                     max_attempts: int = DEFAULT_MAX_ATTEMPTS, delay: float = 0) -> List[int]:
+        """在同一事務內加入多個任務，返回任務 id 列表"""
+        if lane not in LANES:
+            raise ValueError(f"未知的任務通道：{lane}")
+        now = self.clock()
+        rows = [(lane, LANES[lane], json.dumps(payload, ensure_ascii=False), max_attempts, now + delay, now)
+                for payload in payloads]
+        if not rows:
+            return []
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            start = self.conn.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM jobs').fetchone()[0]
+            ids = list(range(start, start + len(rows)))
+            self.conn.executemany(
+                'INSERT INTO jobs (id, lane, priority, payload, max_attempts, available_at, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(job_id,) + row for job_id, row in zip(ids, rows)])
+            self.conn.execute('COMMIT')
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        return ids
+
+    # 工作進程
+
+    def lease(self, worker_id: str, lease_seconds: float = DEFAULT_LEASE) -> Optional[Dict]:
+        """租用優先級最高的可執行任務，無任務時返回 None
+
+        租約已過期的任務（工作進程崩潰或失聯）一併參與租用；
+        已用完重試次數者改為 dead。
+        """
+        now = self.clock()
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'dead', finished_at = ?, leased_by = NULL, "
+                "last_error = COALESCE(last_error, '租約過期') "
+                "WHERE status = 'leased' AND available_at <= ? AND attempts >= max_attempts",
+                (now, now))
+            row = self.conn.execute(
+                "SELECT * FROM jobs WHERE status IN ('queued', 'leased') AND available_at <= ? "
+                "ORDER BY priority, id LIMIT 1", (now,)).fetchone()
+            if row is None:
+                self.conn.execute('COMMIT')
+                return None
+            self.conn.execute(
+                "UPDATE jobs SET status = 'leased', leased_by = ?, available_at = ?, "
+                "attempts = attempts + 1, started_at = COALESCE(started_at, ?) WHERE id = ?",
+                (worker_id, now + lease_seconds, now, row['id']))
+            self.conn.execute('COMMIT')
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['attempts'] += 1
+        job['started_at'] = job['started_at'] or now
+        job['status'] = 'leased'
+        job['leased_by'] = worker_id
+        return job
+
+    def heartbeat(self, job_id: int, worker_id: str, lease_seconds: float = DEFAULT_LEASE) -> bool:
+        """續租，租約已被他人接手時返回 False"""
+        cursor = self.conn.execute(
+            "UPDATE jobs SET available_at = ? WHERE id = ? AND status = 'leased' AND leased_by = ?",
+            (self.clock() + lease_seconds, job_id, worker_id))
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker_id: str, result: Dict = None) -> bool:
+        """標記任務完成"""
+        cursor = self.conn.execute(
+            "UPDATE jobs SET status = 'done', finished_at = ?, leased_by = NULL, result = ? "
+            "WHERE id = ? AND status = 'leased' AND leased_by = ?",
+            (self.clock(), json.dumps(result, ensure_ascii=False), job_id, worker_id))
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> Optional[str]:
+        """記錄失敗：未用完次數時退避後重新排隊，否則標記為 dead
+
+        返回任務的新狀態，租約已失效時返回 None。
+        """
+        now = self.clock()
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = self.conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND status = 'leased' AND leased_by = ?",
+                (job_id, worker_id)).fetchone()
+            if row is None:
+                self.conn.execute('COMMIT')
+                return None
+            if row['attempts'] >= row['max_attempts']:
+                status = 'dead'
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'dead', finished_at = ?, leased_by = NULL, last_error = ? "
+                    "WHERE id = ?", (now, error, job_id))
+            else:
+                status = 'queued'
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'queued', available_at = ?, leased_by = NULL, last_error = ? "
+                    "WHERE id = ?", (now + retry_delay(row['attempts']), error, job_id))
+            self.conn.execute('COMMIT')
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        return status
+
+    def requeue_dead(self, lane: str = None) -> int:
+        """把 dead 任務重新排隊（重置次數），返回數量"""
+        sql = ("UPDATE jobs SET status = 'queued', attempts = 0, available_at = ?, finished_at = NULL "
+               "WHERE status = 'dead'")
+        params = [self.clock()]
+        if lane is not None:
+            sql += ' AND lane = ?'
+            params.append(lane)
+        return self.conn.execute(sql, params).rowcount
+
+    # 查詢
+
+    def get(self, job_id: int) -> Optional[Dict]:
+        """按 id 讀取任務"""
+        row = self.conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def stats(self, window: float = THROUGHPUT_WINDOW) -> Dict:
+        """隊列統計
+
+        counts          {通道: {狀態: 數量}}
+        backlog         可立即執行的排隊任務數（按通道）
+        oldest_wait     最早一個等待中任務已等待的秒數（按通道）
+        latency_mean / latency_p95   最近窗口內開始處理的任務，入隊到首次租用的秒數（按通道）
+        throughput      最近窗口內每秒完成的任務數
+        """
+        now = self.clock()
+        counts = {lane: dict.fromkeys(STATUSES, 0) for lane in LANES}
+        for row in self.conn.execute('SELECT lane, status, COUNT(*) AS n FROM jobs GROUP BY lane, status'):
+            counts.setdefault(row['lane'], dict.fromkeys(STATUSES, 0))[row['status']] = row['n']
+
+        backlog, oldest_wait, latency_mean, latency_p95 = {}, {}, {}, {}
+        for lane in counts:
+            row = self.conn.execute(
+                "SELECT COUNT(*) AS n, MIN(created_at) AS oldest FROM jobs "
+                "WHERE lane = ? AND status = 'queued' AND available_at <= ?", (lane, now)).fetchone()
+            backlog[lane] = row['n']
+            oldest_wait[lane] = now - row['oldest'] if row['oldest'] is not None else 0.0
+            waits = sorted(r[0] for r in self.conn.execute(
+                'SELECT started_at - created_at FROM jobs WHERE lane = ? AND started_at >= ?',
+                (lane, now - window)))
+            latency_mean[lane] = sum(waits) / len(waits) if waits else 0.0
+            latency_p95[lane] = waits[min(len(waits) - 1, int(0.95 * len(waits)))] if waits else 0.0
+
+        finished = self.conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = 'done' AND finished_at >= ?", (now - window,)).fetchone()[0]
+        return {
+            'counts': counts,
+            'backlog': backlog,
+            'oldest_wait': oldest_wait,
+            'latency_mean': latency_mean,
+            'latency_p95': latency_p95,
+            'throughput': finished / window
+        }
+
+    def to_prometheus(self, namespace: str = 'askbazi') -> str:
+        """把 stats() 導出為 Prometheus 文本格式"""
+        stats = self.stats()
+        ns = namespace
+        lines = [f"# TYPE {ns}_jobs gauge"]
+        for lane, counts in stats['counts'].items():
+            for status, value in counts.items():
+                lines.append(f'{ns}_jobs{{lane="{lane}",status="{status}"}} {value}')
+        for key in ('backlog', 'oldest_wait', 'latency_mean', 'latency_p95'):
+            metric = f"{ns}_queue_{key}" + ('' if key == 'backlog' else '_seconds')
+            lines.append(f"# TYPE {metric} gauge")
+            for lane, value in stats[key].items():
+                lines.append(f'{metric}{{lane="{lane}"}} {value!r}')
+        lines.append(f"# TYPE {ns}_queue_throughput gauge")
+        lines.append(f"{ns}_queue_throughput {stats['throughput']!r}")
+        return '\n'.join(lines) + '\n'
+
+
+def _report_payload(payload: Dict) -> Dict:
+    """任務內容 -> EnhancedFortuneTeller.generate_report 的參數"""
+    return {
+        'name': payload['name'],
+        'birth_date': datetime.date.fromisoformat(payload['birth_date']),
+        'birth_time': datetime.time.fromisoformat(payload['birth_time']),
+        'gender': payload['gender'],
+        'style': payload.get('style', 'traditional'),
+        'filename': payload.get('filename'),
+        'longitude': payload.get('longitude'),
+        'timezone': payload.get('timezone'),
+        'output_format': payload.get('format', 'pdf'),
+        'locale': payload.get('locale')
+    }
+
+
+def report_payload(name: str, birth_date: datetime.date, birth_time: datetime.time, gender: str,
+                   style: str = 'traditional', filename: str = None,
+                   longitude: float = None, timezone: str = None, output_format: str = 'pdf',
+                   locale: str = None) -> Dict:
+    """構造報告任務內容（可 JSON 序列化）"""
+    payload = {'name': name, 'birth_date': birth_date.isoformat(),
+               'birth_time': f"{birth_time.hour:02d}:{birth_time.minute:02d}",
+               'gender': gender, 'style': style}
+    if output_format != 'pdf':
+        payload['format'] = output_format
+    for key, value in (('filename', filename), ('longitude', longitude), ('timezone', timezone),
+                       ('locale', locale)):
+        if value is not None:
+            payload[key] = value
+    return payload
+
+
+class ReportWorker:
+    """報告工作進程
+
+    循環租用任務並生成報告；處理期間由後台線程按 heartbeat_interval 續租。
+    handler 接受任務內容並返回結果字典，省略時以 EnhancedFortuneTeller 生成 PDF。
+    """
+
+    def __init__(self, queue_path: str = DEFAULT_QUEUE_DB, handler: Callable[[Dict], Dict] = None,
+                 worker_id: str = None, lease_seconds: float = DEFAULT_LEASE,
+                 heartbeat_interval: float = DEFAULT_HEARTBEAT, poll_interval: float = 1.0,
+                 instrumentation=None):
+        from instrumentation import default_instrumentation
+
+        self.queue_path = queue_path
+        self.queue = JobQueue(queue_path)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+        self.instrumentation = instrumentation or default_instrumentation
+        self.handler = handler or self._render_report
+        self._teller = None
+
+    def _render_report(self, payload: Dict) -> Dict:
+        """默認處理：生成報告文件（默認為 PDF）"""
+        if self._teller is None:
+            from fortune_teller import EnhancedFortuneTeller
+            from chart_store import ChartStore
+
+            db_path = os.environ.get('ASKBAZI_DB', DEFAULT_DB)
+            store = ChartStore(db_path) if db_path else None
+            self._teller = EnhancedFortuneTeller(instrumentation=self.instrumentation, store=store)
+        filename = self._teller.generate_report(**_report_payload(payload))
+        return {'path': filename, 'size_bytes': os.path.getsize(filename)}
+
+    def _heartbeat_loop(self, job_id: int, stop: threading.Event):
+        """後台續租（SQLite 連接不跨線程，單獨打開）"""
+        with JobQueue(self.queue_path, self.queue.clock) as queue:
+            while not stop.wait(self.heartbeat_interval):
+                if not queue.heartbeat(job_id, self.worker_id, self.lease_seconds):
+                    return
+
+    def process(self, job: Dict) -> bool:
+        """處理一個已租用的任務，成功返回 True"""
+        stop = threading.Event()
+        beat = threading.Thread(target=self._heartbeat_loop, args=(job['id'], stop), daemon=True)
+        beat.start()
+        stage = self.instrumentation.stage
+        count = self.instrumentation.count
+        count(f"queue_wait_seconds_{job['lane']}", job['started_at'] - job['created_at'])
+        try:
+            with stage(f"job_{job['lane']}"):
+                result = self.handler(job['payload'])
+        except Exception as e:
+            stop.set()
+            beat.join()
+            status = self.queue.fail(job['id'], self.worker_id, f"{type(e).__name__}: {e}")
+            count('jobs_failed')
+            if status == 'dead':
+                count('jobs_dead')
+            print(f"任務 {job['id']} 第 {job['attempts']} 次執行失敗：{e}")
+            return False
+        stop.set()
+        beat.join()
+        self.queue.complete(job['id'], self.worker_id, result)
+        count('jobs_completed')
+        return True
+
+    def run(self, max_jobs: int = None, stop_when_empty: bool = False) -> int:
+        """運行工作循環，返回處理的任務數"""
+        processed = 0
+        while max_jobs is None or processed < max_jobs:
+            job = self.queue.lease(self.worker_id, self.lease_seconds)
+            if job is None:
+                if stop_when_empty:
+                    break
+                time.sleep(self.poll_interval)
+                continue
+            self.process(job)
+            processed += 1
+        return processed
+
+    def close(self):
+        self.queue.close()
+
+
+def _worker_main(queue_path: str, stop_when_empty: bool):
+    """子進程入口"""
+    worker = ReportWorker(queue_path)
+    try:
+        worker.run(stop_when_empty=stop_when_empty)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.close()
+
+
+def _enqueue_store(queue: JobQueue, store_path: str, style: str) -> int:
+    """把八字存儲中的全部客戶加入批量重繪
+
+    同名客戶很常見，文件名附上客戶 id，避免同一秒內生成的同名報告互相覆蓋。
+    """
+    from chart_store import ChartStore
+    from fortune_teller import report_filename
+
+    genders = {0: '男', 1: '女'}
+    payloads = []
+    with ChartStore(store_path) as store:
+        for customer in store.find_customers():
+            birth = datetime.datetime.strptime(customer['birth_datetime'], '%Y-%m-%d %H:%M')
+            filename = report_filename(style, customer['name'], key=customer['id'])
+            payloads.append(report_payload(customer['name'], birth.date(), birth.time(),
+                                           genders[customer['gender']], style, filename,
+                                           longitude=customer['longitude'], timezone=customer['timezone']))
+    return len(queue.enqueue_many(payloads, 'bulk'))
+
+
+def main(argv=None) -> int:
+    """主函數"""
+    parser = argparse.ArgumentParser(description="八字報告任務隊列")
+    parser.add_argument('--db', default=os.environ.get('ASKBAZI_QUEUE_DB', DEFAULT_QUEUE_DB),
+                        help="隊列數據庫文件路徑")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    enqueue = commands.add_parser('enqueue', help="加入一個報告任務")
+    enqueue.add_argument('--name', required=True, help="姓名")
+    enqueue.add_argument('--date', required=True, help="出生日期 YYYY-MM-DD")
+    enqueue.add_argument('--time', required=True, help="出生時間 HH:MM")
+    enqueue.add_argument('--gender', required=True, choices=('男', '女'), help="性別")
+    enqueue.add_argument('--style', default='traditional', choices=('traditional', 'modern'), help="報告風格")
+    enqueue.add_argument('--format', default='pdf', choices=REPORT_FORMATS, help="報告格式")
+    enqueue.add_argument('--locale', type=normalize_locale, help="輸出語系：zh-Hant（繁體，默認）或 zh-Hans（簡體）")
+    enqueue.add_argument('--lane', default='interactive', choices=tuple(LANES), help="任務通道")
+
+    rerender = commands.add_parser('rerender', help="把八字存儲中的全部客戶加入批量重繪")
+    rerender.add_argument('--store', default=os.environ.get('ASKBAZI_DB', DEFAULT_DB), help="八字存儲文件")
+    rerender.add_argument('--style', default='traditional', choices=('traditional', 'modern'), help="報告風格")
+
+    worker = commands.add_parser('worker', help="運行工作進程")
+    worker.add_argument('--processes', type=int, default=1, help="工作進程數")
+    worker.add_argument('--drain', action='store_true', help="隊列清空後退出")
+
+    stats = commands.add_parser('stats', help="顯示隊列統計")
+    stats.add_argument('--prometheus', action='store_true', help="以 Prometheus 文本格式輸出")
+
+    commands.add_parser('requeue-dead', help="重新排隊全部 dead 任務")
+    args = parser.parse_args(argv)
+
+    if args.command == 'worker':
+        if args.processes <= 1:
+            _worker_main(args.db, args.drain)
+            return 0
+        import multiprocessing
+
+        processes = [multiprocessing.Process(target=_worker_main, args=(args.db, args.drain))
+                     for _ in range(args.processes)]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.join()
+        return 0
+
+    with JobQueue(args.db) as queue:
+        if args.command == 'enqueue':
+            payload = report_payload(args.name, datetime.date.fromisoformat(args.date),
+                                     datetime.time.fromisoformat(args.time), args.gender, args.style,
+                                     output_format=args.format, locale=args.locale)
+            print(f"已加入任務 {queue.enqueue(payload, args.lane)}（{args.lane}）")
+        elif args.command == 'rerender':
+            print(f"已加入 {_enqueue_store(queue, args.store, args.style)} 個批量重繪任務")
+        elif args.command == 'requeue-dead':
+            print(f"已重新排隊 {queue.requeue_dead()} 個任務")
+        elif args.prometheus:
+            print(queue.to_prometheus(), end='')
+        else:
+            print(json.dumps(queue.stats(), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
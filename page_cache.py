@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+頁面內容流緩存模組
+以章節內容雜湊為鍵，保存已排版頁面的PDF繪圖指令，供增量重繪使用；
+頁面外殼（背景、邊框、靜態標題）以同樣的內容流定義為 Form XObject，
+每份文檔只定義一次，各頁引用
+"""
+
+import hashlib
+import json
+import os
+from typing import Callable, Dict, List, Optional
+
+
+class PageStreamCache:
+    """已排版頁面內容流緩存
+
+    每個條目記錄一段頁面繪圖指令（ReportLab canvas 的內容流片段）及其
+    使用的字體，重繪時直接回放，無需再次逐字排版。指定 cache_dir 時
+    條目同時寫入磁碟，可跨報告、跨進程重用。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """初始化緩存"""
+        self.cache_dir = cache_dir
+        self._entries: Dict[str, Dict] = {}
+        self.hits = 0
+        self.misses = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """根據排版參數及章節內容計算緩存鍵"""
+        payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        """獲取條目文件路徑"""
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """讀取緩存條目，未命中時返回None"""
+        entry = self._entries.get(key)
+        if entry is None and self.cache_dir:
+            path = self._entry_path(key)
+            if os.path.exists(path):
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        entry = json.load(f)
+                    self._entries[key] = entry
+                except (OSError, ValueError):
+                    entry = None
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, key: str, fonts: Dict[str, str], ops: List[str], extgstate: List[List] = None):
+        """寫入緩存條目
+
+        extgstate 為片段內 gs 指令引用的圖形狀態 [[鍵, 值, 名稱], ...]，
+        僅 Form XObject 片段（名稱在表單內從頭編號）可安全回放。
+        """
+        entry = {'fonts': fonts, 'ops': ops}
+        if extgstate:
+            entry['extgstate'] = extgstate
+        self._entries[key] = entry
+        if self.cache_dir:
+            # 先寫臨時文件再替換，避免並行進程讀到半寫入的條目
+            path = self._entry_path(key)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+
+    def stats(self) -> Dict:
+        """獲取命中統計"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self._entries)
+        }
+
+    def clear(self):
+        """清空內存中的條目及統計（磁碟條目保留）"""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def _replay_ops(canvas, entry: Dict) -> List[str]:
+    """取出條目的繪圖指令，字體先在當前文檔中註冊，並按需改寫內部字體名"""
+    ops = entry['ops']
+    for font_name, cached_name in entry['fonts'].items():
+        internal_name = canvas._doc.getInternalFontName(font_name)
+        if internal_name != cached_name:
+            ops = [op.replace(f"{cached_name} ", f"{internal_name} ") for op in ops]
+    return ops
+
+
+def draw_cached(canvas, cache: Optional[PageStreamCache], key: str,
+                fonts: List[str], draw: Callable):
+    """繪製一段頁面內容，命中緩存時直接回放內容流
+
+    draw 為實際繪製函數，僅在未命中時調用。繪製片段包在 q/Q 之間，
+    回放後圖形狀態與繪製前一致。fonts 為該片段使用的字體，回放前
+    先在當前文檔中註冊，並按需改寫內部字體名。
+    """
+    if cache is None:
+        canvas.saveState()
+        draw(canvas)
+        canvas.restoreState()
+        return
+
+    entry = cache.get(key)
+    if entry is not None:
+        canvas._code.extend(_replay_ops(canvas, entry))
+        return
+
+    start = len(canvas._code)
+    canvas.saveState()
+    draw(canvas)
+    canvas.restoreState()
+    ops = canvas._code[start:]
+    # 含圖形狀態字典（透明度等）的片段依賴頁面資源，不宜跨文檔回放
+    if not any(op.endswith(' gs') for op in ops):
+        font_names = {name: canvas._doc.getInternalFontName(name) for name in fonts}
+        cache.put(key, font_names, list(ops))
+
+
+def draw_form(canvas, cache: Optional[PageStreamCache], key: str, name: str,
+              fonts: List[str], draw: Callable):
+    """在當前位置引用名為 name 的 Form XObject，文檔中尚無此表單時先定義
+
+    表單內容由 draw 繪製；cache 命中時直接回放內容流，連同 gs 指令引用的
+    圖形狀態一併恢復（表單的圖形狀態名稱獨立編號，可跨文檔回放）。
+    引用圖片等其他 XObject 的片段依賴文檔資源，只在本文檔內重用。
+    """
+    if not canvas._doc.hasForm(name):
+        canvas.beginForm(name)
+        entry = cache.get(key) if cache is not None else None
+        if entry is not None:
+            canvas._code.extend(_replay_ops(canvas, entry))
+            for state_key, value, state_name in entry.get('extgstate', ()):
+                canvas._extgstate._c[(state_key, value)] = state_name
+        else:
+            draw(canvas)
+            ops = list(canvas._code)
+            if cache is not None and not any(op.endswith(' Do') for op in ops):
+                font_names = {font: canvas._doc.getInternalFontName(font) for font in fonts}
+                extgstate = [[state_key, value, state_name]
+                             for (state_key, value), state_name in canvas._extgstate._c.items()]
+                cache.put(key, font_names, ops, extgstate)
+        canvas.endForm()
+        _add_form_extgstate(canvas, name)
+    canvas.doForm(name)
+
+
+def _add_form_extgstate(canvas, name: str):
+    """ReportLab 的表單資源不含圖形狀態字典，在此補上，否則表單內的 gs 指令無效"""
+    from reportlab.pdfbase.pdfdoc import PDFResourceDictionary, xObjectName
+
+    form = canvas._doc.idToObject[xObjectName(name)]
+    if not getattr(form, 'ExtGState', None):
+        return
+    resources = PDFResourceDictionary()
+    resources.basicFonts()
+    resources.allProcs()
+    if form.XObjects:
+        resources.XObject = form.XObjects
+    resources.ExtGState = form.ExtGState
+    form.Resources = resources
@@ -5,29 +5,75 @@
 解決文字走位和重疊問題，優化排版布局
 """
 
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm, mm
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-from reportlab.platypus.frames import Frame
-from reportlab.platypus.doctemplate import PageTemplate, BaseDocTemplate
-from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.cidfonts import UnicodeCIDFont
-from reportlab.lib.utils import ImageReader
 import os
-from typing import Dict, List
-from PIL import Image, ImageDraw, ImageFont
-import textwrap
+from functools import lru_cache
+from typing import Dict, List, Optional
+from content_generator import iter_chapters, report_chapters
+from zh_convert import convert, normalize_locale
+from page_cache import PageStreamCache, draw_cached, draw_form
+from instrumentation import PipelineInstrumentation, default_instrumentation
+
+# 長度單位及頁面尺寸（與 reportlab.lib.units / pagesizes 定義一致，
+# 在此直接給出以免啟動時導入 ReportLab）
+inch = 72.0
+cm = inch / 2.54
+mm = cm * 0.1
+A4 = (210*mm, 297*mm)
+
+# ReportLab 模組在首次渲染時由 _import_reportlab() 導入
+colors = None
+pdfmetrics = None
+UnicodeCIDFont = None
+getSampleStyleSheet = None
+ParagraphStyle = None
+
+def _import_reportlab():
+    """首次渲染時導入 ReportLab，縮短程式及工作進程的冷啟動時間"""
+    global colors, pdfmetrics, UnicodeCIDFont, getSampleStyleSheet, ParagraphStyle
+    if colors is not None:
+        return
+    from reportlab.lib import colors as _colors
+    from reportlab.lib.styles import getSampleStyleSheet as _getSampleStyleSheet
+    from reportlab.lib.styles import ParagraphStyle as _ParagraphStyle
+    from reportlab.pdfbase import pdfmetrics as _pdfmetrics
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont as _UnicodeCIDFont
+    getSampleStyleSheet = _getSampleStyleSheet
+    ParagraphStyle = _ParagraphStyle
+    pdfmetrics = _pdfmetrics
+    UnicodeCIDFont = _UnicodeCIDFont
+    colors = _colors
+
+@lru_cache(maxsize=1024)
+def _label(text: str, locale: str) -> str:
+    """固定文字的語系轉換，每個字串只轉換一次"""
+    return convert(text, locale)
 
 class FortuneReportPDF:
     """修復版傳統風格算命報告PDF生成器"""
     
-    def __init__(self):
-        """初始化PDF生成器"""
-        self.setup_fonts()
-        self.setup_styles()
+    # 封面及內容頁背景圖
+    COVER_BACKGROUND = "/home/ubuntu/chinese_background_2.png"
+    CONTENT_BACKGROUND = "/home/ubuntu/chinese_background_1.png"
+    
+    # 頁面外殼內容流緩存，同一進程內所有實例共用
+    _shell_cache = PageStreamCache()
+    
+    def __init__(self, page_cache: Optional[PageStreamCache] = None,
+                 instrumentation: Optional[PipelineInstrumentation] = None,
+                 page_shells: bool = True, locale: str = None):
+        """初始化PDF生成器
+
+        page_cache: 章節頁內容流緩存，提供時只重新排版內容有變化的章節
+        instrumentation: 流程監測器，記錄每頁耗時及輸出字節數
+        page_shells: 背景、邊框、封面靜態文字及章節標題預先繪製為頁面外殼，
+                     每份報告只繪製姓名、出生資料、四柱及正文
+        locale: 封面、目錄、章節標題及頁碼等固定文字的語系（正文由 ContentGenerator 按語系生成）
+        """
+        self.locale = normalize_locale(locale)
+        self.page_cache = page_cache
+        self.page_shells = page_shells
+        self.instrumentation = instrumentation or default_instrumentation
+        self._ready = False
         self.page_width, self.page_height = A4
         
         # 重新設計邊距和安全區域
@@ -47,8 +93,24 @@ class FortuneReportPDF:
         self.text_area_width = self.text_right_boundary - self.text_left_boundary
         self.text_area_height = self.text_top_boundary - self.text_bottom_boundary
         
+    # 已註冊的中文字體，同一進程內所有實例共用
+    _registered_font = None
+    
+    def prepare(self):
+        """首次渲染前導入 ReportLab 並設置字體及樣式"""
+        if self._ready:
+            return
+        _import_reportlab()
+        self.setup_fonts()
+        self.setup_styles()
+        self._ready = True
+    
     def setup_fonts(self):
         """設置中文字體"""
+        if FortuneReportPDF._registered_font is not None:
+            self.chinese_font = FortuneReportPDF._registered_font
+            return
+        _import_reportlab()
         try:
             pdfmetrics.registerFont(UnicodeCIDFont('STSong-Light'))
             self.chinese_font = 'STSong-Light'
@@ -61,9 +123,11 @@ class FortuneReportPDF:
             except:
                 self.chinese_font = 'Helvetica'
                 print("使用Helvetica字體作為後備")
+        FortuneReportPDF._registered_font = self.chinese_font
     
     def setup_styles(self):
         """設置文本樣式"""
+        _import_reportlab()
         self.styles = getSampleStyleSheet()
         
         # 標題樣式
@@ -262,49 +326,21 @@ class FortuneReportPDF:
     def create_safe_cover_page(self, canvas, name: str, bazi_info: Dict, 
                               birth_date, birth_time, gender: str):
         """創建安全的封面頁，避免文字重疊"""
+        self.prepare()
         canvas.saveState()
         
-        # 繪製背景
-        self.draw_background_with_safe_zones(canvas, "/home/ubuntu/chinese_background_2.png")
-        
-        # 主標題（右側豎直，在安全區域內）
-        title_x = self.text_right_boundary - 0.8*cm
-        title_y = self.text_top_boundary - 1*cm
+        # 背景、標題、信息框及目錄
+        self.draw_shell(canvas, 'cover', self.draw_cover_shell)
         
-        canvas.setFont(self.chinese_font, 20)
-        canvas.setFillColor(colors.black)
-        
-        main_title = "八字命書詳批"
-        current_y = title_y
-        for char in main_title:
-            if current_y > self.text_bottom_boundary + 20:
-                canvas.drawString(title_x, current_y, self.safe_text(char))
-                current_y -= 25
-        
-        # 命主信息框（右側，在安全區域內）
+        # 命主信息框位置（與 draw_cover_shell 一致）
         info_x = self.text_right_boundary - 3*cm
         info_y = self.text_top_boundary - 4*cm
-        
-        # 繪製信息框（確保不與邊框重疊）
-        canvas.setStrokeColor(colors.Color(0.5, 0.4, 0.3, alpha=0.6))
-        canvas.setLineWidth(1)
         box_width = 2.5*cm
         box_height = 6*cm
-        canvas.rect(info_x - box_width/2, info_y - box_height, box_width, box_height, fill=0, stroke=1)
-        
-        # 命主信息
-        canvas.setFont(self.chinese_font, 14)
-        info_title_x = info_x - 0.3*cm
-        info_title_y = info_y - 0.5*cm
-        
-        info_title = "命主"
-        current_y = info_title_y
-        for char in info_title:
-            canvas.drawString(info_title_x, current_y, self.safe_text(char))
-            current_y -= 18
         
         # 姓名
         canvas.setFont(self.chinese_font, 16)
+        canvas.setFillColor(colors.black)
         name_x = info_x + 0.3*cm
         name_y = info_y - 0.5*cm
         
@@ -319,12 +355,13 @@ class FortuneReportPDF:
         detail_x = info_x - box_width/2 + 5
         detail_y = info_y - 3*cm
         
+        label = self.label
         details = [
-            f"出生：{birth_date.year}年{birth_date.month}月{birth_date.day}日",
-            f"時間：{birth_time.hour}時{birth_time.minute}分",
-            f"性別：{gender}",
-            f"生肖：{bazi_info['shengxiao']}",
-            f"日主：{bazi_info['day_master']}"
+            f"{label('出生')}：{birth_date.year}年{birth_date.month}月{birth_date.day}日",
+            f"{label('時間')}：{birth_time.hour}{label('時')}{birth_time.minute}分",
+            f"{label('性別')}：{gender}",
+            f"{label('生肖')}：{label(bazi_info['shengxiao'])}",
+            f"{label('日主')}：{bazi_info['day_master']}"
         ]
         
         for i, detail in enumerate(details):
@@ -332,18 +369,10 @@ class FortuneReportPDF:
             if y_pos > info_y - box_height + 10:
                 canvas.drawString(detail_x, y_pos, self.safe_text(detail))
         
-        # 八字排盤（中央，在安全區域內）
+        # 八字四柱（中央，確保間距合適）
         bazi_x = self.page_width // 2
         bazi_y = self.text_top_boundary - 6*cm
         
-        canvas.setFont(self.chinese_font, 14)
-        bazi_title = "八字大運"
-        current_y = bazi_y + 1*cm
-        for char in bazi_title:
-            canvas.drawString(bazi_x, current_y, self.safe_text(char))
-            current_y -= 18
-        
-        # 八字四柱（確保間距合適）
         canvas.setFont(self.chinese_font, 12)
         pillars = [bazi_info['year_pillar'], bazi_info['month_pillar'], 
                   bazi_info['day_pillar'], bazi_info['hour_pillar']]
@@ -355,12 +384,66 @@ class FortuneReportPDF:
                 canvas.drawString(pillar_x, current_y, self.safe_text(char))
                 current_y -= 16
         
+        canvas.restoreState()
+    
+    def draw_cover_shell(self, canvas):
+        """繪製封面的靜態部分：背景、主標題、信息框、八字大運標題及目錄"""
+        # 繪製背景
+        self.draw_background_with_safe_zones(canvas, self.COVER_BACKGROUND)
+        
+        # 主標題（右側豎直，在安全區域內）
+        title_x = self.text_right_boundary - 0.8*cm
+        title_y = self.text_top_boundary - 1*cm
+        
+        canvas.setFont(self.chinese_font, 20)
+        canvas.setFillColor(colors.black)
+        
+        main_title = self.label("八字命書詳批")
+        current_y = title_y
+        for char in main_title:
+            if current_y > self.text_bottom_boundary + 20:
+                canvas.drawString(title_x, current_y, self.safe_text(char))
+                current_y -= 25
+        
+        # 命主信息框（右側，在安全區域內）
+        info_x = self.text_right_boundary - 3*cm
+        info_y = self.text_top_boundary - 4*cm
+        
+        # 繪製信息框（確保不與邊框重疊）
+        canvas.setStrokeColor(colors.Color(0.5, 0.4, 0.3, alpha=0.6))
+        canvas.setLineWidth(1)
+        box_width = 2.5*cm
+        box_height = 6*cm
+        canvas.rect(info_x - box_width/2, info_y - box_height, box_width, box_height, fill=0, stroke=1)
+        
+        # 命主信息標題
+        canvas.setFont(self.chinese_font, 14)
+        info_title_x = info_x - 0.3*cm
+        info_title_y = info_y - 0.5*cm
+        
+        info_title = self.label("命主")
+        current_y = info_title_y
+        for char in info_title:
+            canvas.drawString(info_title_x, current_y, self.safe_text(char))
+            current_y -= 18
+        
+        # 八字排盤標題（中央，在安全區域內）
+        bazi_x = self.page_width // 2
+        bazi_y = self.text_top_boundary - 6*cm
+        
+        canvas.setFont(self.chinese_font, 14)
+        bazi_title = self.label("八字大運")
+        current_y = bazi_y + 1*cm
+        for char in bazi_title:
+            canvas.drawString(bazi_x, current_y, self.safe_text(char))
+            current_y -= 18
+        
         # 目錄（左側，在安全區域內）
         toc_x = self.text_left_boundary + 1*cm
         toc_y = self.text_top_boundary - 3*cm
         
         canvas.setFont(self.chinese_font, 12)
-        toc_title = "目錄"
+        toc_title = self.label("目錄")
         current_y = toc_y
         for char in toc_title:
             canvas.drawString(toc_x, current_y, self.safe_text(char))
@@ -368,26 +451,54 @@ class FortuneReportPDF:
         
         # 目錄項目（橫向排列，節省空間）
         canvas.setFont(self.chinese_font, 8)
-        toc_items = [
-            "命主資料及八字大運", "人生總論", "事業總論", "財運總論", "姻緣總論",
-            "健康總論", "六親總論", "五十年大運總論", "十年流年預測", "簡易催運指南"
-        ]
-        
-        for i, item in enumerate(toc_items):
+        for i, item in enumerate(self.toc_items()):
             y_pos = toc_y - 1*cm - i * 12
             if y_pos > self.text_bottom_boundary + 10:
                 canvas.drawString(toc_x - 0.5*cm, y_pos, self.safe_text(item))
-        
-        canvas.restoreState()
+    
+    def toc_items(self) -> List[str]:
+        """目錄項目"""
+        return [self.label("命主資料及八字大運")] + [title for title, _ in report_chapters(self.locale)]
+    
+    def label(self, text: str) -> str:
+        """固定文字（繁體原文）-> 當前語系"""
+        return _label(text, self.locale)
     
     def create_safe_content_page(self, canvas, chapter_title: str, content: str, page_num: int):
         """創建安全的內容頁，避免文字重疊"""
+        self.prepare()
         canvas.saveState()
         
-        # 繪製背景
-        self.draw_background_with_safe_zones(canvas, "/home/ubuntu/chinese_background_1.png")
+        # 背景及章節標題
+        self.draw_shell(canvas, 'content',
+                        lambda c: self.draw_background_with_safe_zones(c, self.CONTENT_BACKGROUND))
+        self.draw_shell(canvas, 'chapter_title',
+                        lambda c: self.draw_chapter_title(c, chapter_title), chapter_title)
+        
+        # 正文（按內容雜湊緩存，內容不變時直接回放）
+        draw_cached(
+            canvas, self.page_cache,
+            self.chapter_cache_key(chapter_title, content),
+            [self.chinese_font],
+            lambda c: self.draw_chapter_body(c, content)
+        )
         
-        # 頁面標題（右上角豎直，在安全區域內）
+        # 頁碼（右下角豎直，在安全區域內）
+        page_x = self.text_right_boundary - 0.6*cm
+        page_y = self.text_bottom_boundary + 1*cm
+        
+        canvas.setFont(self.chinese_font, 9)
+        canvas.setFillColor(colors.black)
+        page_text = f"{self.label('第')}{page_num}{self.label('頁')}"
+        current_y = page_y
+        for char in page_text:
+            canvas.drawString(page_x, current_y, self.safe_text(char))
+            current_y += 12
+        
+        canvas.restoreState()
+    
+    def draw_chapter_title(self, canvas, chapter_title: str):
+        """繪製章節標題（右上角豎直，在安全區域內）"""
         title_x = self.text_right_boundary - 0.6*cm
         title_y = self.text_top_boundary - 0.5*cm
         
@@ -399,30 +510,49 @@ class FortuneReportPDF:
             if current_y > self.text_bottom_boundary + 14:
                 canvas.drawString(title_x, current_y, self.safe_text(char))
                 current_y -= 18
-        
-        # 內容區域（豎直排版，從右到左，在安全區域內）
+    
+    def draw_chapter_body(self, canvas, content: str):
+        """繪製豎排正文（從右到左，在安全區域內）"""
         content_start_x = self.text_right_boundary - 1.5*cm
         content_start_y = self.text_top_boundary - 3*cm
         
-        # 繪製豎直文本，確保在安全區域內
         self.draw_vertical_text_safe(
             canvas, content, 
             content_start_x, content_start_y, 
             max_chars_per_column=20, font_size=10
         )
-        
-        # 頁碼（右下角豎直，在安全區域內）
-        page_x = self.text_right_boundary - 0.6*cm
-        page_y = self.text_bottom_boundary + 1*cm
-        
-        canvas.setFont(self.chinese_font, 9)
-        page_text = f"第{page_num}頁"
-        current_y = page_y
-        for char in page_text:
-            canvas.drawString(page_x, current_y, self.safe_text(char))
-            current_y += 12
-        
-        canvas.restoreState()
+    
+    def draw_shell(self, canvas, kind: str, draw, text: str = None):
+        """繪製頁面外殼
+
+        開啟 page_shells 時，外殼按種類、排版參數及靜態文字緩存內容流：
+        封面及內容頁背景每份文檔定義為一個 Form XObject，各頁只需一條引用指令；
+        章節標題每份文檔只出現一次，直接回放內容流。未開啟時直接繪製。
+        """
+        if not self.page_shells:
+            draw_cached(canvas, None, '', [], draw)
+            return
+        static = {
+            'cover': (self.COVER_BACKGROUND, self.toc_items()),
+            'content': (self.CONTENT_BACKGROUND,)
+        }.get(kind, text)
+        key = PageStreamCache.make_key('shell', kind, self.layout_key(), static)
+        if text is not None:
+            draw_cached(canvas, FortuneReportPDF._shell_cache, key, [self.chinese_font], draw)
+        else:
+            draw_form(canvas, FortuneReportPDF._shell_cache, key, f"shell_{key[:16]}",
+                      [self.chinese_font], draw)
+    
+    def layout_key(self) -> tuple:
+        """影響排版結果的參數"""
+        return (
+            self.chinese_font, self.page_width, self.page_height, self.outer_margin,
+            self.inner_margin, self.column_width, self.char_spacing, self.locale
+        )
+    
+    def chapter_cache_key(self, chapter_title: str, content: str) -> str:
+        """章節正文緩存鍵：排版參數與章節內容的雜湊"""
+        return PageStreamCache.make_key('chapter_body', self.layout_key(), chapter_title, content)
     
     def generate_pdf(self, filename: str, name: str, bazi_info: Dict, 
                     wuxing_analysis: Dict, dayun_list: List[Dict],
@@ -431,34 +561,31 @@ class FortuneReportPDF:
         
         # 創建PDF文檔
         from reportlab.pdfgen.canvas import Canvas
+        self.prepare()
         
+        stage = self.instrumentation.stage
         c = Canvas(filename, pagesize=A4)
         
         # 封面頁
-        self.create_safe_cover_page(c, name, bazi_info, birth_date, birth_time, gender)
-        c.showPage()
+        with stage('pdf_page:cover'):
+            self.create_safe_cover_page(c, name, bazi_info, birth_date, birth_time, gender)
+            c.showPage()
         
         # 內容頁
-        chapters = [
-            ("人生總論", all_contents.get('life_summary', '')),
-            ("事業總論", all_contents.get('career_summary', '')),
-            ("財運總論", all_contents.get('wealth_summary', '')),
-            ("姻緣總論", all_contents.get('marriage_summary', '')),
-            ("健康總論", all_contents.get('health_summary', '')),
-            ("六親總論", all_contents.get('family_summary', '')),
-            ("五十年大運總論", all_contents.get('dayun_summary', '')),
-            ("十年流年預測", all_contents.get('liunian_prediction', '')),
-            ("簡易催運指南", all_contents.get('feng_shui_guide', ''))
-        ]
-        
         page_num = 2
-        for chapter_title, content in chapters:
-            if content:
+        for chapter_title, key, content in iter_chapters(all_contents, self.locale):
+            with stage(f'pdf_page:{key}'):
                 self.create_safe_content_page(c, chapter_title, content, page_num)
                 c.showPage()
-                page_num += 1
+            page_num += 1
+        
+        with stage('pdf_save'):
+            c.save()
         
-        c.save()
+        if self.instrumentation.enabled:
+            self.instrumentation.count('pages_rendered', page_num - 1)
+            if isinstance(filename, str) and os.path.exists(filename):
+                self.instrumentation.count('pdf_bytes_written', os.path.getsize(filename))
         print(f"修復版傳統風格PDF報告已生成：{filename}")
 
 # 測試代碼
@@ -491,8 +618,10 @@ if __name__ == "__main__":
         'marriage_summary': generator.generate_marriage_summary(bazi_info, gender),
         'health_summary': generator.generate_health_summary(bazi_info, wuxing_analysis),
         'family_summary': generator.generate_family_summary(bazi_info),
-        'dayun_summary': generator.generate_dayun_summary(dayun),
-        'liunian_prediction': generator.generate_liunian_prediction(birth_date.year),
+        'shensha_summary': generator.generate_shensha_summary(bazi_info),
+        'dayun_summary': generator.generate_dayun_summary(dayun, bazi_info=bazi_info),
+        'liunian_prediction': generator.generate_liunian_prediction(
+            birth_date.year, bazi_info=bazi_info, dayun_list=dayun),
         'feng_shui_guide': generator.generate_feng_shui_guide(wuxing_analysis)
     }
     
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+干支曆表模組
+預先計算1900–2100年每日的年、月、日柱（六十甲子序號），支持按四柱反查出生時間區間，
+以及按日期批量查詢四柱
+"""
+
+import datetime
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from bazi_calculator import BaziCalculator
+
+TIANGAN = BaziCalculator.TIANGAN
+DIZHI = BaziCalculator.DIZHI
+
+START_DATE = datetime.date(1900, 1, 1)
+END_DATE = datetime.date(2100, 12, 31)
+
+# 公曆序數（date.toordinal）與儒略日數之差
+JULIAN_DAY_OFFSET = 1721425
+
+
+def ganzhi_code(gan: int, zhi: int) -> int:
+    """天干、地支序號 -> 六十甲子序號（甲子=0）"""
+    return (6 * gan - 5 * zhi) % 60
+
+
+def parse_pillar(pillar: str) -> int:
+    """干支字串（如 '乙丑'）-> 六十甲子序號"""
+    if len(pillar) != 2 or pillar[0] not in TIANGAN or pillar[1] not in DIZHI:
+        raise ValueError(f"無效的干支：{pillar}")
+    gan = TIANGAN.index(pillar[0])
+    zhi = DIZHI.index(pillar[1])
+    if gan % 2 != zhi % 2:
+        raise ValueError(f"干支陰陽不配：{pillar}")
+    return ganzhi_code(gan, zhi)
+
+
+def pillar_name(code: int) -> str:
+    """六十甲子序號 -> 干支字串"""
+    return TIANGAN[code % 10] + DIZHI[code % 12]
+
+
+def hour_zhi_intervals(zhi: int, late_zi_next_day: bool = False) -> List[Tuple[int, int]]:
+    """時支在所屬日內覆蓋的分鐘區間（相對當日00:00，可為負或超過1440）"""
+    if zhi == 0:
+        if late_zi_next_day:
+            return [(-60, 60)]
+        return [(0, 60), (23 * 60, 24 * 60)]
+    return [((2 * zhi - 1) * 60, (2 * zhi + 1) * 60)]
+
+
+class PillarCalendar:
+    """干支曆表
+
+    days 個元素的數組按日期順序保存年、月、日柱的六十甲子序號，規則與
+    BaziCalculator.calculate_bazi 一致：年柱以正月初一為界，月柱以節氣
+    交節當日為界，日柱按儒略日推算。時柱由日干及時支推出，不另行保存。
+    """
+
+    def __init__(self, start_ordinal: int, year_codes, month_codes, day_codes):
+        """以預先計算的數組初始化，通常通過 build() 或 load() 創建"""
+        import numpy as np
+
+        self.start_ordinal = int(start_ordinal)
+        self.year_codes = np.asarray(year_codes, dtype=np.int8)
+        self.month_codes = np.asarray(month_codes, dtype=np.int8)
+        self.day_codes = np.asarray(day_codes, dtype=np.int8)
+        self.days = len(self.day_codes)
+
+        # 倒排索引：年柱、月柱各自的連續區段 [起, 止)，按六十甲子序號分組
+        self.year_segments = self._segments(self.year_codes)
+        self.month_segments = self._segments(self.month_codes)
+
+    @staticmethod
+    def _segments(codes) -> Dict[int, List[Tuple[int, int]]]:
+        """把序號數組切成連續區段並按序號建立索引"""
+        import numpy as np
+
+        change = np.flatnonzero(np.diff(codes)) + 1
+        starts = np.concatenate([[0], change])
+        stops = np.concatenate([change, [len(codes)]])
+        index: Dict[int, List[Tuple[int, int]]] = {}
+        for start, stop in zip(starts.tolist(), stops.tolist()):
+            index.setdefault(int(codes[start]), []).append((start, stop))
+        return index
+
+    @classmethod
+    def build(cls, start: datetime.date = START_DATE, end: datetime.date = END_DATE) -> 'PillarCalendar':
+        """根據 lunar_python 的正月初一及節氣日期建立曆表"""
+        import numpy as np
+        from lunar_python import Lunar, Solar
+
+        start_ordinal = start.toordinal()
+        ordinals = np.arange(start_ordinal, end.toordinal() + 1)
+
+        new_years = []
+        jie_days = set()
+        jie_names = Lunar.JIE_QI_IN_USE[::2]
+        for year in range(start.year - 1, end.year + 2):
+            lunar = Lunar.fromYmd(year, 1, 1)
+            solar = lunar.getSolar()
+            new_years.append((datetime.date(solar.getYear(), solar.getMonth(), solar.getDay()).toordinal(), year))
+            table = lunar.getJieQiTable()
+            for name in jie_names:
+                jie = table[name]
+                jie_days.add(datetime.date(jie.getYear(), jie.getMonth(), jie.getDay()).toordinal())
+
+        # 年柱：當日所在農曆年
+        new_year_days = np.array([d for d, _ in new_years])
+        lunar_years = np.array([y for _, y in new_years])
+        year_of_day = lunar_years[np.searchsorted(new_year_days, ordinals, side='right') - 1]
+        year_codes = (year_of_day - 4) % 60
+
+        # 月柱：以起始日的月柱為錨，每逢交節日序號加一
+        anchor = Solar.fromYmd(start.year, start.month, start.day).getLunar()
+        anchor_code = ganzhi_code(TIANGAN.index(anchor.getMonthGan()), DIZHI.index(anchor.getMonthZhi()))
+        jie_sorted = np.array(sorted(jie_days))
+        passed = np.searchsorted(jie_sorted, ordinals, side='right') - np.searchsorted(
+            jie_sorted, start_ordinal, side='right')
+        month_codes = (anchor_code + passed) % 60
+
+        # 日柱：儒略日推算
+        day_codes = (ordinals + JULIAN_DAY_OFFSET - 11) % 60
+
+        return cls(start_ordinal, year_codes, month_codes, day_codes)
+
+    def save(self, path: str):
+        """保存為 .npz 文件"""
+        import numpy as np
+
+        np.savez_compressed(path, start_ordinal=self.start_ordinal, year_codes=self.year_codes,
+                            month_codes=self.month_codes, day_codes=self.day_codes)
+
+    @classmethod
+    def load(cls, path: str) -> 'PillarCalendar':
+        """從 .npz 文件加載"""
+        import numpy as np
+
+        with np.load(path) as data:
+            return cls(int(data['start_ordinal']), data['year_codes'],
+                       data['month_codes'], data['day_codes'])
+
+    @classmethod
+    def load_or_build(cls, path: Optional[str] = None) -> 'PillarCalendar':
+        """有緩存文件則加載，否則建立並（指定路徑時）保存"""
+        if path and os.path.exists(path):
+            return cls.load(path)
+        calendar = cls.build()
+        if path:
+            calendar.save(path)
+        return calendar
+
+    def date_of(self, index: int) -> datetime.date:
+        """日序號 -> 日期"""
+        return datetime.date.fromordinal(self.start_ordinal + index)
+
+    def index_of(self, day: datetime.date) -> int:
+        """日期 -> 日序號"""
+        index = day.toordinal() - self.start_ordinal
+        if not 0 <= index < self.days:
+            raise ValueError(f"日期超出曆表範圍：{day}")
+        return index
+
+    def pillars_of(self, day: datetime.date) -> Tuple[str, str, str]:
+        """查詢某日的年、月、日柱"""
+        i = self.index_of(day)
+        return (pillar_name(int(self.year_codes[i])), pillar_name(int(self.month_codes[i])),
+                pillar_name(int(self.day_codes[i])))
+
+    def chart_codes(self, ordinals, hours, late_zi_next_day: bool = False):
+        """批量計算四柱干支序號
+
+        ordinals 為公曆序數數組，hours 為小時數組（0–23）。
+        返回 (stem_codes, branch_codes)，形狀均為 (N, 4)，與 calculate_bazi 的
+        tiangan_codes / dizhi_codes 相同。
+        """
+        import numpy as np
+
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        hours = np.asarray(hours, dtype=np.int64)
+        index = ordinals - self.start_ordinal
+        if late_zi_next_day:
+            index = index + (hours >= 23)
+        if len(index) and (index.min() < 0 or index.max() >= self.days):
+            raise ValueError("日期超出曆表範圍")
+
+        year = self.year_codes[index].astype(np.int64)
+        month = self.month_codes[index].astype(np.int64)
+        day = self.day_codes[index].astype(np.int64)
+        hour_zhi = ((hours + 1) // 2) % 12
+        hour_gan = ((day % 10) * 2 + hour_zhi) % 10
+
+        stems = np.stack([year % 10, month % 10, day % 10, hour_gan], axis=1)
+        branches = np.stack([year % 12, month % 12, day % 12, hour_zhi], axis=1)
+        return stems, branches
+
+    def matching_days(self, year: Optional[str] = None, month: Optional[str] = None,
+                      day: Optional[str] = None, hour: Optional[str] = None):
+        """返回符合指定柱的日序號數組（升序）
+
+        有日柱時從日柱倒排表（每60日一現）出發；否則取年、月柱區段；
+        其餘條件以數組查表過濾。
+        """
+        import numpy as np
+
+        year_code = parse_pillar(year) if year else None
+        month_code = parse_pillar(month) if month else None
+        day_code = parse_pillar(day) if day else None
+
+        if day_code is not None:
+            first = (day_code - int(self.day_codes[0])) % 60
+            candidates = np.arange(first, self.days, 60)
+        else:
+            segments = None
+            for code, index in ((month_code, self.month_segments), (year_code, self.year_segments)):
+                if code is not None:
+                    segments = index.get(code, [])
+                    break
+            if segments is None:
+                candidates = np.arange(self.days)
+            elif segments:
+                candidates = np.concatenate([np.arange(a, b) for a, b in segments])
+            else:
+                candidates = np.arange(0)
+
+        if year_code is not None:
+            candidates = candidates[self.year_codes[candidates] == year_code]
+        if month_code is not None:
+            candidates = candidates[self.month_codes[candidates] == month_code]
+        if hour:
+            hour_code = parse_pillar(hour)
+            # 時干由日干決定：時干 = (日干 × 2 + 時支) mod 10
+            day_gan = self.day_codes[candidates] % 10
+            candidates = candidates[(day_gan * 2 + hour_code % 12) % 10 == hour_code % 10]
+        return candidates
+
+    def find_intervals(self, year: Optional[str] = None, month: Optional[str] = None,
+                       day: Optional[str] = None, hour: Optional[str] = None,
+                       late_zi_next_day: bool = False) -> List[Tuple[datetime.datetime, datetime.datetime]]:
+        """反查產生指定四柱的出生時間區間
+
+        任一柱可省略。返回按時間排序並合併相鄰部分後的 [起, 止) 區間列表。
+        """
+        days = self.matching_days(year, month, day, hour)
+
+        if hour:
+            minute_ranges = hour_zhi_intervals(parse_pillar(hour) % 12, late_zi_next_day)
+        elif late_zi_next_day:
+            minute_ranges = [(-60, 23 * 60)]
+        else:
+            minute_ranges = [(0, 24 * 60)]
+
+        intervals: List[Tuple[datetime.datetime, datetime.datetime]] = []
+        for index in days.tolist():
+            midnight = datetime.datetime.combine(self.date_of(index), datetime.time())
+            for lo, hi in minute_ranges:
+                start = midnight + datetime.timedelta(minutes=lo)
+                stop = midnight + datetime.timedelta(minutes=hi)
+                if intervals and intervals[-1][1] == start:
+                    intervals[-1] = (intervals[-1][0], stop)
+                else:
+                    intervals.append((start, stop))
+        intervals.sort()
+        return intervals
+
+
+@lru_cache(maxsize=None)
+def get_calendar(path: Optional[str] = None) -> PillarCalendar:
+    """獲取進程內共享的曆表（首次調用時建立或從緩存文件加載）"""
+    return PillarCalendar.load_or_build(path)
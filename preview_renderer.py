@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+報告預覽圖模組
+以 PIL 直接把封面（姓名、四柱、目錄）及首個章節頁繪製為 PNG，
+排版沿用 FortuneReportPDF 的繪製方法，不經 ReportLab 生成及光柵化 PDF；
+字體對象按像素大小緩存，背景及邊框按頁面種類預先繪製，預覽圖按報告鍵緩存
+"""
+
+import io
+import os
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from content_generator import iter_chapters, report_chapters
+from page_cache import PageStreamCache
+from pdf_generator import FortuneReportPDF
+from zh_convert import normalize_locale
+
+# 預覽用中文字體，依次嘗試；可用環境變量 ASKBAZI_PREVIEW_FONT 指定
+FONT_CANDIDATES = [
+    '/usr/share/fonts/opentype/noto/NotoSerifCJK-Regular.ttc',
+    '/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc',
+    '/usr/share/fonts/noto-cjk/NotoSerifCJK-Regular.ttc',
+    '/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc',
+    '/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc',
+    '/usr/share/fonts/truetype/arphic/uming.ttc',
+    '/System/Library/Fonts/PingFang.ttc',
+    '/Library/Fonts/Arial Unicode.ttf',
+    'C:/Windows/Fonts/msjh.ttc',
+    'C:/Windows/Fonts/mingliu.ttc'
+]
+
+# 預設預覽圖寬度（像素），A4 豎版
+DEFAULT_WIDTH = 600
+
+# 內存中保留的預覽數
+DEFAULT_MAX_ENTRIES = 256
+
+# PNG 壓縮級別：預覽圖以編碼速度優先
+PNG_COMPRESS_LEVEL = 1
+
+# 調色板中墨跡漸變的級數，其餘顏色留給底圖
+INK_LEVELS = 16
+
+# 預覽頁面
+PAGES = ('cover', 'chapter')
+
+
+@lru_cache(maxsize=None)
+def font_path() -> Optional[str]:
+    """找到可用的中文字體文件，找不到時返回None"""
+    candidates = [os.environ.get('ASKBAZI_PREVIEW_FONT')] + FONT_CANDIDATES
+    for path in candidates:
+        if path and os.path.exists(path):
+            return path
+    print("未找到中文字體，預覽圖使用PIL內建字體（中文可能無法顯示），可設置 ASKBAZI_PREVIEW_FONT")
+    return None
+
+
+@lru_cache(maxsize=64)
+def get_font(size: int):
+    """按像素大小獲取字體對象"""
+    from PIL import ImageFont
+
+    path = font_path()
+    if path is None:
+        return ImageFont.load_default(size)
+    return ImageFont.truetype(path, size)
+
+
+@lru_cache(maxsize=4096)
+def _glyphs(text: str, size: int) -> Tuple:
+    """文字的覆蓋度位圖及其左上角相對基線起點的偏移，同一字串按像素大小只柵格化一次"""
+    from PIL import Image, ImageDraw
+
+    font = get_font(size)
+    left, top, right, bottom = font.getbbox(text, anchor='ls')
+    mask = Image.new('L', (max(1, right - left), max(1, bottom - top)), 0)
+    ImageDraw.Draw(mask).text((-left, -top), text, font=font, fill=255, anchor='ls')
+    return mask, left, top
+
+
+@lru_cache(maxsize=8)
+def _fitted_image(path: str, width: int, height: int):
+    """按比例縮放到 width × height 框內的 RGBA 圖片"""
+    from PIL import Image
+
+    with Image.open(path) as source:
+        image = source.convert('RGBA')
+    image.thumbnail((width, height), Image.LANCZOS)
+    return image
+
+
+def _rgba(color, alpha: float = 1.0) -> Tuple[int, int, int, int]:
+    """ReportLab Color -> (r, g, b, a)"""
+    alpha *= getattr(color, 'alpha', 1)
+    return (round(color.red * 255), round(color.green * 255), round(color.blue * 255), round(alpha * 255))
+
+
+class RasterCanvas:
+    """以 PIL 圖像實現的 ReportLab canvas 子集
+
+    支持 FortuneReportPDF 繪製頁面時用到的指令：字體、顏色、線寬、填充透明度、
+    drawString、line、rect、drawImage 及 saveState/restoreState。
+    座標以點為單位、原點在左下角，繪製時按 scale 換算為像素。
+    ink 為真時只記錄墨跡覆蓋度（灰度圖，0 為無墨、255 為全黑），供疊加到預先繪製的底圖上。
+    """
+
+    def __init__(self, page_size: Tuple[float, float], width: int, ink: bool = False):
+        from PIL import Image, ImageDraw
+
+        self.page_width, self.page_height = page_size
+        self.scale = width / self.page_width
+        self.ink = ink
+        size = (width, round(self.page_height * self.scale))
+        if ink:
+            self.image = Image.new('L', size, 0)
+            self._draw = ImageDraw.Draw(self.image)
+        else:
+            self.image = Image.new('RGB', size, 'white')
+            self._draw = ImageDraw.Draw(self.image, 'RGBA')
+        self.shell = None
+        self._state = {'font': None, 'size': 12, 'fill': (0, 0, 0, 255), 'stroke': (0, 0, 0, 255),
+                       'line_width': 1.0, 'fill_alpha': 1.0}
+        self._stack: List[Dict] = []
+
+    def _xy(self, x: float, y: float) -> Tuple[float, float]:
+        return x * self.scale, (self.page_height - y) * self.scale
+
+    def _paint(self, rgba: Tuple[int, int, int, int], alpha: float = 1.0):
+        """繪製用的顏色：RGBA，或墨跡模式下的覆蓋度"""
+        r, g, b, a = rgba
+        a = round(a * alpha)
+        if self.ink:
+            return round(a * (1 - (0.299 * r + 0.587 * g + 0.114 * b) / 255))
+        return r, g, b, a
+
+    def saveState(self):
+        self._stack.append(dict(self._state))
+
+    def restoreState(self):
+        self._state = self._stack.pop()
+
+    def setFont(self, name: str, size: float):
+        self._state['font'] = name
+        self._state['size'] = size
+
+    def setFillColor(self, color):
+        self._state['fill'] = _rgba(color)
+
+    def setStrokeColor(self, color):
+        self._state['stroke'] = _rgba(color)
+
+    def setLineWidth(self, width: float):
+        self._state['line_width'] = width
+
+    def setFillAlpha(self, alpha: float):
+        self._state['fill_alpha'] = alpha
+
+    def _line_width(self) -> int:
+        return max(1, round(self._state['line_width'] * self.scale))
+
+    def drawString(self, x: float, y: float, text: str):
+        size = max(1, round(self._state['size'] * self.scale))
+        fill = self._paint(self._state['fill'], self._state['fill_alpha'])
+        x, y = self._xy(x, y)
+        if self.ink:
+            # 墨跡圖層只疊加單色文字，直接貼上緩存的字形位圖
+            mask, left, top = _glyphs(text, size)
+            self._draw.bitmap((round(x) + left, round(y) + top), mask, fill=fill)
+        else:
+            self._draw.text((x, y), text, font=get_font(size), anchor='ls', fill=fill)
+
+    def line(self, x1: float, y1: float, x2: float, y2: float):
+        self._draw.line([self._xy(x1, y1), self._xy(x2, y2)], fill=self._paint(self._state['stroke']),
+                        width=self._line_width())
+
+    def rect(self, x: float, y: float, width: float, height: float, stroke: int = 1, fill: int = 0):
+        left, bottom = self._xy(x, y)
+        right, top = self._xy(x + width, y + height)
+        self._draw.rectangle(
+            [left, top, right, bottom],
+            fill=self._paint(self._state['fill'], self._state['fill_alpha']) if fill else None,
+            outline=self._paint(self._state['stroke']) if stroke else None,
+            width=self._line_width() if stroke else 0
+        )
+
+    def drawImage(self, path: str, x: float, y: float, width: float, height: float,
+                  preserveAspectRatio: bool = False, mask=None):
+        """按填充透明度疊加圖片；保持比例時在框內居中"""
+        if self.ink:
+            raise ValueError('墨跡圖層不支持圖片，請在頁面外殼中繪製')
+        box_left, box_top = self._xy(x, y + height)
+        box_width, box_height = round(width * self.scale), round(height * self.scale)
+        if preserveAspectRatio:
+            image = _fitted_image(path, box_width, box_height)
+        else:
+            image = _fitted_image(path, 10 ** 6, 10 ** 6).resize((box_width, box_height))
+        left = round(box_left + (box_width - image.width) / 2)
+        top = round(box_top + (box_height - image.height) / 2)
+        alpha = image.getchannel('A').point(lambda v: round(v * self._state['fill_alpha']))
+        self.image.paste(image.convert('RGB'), (left, top), alpha)
+
+
+class _PreviewLayout(FortuneReportPDF):
+    """沿用 PDF 排版，把頁面外殼改為預先繪製的底圖"""
+
+    def __init__(self, renderer: 'PreviewRenderer', locale: str = None):
+        super().__init__(page_shells=False, locale=locale)
+        self.renderer = renderer
+
+    def draw_shell(self, canvas, kind: str, draw, text: str = None):
+        if text is not None:
+            canvas.saveState()
+            draw(canvas)
+            canvas.restoreState()
+            return
+        canvas.shell = self.renderer.shell(kind, draw)
+
+
+class PreviewCache:
+    """預覽圖緩存
+
+    以報告鍵保存各預覽頁的 PNG 字節，內存中按最近使用保留 max_entries 份；
+    指定 cache_dir 時同時寫入磁碟，可跨進程重用。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """初始化緩存"""
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Dict[str, bytes]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _page_path(self, key: str, page: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}-{page}.png")
+
+    def get(self, key: str, pages: Tuple[str, ...] = PAGES) -> Optional[Dict[str, bytes]]:
+        """讀取預覽，任一頁缺失時返回None"""
+        entry = self._entries.get(key)
+        if entry is not None and all(page in entry for page in pages):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        if self.cache_dir and all(os.path.exists(self._page_path(key, page)) for page in pages):
+            entry = {}
+            for page in pages:
+                with open(self._page_path(key, page), 'rb') as f:
+                    entry[page] = f.read()
+            self._store(key, entry)
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def put(self, key: str, pngs: Dict[str, bytes]):
+        """寫入預覽"""
+        self._store(key, pngs)
+        if self.cache_dir:
+            # 先寫臨時文件再替換，避免並行進程讀到半寫入的圖片
+            for page, data in pngs.items():
+                path = self._page_path(key, page)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+
+    def _store(self, key: str, pngs: Dict[str, bytes]):
+        entry = self._entries.setdefault(key, {})
+        entry.update(pngs)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        """獲取命中統計"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+
+class PreviewRenderer:
+    """報告預覽圖生成器"""
+
+    def __init__(self, width: int = DEFAULT_WIDTH, cache: Optional[PreviewCache] = None,
+                 locale: str = None):
+        """初始化
+
+        width: 預覽圖寬度（像素），高度按A4比例
+        cache: 預覽緩存，未提供時使用僅在內存中的緩存
+        locale: 封面、目錄及章節標題的語系，與報告的語系一致
+        """
+        self.width = width
+        self.locale = normalize_locale(locale)
+        self.cache = cache if cache is not None else PreviewCache()
+        self.layout = _PreviewLayout(self, self.locale)
+        self._shells: Dict[str, object] = {}
+
+    def shell(self, kind: str, draw) -> Tuple:
+        """頁面外殼底圖，首次使用時繪製
+
+        底圖量化為調色板圖像（數組, 調色板），調色板末尾 INK_LEVELS 色為由紙色到墨色的漸變，
+        每頁疊加墨跡時只需按覆蓋度改寫索引，PNG 編碼亦以調色板圖像進行。
+        """
+        shell = self._shells.get(kind)
+        if shell is None:
+            import numpy as np
+            from PIL import Image, ImageStat
+
+            canvas = RasterCanvas((self.layout.page_width, self.layout.page_height), self.width)
+            canvas.saveState()
+            draw(canvas)
+            canvas.restoreState()
+            base = 256 - INK_LEVELS
+            quantized = canvas.image.quantize(base, dither=Image.Dither.NONE)
+            paper = np.array(ImageStat.Stat(canvas.image).median, dtype=np.float64)
+            ramp = np.outer(1 - np.arange(INK_LEVELS) / (INK_LEVELS - 1), paper).round().astype(np.uint8)
+            palette = quantized.getpalette()[:3 * base]
+            palette += [0] * (3 * base - len(palette))
+            shell = self._shells[kind] = (np.asarray(quantized), palette + ramp.ravel().tolist())
+        return shell
+
+    def _canvas(self) -> RasterCanvas:
+        self.layout.prepare()
+        return RasterCanvas((self.layout.page_width, self.layout.page_height), self.width, ink=True)
+
+    @staticmethod
+    def _compose(canvas: RasterCanvas):
+        """把墨跡圖層疊加到底圖上，返回調色板圖像"""
+        import numpy as np
+        from PIL import Image
+
+        indices, palette = canvas.shell
+        coverage = np.asarray(canvas.image)
+        levels = (coverage.astype(np.uint16) * (INK_LEVELS - 1) + 127) // 255
+        image = Image.fromarray(np.where(levels > 0, 256 - INK_LEVELS + levels, indices).astype(np.uint8), 'P')
+        image.putpalette(palette)
+        return image
+
+    def render_cover(self, name: str, bazi_info: Dict, birth_date, birth_time, gender: str):
+        """繪製封面，返回 PIL 圖像"""
+        canvas = self._canvas()
+        self.layout.create_safe_cover_page(canvas, name, bazi_info, birth_date, birth_time, gender)
+        return self._compose(canvas)
+
+    def render_chapter(self, chapter_title: str, content: str, page_num: int = 2):
+        """繪製章節頁，返回 PIL 圖像"""
+        canvas = self._canvas()
+        self.layout.create_safe_content_page(canvas, chapter_title, content, page_num)
+        return self._compose(canvas)
+
+    def first_chapter(self, all_contents: Dict) -> Tuple[str, str]:
+        """報告的首個章節 (標題, 內容)，與 generate_pdf 的章節順序一致"""
+        for chapter_title, _, content in iter_chapters(all_contents, self.locale):
+            return chapter_title, content
+        return report_chapters(self.locale)[0][0], ''
+
+    def report_key(self, name: str, bazi_info: Dict, birth_date, birth_time, gender: str,
+                   all_contents: Dict) -> str:
+        """預覽緩存鍵：寬度、排版參數及預覽頁用到的全部資料"""
+        self.layout.prepare()
+        pillars = [bazi_info[f'{p}_pillar'] for p in ('year', 'month', 'day', 'hour')]
+        return PageStreamCache.make_key(
+            'preview', self.width, self.layout.layout_key(), name, birth_date, birth_time, gender,
+            pillars, bazi_info['shengxiao'], bazi_info['day_master'], self.first_chapter(all_contents)
+        )
+
+    def render_png(self, name: str, bazi_info: Dict, birth_date, birth_time, gender: str,
+                   all_contents: Dict, key: str = None) -> Dict[str, bytes]:
+        """生成預覽 PNG，返回 {'cover': 字節, 'chapter': 字節}
+
+        key 為報告鍵（例如訂單號或報告 id）；未提供時按預覽內容計算。
+        命中緩存時不再繪製。
+        """
+        if key is None:
+            key = self.report_key(name, bazi_info, birth_date, birth_time, gender, all_contents)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        images = {
+            'cover': self.render_cover(name, bazi_info, birth_date, birth_time, gender),
+            'chapter': self.render_chapter(*self.first_chapter(all_contents))
+        }
+        pngs = {page: encode_png(image) for page, image in images.items()}
+        self.cache.put(key, pngs)
+        return pngs
+
+
+def encode_png(image) -> bytes:
+    """把圖像編碼為 PNG 字節"""
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG', compress_level=PNG_COMPRESS_LEVEL)
+    return buffer.getvalue()
+
+
+def main(argv=None) -> int:
+    """命令行入口：生成報告預覽圖"""
+    import argparse
+    import datetime
+    from bazi_calculator import BaziCalculator
+    from content_generator import ContentGenerator
+
+    parser = argparse.ArgumentParser(description='生成報告封面及首頁預覽圖（PNG）')
+    parser.add_argument('name', help='姓名')
+    parser.add_argument('birth_date', help='出生日期 YYYY-MM-DD')
+    parser.add_argument('birth_time', help='出生時間 HH:MM')
+    parser.add_argument('gender', choices=['男', '女'], help='性別')
+    parser.add_argument('--width', type=int, default=DEFAULT_WIDTH, help='預覽圖寬度（像素）')
+    parser.add_argument('--output', default='preview', help='輸出文件前綴')
+    parser.add_argument('--locale', type=normalize_locale, help='輸出語系：zh-Hant（繁體，默認）或 zh-Hans（簡體）')
+    args = parser.parse_args(argv)
+
+    try:
+        birth_date = datetime.datetime.strptime(args.birth_date, '%Y-%m-%d').date()
+        birth_time = datetime.datetime.strptime(args.birth_time, '%H:%M').time()
+    except ValueError as e:
+        print(f"日期或時間格式錯誤：{e}")
+        return 1
+
+    calculator = BaziCalculator()
+    bazi_info = calculator.calculate_bazi(birth_date, birth_time)
+    wuxing_analysis = calculator.analyze_wuxing_balance(bazi_info)
+    # 預覽只用到首個章節
+    all_contents = {'life_summary': ContentGenerator(args.locale).generate_life_summary(bazi_info, wuxing_analysis)}
+
+    pngs = PreviewRenderer(args.width, locale=args.locale).render_png(
+        args.name, bazi_info, birth_date, birth_time, args.gender, all_contents)
+    for page, data in pngs.items():
+        path = f"{args.output}_{page}.png"
+        with open(path, 'wb') as f:
+            f.write(data)
+        print(f"預覽圖已生成：{path}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+報告文本輸出模組
+把八字盤及 all_contents 的章節輸出為 JSON、Markdown 或自含樣式的 HTML，不經 ReportLab；
+章節順序及標題與PDF報告相同（content_generator.iter_chapters），各渲染器逐段產出字串，可邊生成邊寫出
+"""
+
+import datetime
+import html
+import json
+from functools import lru_cache
+from typing import Dict, Iterator, List, TextIO
+from content_generator import iter_chapters
+from zh_convert import DEFAULT_LOCALE, convert, normalize_locale
+
+# 輸出格式 -> (文件擴展名, Content-Type)
+FORMATS: Dict[str, tuple] = {
+    'json': ('json', 'application/json; charset=utf-8'),
+    'markdown': ('md', 'text/markdown; charset=utf-8'),
+    'html': ('html', 'text/html; charset=utf-8')
+}
+
+# 報告標題及命主資料章節標題（與PDF封面及目錄一致）
+REPORT_TITLE = "八字命書詳批"
+PROFILE_TITLE = "命主資料及八字大運"
+
+# 八字盤輸出字段
+CHART_FIELDS = ('year_pillar', 'month_pillar', 'day_pillar', 'hour_pillar',
+                'day_master', 'day_master_wuxing', 'shengxiao')
+
+# 四柱名稱
+PILLAR_LABELS = (('year_pillar', '年柱'), ('month_pillar', '月柱'), ('day_pillar', '日柱'), ('hour_pillar', '時柱'))
+
+# HTML 樣式：傳統風格正文豎排（由右至左），現代風格橫排
+HTML_STYLE = """
+body{margin:0;background:#faf5f0;color:#222;font-family:"Noto Serif TC","Noto Serif CJK TC","PMingLiU",serif}
+main{max-width:60rem;margin:0 auto;padding:2rem}
+h1{letter-spacing:.3em}
+table{border-collapse:collapse;margin:1rem 0}
+th,td{border:1px solid #a08c78;padding:.3rem .8rem;text-align:center}
+nav ol{padding-left:1.5rem}
+section{margin:2rem 0;line-height:1.9}
+.traditional section{writing-mode:vertical-rl;height:36rem;overflow-x:auto;padding:1rem;
+border:1px solid #a08c78;background:#fffdf9}
+.traditional section h2{margin:0 0 0 1rem}
+.traditional section p{margin:0 0 0 1rem;text-indent:2em}
+.modern section p{text-indent:2em}
+""".strip()
+
+
+def chart_data(bazi_info: Dict) -> Dict:
+    """八字盤中可序列化的字段"""
+    return {field: bazi_info[field] for field in CHART_FIELDS if field in bazi_info}
+
+
+@lru_cache(maxsize=None)
+def labels(locale: str = DEFAULT_LOCALE) -> Dict[str, str]:
+    """報告固定文字（標題、欄位名稱等）-> 指定語系，每個語系只轉換一次"""
+    texts = [REPORT_TITLE, PROFILE_TITLE, '命主', '出生', '性別', '生肖', '日主', '大運', '年齡', '五行',
+             '目錄', '歲', '時'] + [label for _, label in PILLAR_LABELS]
+    return {text: convert(text, locale) for text in texts}
+
+
+def _birth(birth_date, birth_time) -> str:
+    return f"{birth_date.isoformat()} {birth_time.hour:02d}:{birth_time.minute:02d}"
+
+
+def _paragraphs(content: str) -> List[str]:
+    """按換行分段，略去空行"""
+    return [line.strip() for line in content.split('\n') if line.strip()]
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    return str(value)
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=_json_default)
+
+
+def render_json(name: str, bazi_info: Dict, wuxing_analysis: Dict, dayun_list: List[Dict],
+                birth_date, birth_time, gender: str, all_contents: Dict,
+                style: str = 'traditional', locale: str = DEFAULT_LOCALE) -> Iterator[str]:
+    """結構化 JSON：命主資料、八字盤、五行分析、大運及按順序排列的章節
+
+    鍵名及八字盤字段保持不變，locale 只影響標題及章節文字。
+    """
+    locale = normalize_locale(locale)
+    yield (f'{{"title":{_dumps(labels(locale)[REPORT_TITLE])},"locale":{_dumps(locale)},'
+           f'"name":{_dumps(name)},"gender":{_dumps(gender)},'
+           f'"birth":{_dumps(_birth(birth_date, birth_time))},"style":{_dumps(style)},'
+           f'"chart":{_dumps(chart_data(bazi_info))},"wuxing":{_dumps(wuxing_analysis)},'
+           f'"dayun":{_dumps(dayun_list)},"chapters":[')
+    separator = ''
+    for chapter_title, key, content in iter_chapters(all_contents, locale):
+        yield f'{separator}{{"key":{_dumps(key)},"title":{_dumps(chapter_title)},"content":{_dumps(content)}}}'
+        separator = ','
+    yield ']}'
+
+
+def render_markdown(name: str, bazi_info: Dict, wuxing_analysis: Dict, dayun_list: List[Dict],
+                    birth_date, birth_time, gender: str, all_contents: Dict,
+                    style: str = 'traditional', locale: str = DEFAULT_LOCALE) -> Iterator[str]:
+    """Markdown：命主資料、四柱及大運表格，各章節為二級標題"""
+    locale = normalize_locale(locale)
+    t = labels(locale)
+    yield (f"# {t[REPORT_TITLE]}：{name}\n\n## {t[PROFILE_TITLE]}\n\n"
+           f"- {t['出生']}：{birth_date.year}年{birth_date.month}月{birth_date.day}日 "
+           f"{birth_time.hour}{t['時']}{birth_time.minute}分\n"
+           f"- {t['性別']}：{gender}\n- {t['生肖']}：{convert(bazi_info['shengxiao'], locale)}\n"
+           f"- {t['日主']}：{bazi_info['day_master']}\n\n")
+    yield ('| ' + ' | '.join(t[label] for _, label in PILLAR_LABELS) + ' |\n|' + ' --- |' * len(PILLAR_LABELS) +
+           '\n| ' + ' | '.join(bazi_info[field] for field, _ in PILLAR_LABELS) + ' |\n\n')
+    if dayun_list:
+        yield f"| {t['大運']} | {t['年齡']} | {t['五行']} |\n| --- | --- | --- |\n" + ''.join(
+            f"| {dayun['pillar']} | {dayun['start_age']}-{dayun['end_age']}{t['歲']} | {dayun['wuxing']} |\n"
+            for dayun in dayun_list) + '\n'
+    for chapter_title, _, content in iter_chapters(all_contents, locale):
+        yield f"## {chapter_title}\n\n" + '\n\n'.join(_paragraphs(content)) + '\n\n'
+
+
+def render_html(name: str, bazi_info: Dict, wuxing_analysis: Dict, dayun_list: List[Dict],
+                birth_date, birth_time, gender: str, all_contents: Dict,
+                style: str = 'traditional', locale: str = DEFAULT_LOCALE) -> Iterator[str]:
+    """自含樣式的 HTML 頁面，傳統風格正文豎排"""
+    escape = html.escape
+    locale = normalize_locale(locale)
+    t = labels(locale)
+    body_class = 'modern' if style == 'modern' else 'traditional'
+    chapters = list(iter_chapters(all_contents, locale))
+    yield (f'<!DOCTYPE html>\n<html lang="{locale}"><head><meta charset="utf-8">'
+           f'<meta name="viewport" content="width=device-width,initial-scale=1">'
+           f'<title>{t[REPORT_TITLE]}：{escape(name)}</title><style>{HTML_STYLE}</style></head>'
+           f'<body class="{body_class}"><main><h1>{t[REPORT_TITLE]}</h1>')
+    yield (f'<header><h2>{t[PROFILE_TITLE]}</h2><dl>'
+           f'<dt>{t["命主"]}</dt><dd>{escape(name)}</dd>'
+           f'<dt>{t["出生"]}</dt><dd>{birth_date.year}年{birth_date.month}月{birth_date.day}日 '
+           f'{birth_time.hour}{t["時"]}{birth_time.minute}分</dd>'
+           f'<dt>{t["性別"]}</dt><dd>{escape(gender)}</dd>'
+           f'<dt>{t["生肖"]}</dt><dd>{convert(bazi_info["shengxiao"], locale)}</dd>'
+           f'<dt>{t["日主"]}</dt><dd>{bazi_info["day_master"]}</dd></dl>'
+           f'<table><tr>' + ''.join(f'<th>{t[label]}</th>' for _, label in PILLAR_LABELS) + '</tr><tr>' +
+           ''.join(f'<td>{bazi_info[field]}</td>' for field, _ in PILLAR_LABELS) + '</tr></table>')
+    if dayun_list:
+        yield (f'<table><tr><th>{t["大運"]}</th><th>{t["年齡"]}</th><th>{t["五行"]}</th></tr>' + ''.join(
+            f"<tr><td>{dayun['pillar']}</td><td>{dayun['start_age']}-{dayun['end_age']}{t['歲']}</td>"
+            f"<td>{dayun['wuxing']}</td></tr>" for dayun in dayun_list) + '</table>')
+    yield (f'</header><nav><h2>{t["目錄"]}</h2><ol>' + ''.join(
+        f'<li><a href="#{key}">{chapter_title}</a></li>' for chapter_title, key, _ in chapters) + '</ol></nav>')
+    for chapter_title, key, content in chapters:
+        yield (f'<section id="{key}"><h2>{chapter_title}</h2>' +
+               ''.join(f'<p>{escape(paragraph)}</p>' for paragraph in _paragraphs(content)) + '</section>')
+    yield '</main></body></html>\n'
+
+
+RENDERERS = {
+    'json': render_json,
+    'markdown': render_markdown,
+    'html': render_html
+}
+
+
+def render(fmt: str, *args, **kwargs) -> str:
+    """生成完整報告文本，參數同 render_json"""
+    return ''.join(RENDERERS[fmt](*args, **kwargs))
+
+
+def write_report(fmt: str, fp: TextIO, *args, **kwargs) -> int:
+    """把報告逐段寫入文本文件對象，返回寫入的字符數"""
+    written = 0
+    for chunk in RENDERERS[fmt](*args, **kwargs):
+        fp.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def main(argv=None) -> int:
+    """命令行入口：生成文本格式報告"""
+    import argparse
+    import contextlib
+    import io
+    import sys
+    from fortune_teller import EnhancedFortuneTeller
+
+    parser = argparse.ArgumentParser(description='生成 JSON / Markdown / HTML 格式的八字報告')
+    parser.add_argument('name', help='姓名')
+    parser.add_argument('birth_date', help='出生日期 YYYY-MM-DD')
+    parser.add_argument('birth_time', help='出生時間 HH:MM')
+    parser.add_argument('gender', choices=['男', '女'], help='性別')
+    parser.add_argument('--format', default='html', choices=tuple(FORMATS), help='輸出格式')
+    parser.add_argument('--style', default='traditional', choices=('traditional', 'modern'), help='報告風格')
+    parser.add_argument('--locale', default=DEFAULT_LOCALE, type=normalize_locale,
+                        help='輸出語系：zh-Hant（繁體）或 zh-Hans（簡體）')
+    parser.add_argument('--output', help='輸出文件（默認輸出到標準輸出）')
+    args = parser.parse_args(argv)
+
+    try:
+        birth_date = datetime.datetime.strptime(args.birth_date, '%Y-%m-%d').date()
+        birth_time = datetime.datetime.strptime(args.birth_time, '%H:%M').time()
+    except ValueError as e:
+        print(f"日期或時間格式錯誤：{e}")
+        return 1
+
+    teller = EnhancedFortuneTeller(locale=args.locale)
+    # 排盤及內容生成的進度訊息不混入報告輸出
+    with contextlib.redirect_stdout(io.StringIO()):
+        bazi_info, wuxing_analysis, dayun_list = teller.calculate_bazi(birth_date, birth_time, args.gender)
+        all_contents = teller.generate_content(bazi_info, wuxing_analysis, dayun_list, birth_date, args.gender)
+    report_args = (args.name, bazi_info, wuxing_analysis, dayun_list, birth_date, birth_time,
+                   args.gender, all_contents)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            write_report(args.format, f, *report_args, style=args.style, locale=args.locale)
+        print(f"報告已生成：{args.output}")
+    else:
+        write_report(args.format, sys.stdout, *report_args, style=args.style, locale=args.locale)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享內存批量排盤模組
+把批量排盤的輸入及結果列（CHART_SCHEMA）放在 multiprocessing.shared_memory 塊中，
+進程池各工作進程啟動時按塊名稱附加一次，之後每個任務只傳遞 (start, stop) 行號範圍，
+直接讀寫共享數組，不再逐任務序列化 bazi_info、wuxing_analysis、dayun_list
+"""
+
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+from chart_batch import CHART_SCHEMA, compute_columns
+
+# 批量排盤的輸入列
+INPUT_SCHEMA: List[Tuple[str, str]] = [('birth_ordinal', 'int32'), ('birth_minute', 'int16'), ('gender', 'int8')]
+
+# 每個任務的行數
+DEFAULT_CHUNK = 1 << 16
+
+# 各列起始位置按此字節數對齊
+ALIGNMENT = 64
+
+# 工作進程附加的共享塊：名稱 -> SharedColumns
+_ATTACHED: Dict[str, 'SharedColumns'] = {}
+
+
+def _layout(rows: int, schema: Sequence[Tuple[str, str]]) -> Tuple[List[Tuple[str, str, int]], int]:
+    """計算各列在共享塊內的偏移，返回 ([(列名, 類型, 偏移)], 總字節數)"""
+    import numpy as np
+
+    layout, offset = [], 0
+    for name, dtype in schema:
+        layout.append((name, dtype, offset))
+        size = rows * np.dtype(dtype).itemsize
+        offset += -(-size // ALIGNMENT) * ALIGNMENT
+    return layout, max(offset, 1)
+
+
+def chunk_ranges(rows: int, chunk: int = DEFAULT_CHUNK) -> List[Tuple[int, int]]:
+    """把 [0, rows) 切分為 (start, stop) 範圍"""
+    return [(start, min(start + chunk, rows)) for start in range(0, rows, chunk)]
+
+
+class SharedColumns:
+    """共享內存中的一組等長列
+
+    descriptor 為 (塊名稱, 行數, 佈局)，可廉價地傳給其他進程以 attach() 打開。
+    columns 中的數組直接指向共享內存；close() 前須釋放對這些數組的引用。
+    """
+
+    def __init__(self, shm, rows: int, layout: List[Tuple[str, str, int]], owner: bool):
+        import numpy as np
+
+        self.shm = shm
+        self.rows = rows
+        self.layout = layout
+        self.owner = owner
+        self.columns = {name: np.ndarray((rows,), dtype=dtype, buffer=shm.buf, offset=offset)
+                        for name, dtype, offset in layout}
+
+    @classmethod
+    def create(cls, rows: int, schema: Sequence[Tuple[str, str]] = CHART_SCHEMA) -> 'SharedColumns':
+        """分配新的共享塊（內容未初始化）"""
+        from multiprocessing import shared_memory
+
+        layout, size = _layout(rows, schema)
+        return cls(shared_memory.SharedMemory(create=True, size=size), rows, layout, owner=True)
+
+    @classmethod
+    def from_columns(cls, columns: Dict, schema: Sequence[Tuple[str, str]] = CHART_SCHEMA) -> 'SharedColumns':
+        """把現有的列複製進新的共享塊"""
+        rows = len(columns[schema[0][0]])
+        shared = cls.create(rows, schema)
+        for name, _ in schema:
+            shared.columns[name][:] = columns[name]
+        return shared
+
+    @classmethod
+    def attach(cls, descriptor: Tuple) -> 'SharedColumns':
+        """按 descriptor 打開其他進程創建的共享塊
+
+        同一進程樹共用一個 resource_tracker，附加時的重複登記不會導致塊被提前回收。
+        """
+        from multiprocessing import shared_memory
+
+        name, rows, layout = descriptor
+        return cls(shared_memory.SharedMemory(name=name), rows, layout, owner=False)
+
+    @property
+    def descriptor(self) -> Tuple:
+        return self.shm.name, self.rows, self.layout
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, name: str):
+        return self.columns[name]
+
+    def slice(self, start: int, stop: int) -> Dict:
+        """[start, stop) 行的零拷貝視圖"""
+        return {name: column[start:stop] for name, column in self.columns.items()}
+
+    def copy(self) -> Dict:
+        """複製為普通數組（可在 close() 後繼續使用）"""
+        return {name: column.copy() for name, column in self.columns.items()}
+
+    def close(self):
+        """解除映射"""
+        self.columns = {}
+        self.shm.close()
+
+    def unlink(self):
+        """釋放共享塊（只應由創建者調用一次）"""
+        self.shm.unlink()
+
+    def __enter__(self) -> 'SharedColumns':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        if self.owner:
+            self.unlink()
+
+
+def _init_worker(*descriptors):
+    """工作進程初始化：附加共享塊"""
+    for descriptor in descriptors:
+        _ATTACHED[descriptor[0]] = SharedColumns.attach(descriptor)
+
+
+def _compute_range(task: Tuple) -> int:
+    """工作進程：排盤 [start, stop) 行並寫入結果塊"""
+    source, target, start, stop, options = task
+    inputs = _ATTACHED[source].slice(start, stop)
+    result = compute_columns(inputs['birth_ordinal'], inputs['birth_minute'], inputs['gender'], **options)
+    output = _ATTACHED[target].columns
+    for name, _ in CHART_SCHEMA:
+        output[name][start:stop] = result[name]
+    return stop - start
+
+
+def _apply_range(task: Tuple):
+    """工作進程：對 [start, stop) 行的視圖調用 func"""
+    func, name, start, stop = task
+    return func(_ATTACHED[name].slice(start, stop), start, stop)
+
+
+def _pool(processes: int, descriptors: Sequence[Tuple]):
+    import multiprocessing
+
+    return multiprocessing.Pool(processes, initializer=_init_worker, initargs=tuple(descriptors))
+
+
+def compute_shared(ordinals, minutes, genders, processes: int = None, chunk: int = DEFAULT_CHUNK,
+                   **options) -> SharedColumns:
+    """以進程池批量排盤，結果寫入共享塊
+
+    options 傳給 compute_columns。返回的 SharedColumns 由調用者負責 close() 及 unlink()
+    （或用 with 語句），可直接交給 map_ranges 做後續分析。
+    """
+    rows = len(ordinals)
+    inputs = SharedColumns.from_columns(
+        {'birth_ordinal': ordinals, 'birth_minute': minutes, 'gender': genders}, INPUT_SCHEMA)
+    output = SharedColumns.create(rows)
+    try:
+        source, target = inputs.descriptor[0], output.descriptor[0]
+        tasks = [(source, target, start, stop, options) for start, stop in chunk_ranges(rows, chunk)]
+        with _pool(processes, (inputs.descriptor, output.descriptor)) as pool:
+            for _ in pool.imap_unordered(_compute_range, tasks):
+                pass
+    except BaseException:
+        output.close()
+        output.unlink()
+        raise
+    finally:
+        inputs.close()
+        inputs.unlink()
+    return output
+
+
+def map_ranges(func: Callable, shared: SharedColumns, chunk: int = DEFAULT_CHUNK,
+               processes: int = None) -> Iterator:
+    """在進程池中按範圍處理共享列，按順序逐個返回 func(視圖, start, stop) 的結果
+
+    func 須為模組級函數（按名稱傳給工作進程），視圖為 {列名: 零拷貝數組}。
+    """
+    name = shared.descriptor[0]
+    tasks = [(func, name, start, stop) for start, stop in chunk_ranges(len(shared), chunk)]
+    with _pool(processes, (shared.descriptor,)) as pool:
+        yield from pool.imap(_apply_range, tasks)
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+神煞模組
+每顆神煞定義為「起例干支 -> 12位地支掩碼」的查表規則，
+檢測時以整數位運算比對四柱地支，並提供 NumPy 批量檢測
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+from shishen import chart_codes
+
+PILLAR_NAMES = ('年柱', '月柱', '日柱', '時柱')
+
+# 起例來源：(類型, 柱位)，類型 'stem' 取天干、'branch' 取地支
+YEAR_STEM = ('stem', 0)
+DAY_STEM = ('stem', 2)
+YEAR_BRANCH = ('branch', 0)
+MONTH_BRANCH = ('branch', 1)
+DAY_BRANCH = ('branch', 2)
+
+
+def branch_mask(*branches: int) -> int:
+    """地支序號 -> 12位掩碼（子=第0位）"""
+    mask = 0
+    for zhi in branches:
+        mask |= 1 << zhi
+    return mask
+
+
+def _by_stem(targets: Sequence[Sequence[int]]) -> Tuple[int, ...]:
+    """按十天干列出目標地支，生成掩碼表"""
+    return tuple(branch_mask(*zhi) for zhi in targets)
+
+
+def _by_sanhe(water: int, fire: int, metal: int, wood: int) -> Tuple[int, ...]:
+    """按三合局（申子辰、寅午戌、巳酉丑、亥卯未）取目標地支，生成掩碼表"""
+    group_target = {8: water, 0: water, 4: water,
+                    2: fire, 6: fire, 10: fire,
+                    5: metal, 9: metal, 1: metal,
+                    11: wood, 3: wood, 7: wood}
+    return tuple(branch_mask(group_target[zhi]) for zhi in range(12))
+
+
+def _by_season(targets: Sequence[int]) -> Tuple[int, ...]:
+    """按四季（亥子丑、寅卯辰、巳午未、申酉戌）取目標地支，生成掩碼表"""
+    return tuple(branch_mask(targets[((zhi + 1) % 12) // 3]) for zhi in range(12))
+
+
+def _by_offset(offset: int, sign: int = 1) -> Tuple[int, ...]:
+    """目標地支 = (offset + sign × 起例地支) mod 12"""
+    return tuple(branch_mask((offset + sign * zhi) % 12) for zhi in range(12))
+
+
+# 神煞定義：名稱 -> (吉凶, 起例來源, 掩碼表)
+SHENSHA_RULES: Dict[str, Tuple[str, Tuple[Tuple[str, int], ...], Tuple[int, ...]]] = {
+    # 甲戊庚牛羊，乙己鼠猴鄉，丙丁豬雞位，壬癸兔蛇藏，六辛逢馬虎
+    '天乙貴人': ('吉', (DAY_STEM, YEAR_STEM), _by_stem(
+        [(1, 7), (0, 8), (11, 9), (11, 9), (1, 7), (0, 8), (1, 7), (6, 2), (3, 5), (3, 5)])),
+    '太極貴人': ('吉', (DAY_STEM, YEAR_STEM), _by_stem(
+        [(0, 6), (0, 6), (3, 9), (3, 9), (4, 10, 1, 7), (4, 10, 1, 7), (2, 11), (2, 11), (5, 8), (5, 8)])),
+    '文昌': ('吉', (DAY_STEM, YEAR_STEM), _by_stem(
+        [(5,), (6,), (8,), (9,), (8,), (9,), (11,), (0,), (2,), (3,)])),
+    '祿神': ('吉', (DAY_STEM,), _by_stem(
+        [(2,), (3,), (5,), (6,), (5,), (6,), (8,), (9,), (11,), (0,)])),
+    '金輿': ('吉', (DAY_STEM,), _by_stem(
+        [(4,), (5,), (7,), (8,), (7,), (8,), (10,), (11,), (1,), (2,)])),
+    '國印貴人': ('吉', (DAY_STEM, YEAR_STEM), _by_stem(
+        [(10,), (11,), (1,), (2,), (1,), (2,), (4,), (5,), (7,), (8,)])),
+    '羊刃': ('凶', (DAY_STEM,), _by_stem(
+        [(3,), (4,), (6,), (7,), (6,), (7,), (9,), (10,), (0,), (1,)])),
+    '紅艷': ('凶', (DAY_STEM,), _by_stem(
+        [(6,), (8,), (2,), (7,), (4,), (4,), (10,), (9,), (0,), (8,)])),
+    '桃花': ('中', (DAY_BRANCH, YEAR_BRANCH), _by_sanhe(9, 3, 6, 0)),
+    '驛馬': ('中', (DAY_BRANCH, YEAR_BRANCH), _by_sanhe(2, 8, 11, 5)),
+    '華蓋': ('中', (DAY_BRANCH, YEAR_BRANCH), _by_sanhe(4, 10, 1, 7)),
+    '將星': ('吉', (DAY_BRANCH, YEAR_BRANCH), _by_sanhe(0, 6, 9, 3)),
+    '劫煞': ('凶', (DAY_BRANCH, YEAR_BRANCH), _by_sanhe(5, 11, 2, 8)),
+    '亡神': ('凶', (DAY_BRANCH, YEAR_BRANCH), _by_sanhe(11, 5, 8, 2)),
+    '災煞': ('凶', (YEAR_BRANCH,), _by_sanhe(6, 0, 3, 9)),
+    '孤辰': ('凶', (YEAR_BRANCH,), _by_season((2, 5, 8, 11))),
+    '寡宿': ('凶', (YEAR_BRANCH,), _by_season((10, 1, 4, 7))),
+    '紅鸞': ('吉', (YEAR_BRANCH,), _by_offset(3, -1)),
+    '天喜': ('吉', (YEAR_BRANCH,), _by_offset(9, -1)),
+    '天醫': ('吉', (MONTH_BRANCH,), _by_offset(-1)),
+    '喪門': ('凶', (YEAR_BRANCH,), _by_offset(2)),
+    '弔客': ('凶', (YEAR_BRANCH,), _by_offset(-2)),
+}
+
+SHENSHA_NAMES = list(SHENSHA_RULES)
+
+SHENSHA_DESCRIPTIONS = {
+    '天乙貴人': '逢凶化吉，一生多得貴人扶持，遇困難時常有人相助',
+    '太極貴人': '聰明好學，喜鑽研玄理哲學，晚運福澤深厚',
+    '文昌': '氣質清秀，利於讀書考試，文筆出眾',
+    '祿神': '衣祿豐足，一生不缺溫飽，工作收入穩定',
+    '金輿': '性情溫和，利於婚姻，出入有車馬之福',
+    '國印貴人': '為人誠實可靠，利於公職及掌權管理',
+    '羊刃': '性格剛強果決，做事有魄力，但宜防衝動及意外損傷',
+    '紅艷': '風流多情，異性緣重，宜注意感情分寸',
+    '桃花': '人緣佳、有魅力，異性緣旺，宜把握分寸',
+    '驛馬': '一生多奔波變動，利於出行、外派及遷移發展',
+    '華蓋': '聰慧而喜清靜，有藝術及宗教天賦，略帶孤高',
+    '將星': '有領導才能，能服眾，利於掌權',
+    '劫煞': '做事果斷但易招是非破耗，理財宜保守',
+    '亡神': '城府較深，宜防小人暗算及口舌是非',
+    '災煞': '宜注意出行安全及突發災禍，凡事多加謹慎',
+    '孤辰': '性格獨立，六親緣分較薄，宜多與家人溝通',
+    '寡宿': '內心較孤獨，感情上宜主動經營',
+    '紅鸞': '婚姻喜慶之星，利於戀愛結婚',
+    '天喜': '主喜慶之事，性情開朗，利於婚嫁添丁',
+    '天醫': '宜從事醫療、養生相關工作，身體恢復能力強',
+    '喪門': '宜注意家中長輩健康，少涉喪事場合',
+    '弔客': '宜防意外之憂，凡事多留心',
+}
+
+
+def _pillar_hits(mask: int, branches: Sequence[int], skip: int = -1) -> int:
+    """掩碼命中的柱位（4位，年柱=第0位）"""
+    hits = 0
+    for pos, zhi in enumerate(branches):
+        if pos != skip and mask >> zhi & 1:
+            hits |= 1 << pos
+    return hits
+
+
+def detect(stems: Sequence[int], branches: Sequence[int]) -> Dict[str, int]:
+    """檢測四柱神煞
+
+    stems、branches 為四柱干支序號。返回 {神煞名: 柱位掩碼}，只含命中者。
+    以地支起例時不計起例柱本身。
+    """
+    present = branch_mask(*branches)
+    found = {}
+    for name, (_, sources, table) in SHENSHA_RULES.items():
+        hits = 0
+        for kind, pos in sources:
+            if kind == 'stem':
+                mask = table[stems[pos]]
+                if mask & present:
+                    hits |= _pillar_hits(mask, branches)
+            else:
+                mask = table[branches[pos]]
+                if mask & present:
+                    hits |= _pillar_hits(mask, branches, pos)
+        if hits:
+            found[name] = hits
+    return found
+
+
+def pillar_names(hits: int) -> List[str]:
+    """柱位掩碼 -> 柱名列表"""
+    return [PILLAR_NAMES[pos] for pos in range(4) if hits >> pos & 1]
+
+
+def chart_shensha(bazi_info: Dict) -> List[Dict]:
+    """檢測八字神煞，按 SHENSHA_RULES 順序返回名稱、吉凶及所在柱位"""
+    stems, branches = chart_codes(bazi_info)
+    return [
+        {'name': name, 'nature': SHENSHA_RULES[name][0], 'pillars': pillar_names(hits)}
+        for name, hits in detect(stems, branches).items()
+    ]
+
+
+@lru_cache(maxsize=None)
+def _numpy_tables():
+    """NumPy 版規則表：[(起例類型, 柱位, 掩碼數組, 神煞下標), ...]"""
+    import numpy as np
+
+    return [
+        (kind, pos, np.asarray(table, dtype=np.int64), index)
+        for index, (_, sources, table) in enumerate(SHENSHA_RULES.values())
+        for kind, pos in sources
+    ]
+
+
+def batch_detect(stem_codes, branch_codes):
+    """批量檢測神煞
+
+    stem_codes、branch_codes 為 (N, 4) 干支序號，返回 (N, 神煞數) 的柱位掩碼數組，
+    列順序與 SHENSHA_NAMES 相同，0 表示未命中。
+    """
+    import numpy as np
+
+    stems = np.asarray(stem_codes, dtype=np.intp)
+    branches = np.asarray(branch_codes, dtype=np.intp)
+    result = np.zeros((len(stems), len(SHENSHA_RULES)), dtype=np.uint8)
+    pillar_bits = np.array([1, 2, 4, 8], dtype=np.uint8)
+    for kind, pos, table, index in _numpy_tables():
+        if kind == 'stem':
+            masks = table[stems[:, pos]]
+        else:
+            masks = table[branches[:, pos]]
+        hit = (masks[:, None] >> branches) & 1
+        if kind == 'branch':
+            hit[:, pos] = 0
+        result[:, index] |= (hit.astype(np.uint8) * pillar_bits).sum(axis=1, dtype=np.uint8)
+    return result
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+十神計算模組
+以預先計算的10×10天干關係表推算各干（含地支藏干）與日主的十神關係
+"""
+
+from functools import lru_cache
+from typing import Dict, Sequence, Tuple
+from bazi_calculator import BaziCalculator
+
+# 十神名稱，序號即查表結果
+TEN_GODS = ['比肩', '劫財', '食神', '傷官', '偏財', '正財', '七殺', '正官', '偏印', '正印']
+
+BIJIAN, JIECAI, SHISHEN, SHANGGUAN, PIANCAI, ZHENGCAI, QISHA, ZHENGGUAN, PIANYIN, ZHENGYIN = range(10)
+
+
+def _build_ten_god_table() -> Tuple[Tuple[int, ...], ...]:
+    """建立十神表：TEN_GOD_TABLE[日干][他干] -> 十神序號
+
+    五行序號為天干序號整除2（木火土金水），陰陽為天干序號奇偶。
+    他干五行相對日主：同我、我生、我克、克我、生我，依次為比劫、食傷、
+    財、官殺、印；同陰陽取前者（比肩、食神、偏財、七殺、偏印）。
+    """
+    table = []
+    for day_gan in range(10):
+        row = []
+        for other in range(10):
+            relation = (other // 2 - day_gan // 2) % 5
+            row.append(relation * 2 + (0 if other % 2 == day_gan % 2 else 1))
+        table.append(tuple(row))
+    return tuple(table)
+
+
+TEN_GOD_TABLE = _build_ten_god_table()
+
+# 地支藏干序號：BRANCH_HIDDEN_STEMS[地支] -> 藏干天干序號
+BRANCH_HIDDEN_STEMS = tuple(
+    tuple(BaziCalculator.TIANGAN.index(gan) for gan in BaziCalculator.CANGGAN[zhi])
+    for zhi in BaziCalculator.DIZHI
+)
+
+# 地支十神計數：BRANCH_TEN_GOD_COUNTS[日干][地支] -> 長度10的計數
+BRANCH_TEN_GOD_COUNTS = tuple(
+    tuple(
+        tuple(sum(1 for gan in hidden if TEN_GOD_TABLE[day_gan][gan] == god) for god in range(10))
+        for hidden in BRANCH_HIDDEN_STEMS
+    )
+    for day_gan in range(10)
+)
+
+
+def ten_god(day_gan: int, other_gan: int) -> int:
+    """查詢單個天干相對日主的十神序號"""
+    return TEN_GOD_TABLE[day_gan][other_gan]
+
+
+def chart_codes(bazi_info: Dict) -> Tuple[Sequence[int], Sequence[int]]:
+    """獲取八字的干支序號"""
+    if 'tiangan_codes' in bazi_info:
+        return bazi_info['tiangan_codes'], bazi_info['dizhi_codes']
+    return ([BaziCalculator.TIANGAN.index(g) for g in bazi_info['tiangan']],
+            [BaziCalculator.DIZHI.index(z) for z in bazi_info['dizhi']])
+
+
+def ten_god_counts(bazi_info: Dict) -> Tuple[int, ...]:
+    """統計八字中各十神出現次數
+
+    計入年、月、時三干（日干即日主本身不計）及四支全部藏干，
+    返回長度10的元組，序號對應 TEN_GODS。
+    """
+    stems, branches = chart_codes(bazi_info)
+    day_gan = stems[2]
+    god_row = TEN_GOD_TABLE[day_gan]
+    branch_rows = BRANCH_TEN_GOD_COUNTS[day_gan]
+
+    counts = [0] * 10
+    counts[god_row[stems[0]]] += 1
+    counts[god_row[stems[1]]] += 1
+    counts[god_row[stems[3]]] += 1
+    for zhi in branches:
+        row = branch_rows[zhi]
+        for god in range(10):
+            counts[god] += row[god]
+    return tuple(counts)
+
+
+@lru_cache(maxsize=None)
+def _numpy_tables():
+    """NumPy 版查表數據，首次批量計算時建立"""
+    import numpy as np
+
+    # stem_onehot[日干][他干] -> 十神 one-hot 向量
+    stem_onehot = np.eye(10, dtype=np.int16)[np.asarray(TEN_GOD_TABLE)]
+    branch_counts = np.asarray(BRANCH_TEN_GOD_COUNTS, dtype=np.int16)
+    return stem_onehot, branch_counts
+
+
+def batch_ten_god_counts(stem_codes, branch_codes):
+    """批量統計十神
+
+    stem_codes、branch_codes 為形狀 (N, 4) 的整數數組（年、月、日、時），
+    返回形狀 (N, 10) 的計數數組。
+    """
+    import numpy as np
+
+    stem_onehot, branch_counts = _numpy_tables()
+    stems = np.asarray(stem_codes, dtype=np.intp)
+    branches = np.asarray(branch_codes, dtype=np.intp)
+    day_gan = stems[:, 2:3]
+
+    counts = stem_onehot[day_gan, stems[:, [0, 1, 3]]].sum(axis=1)
+    counts += branch_counts[day_gan, branches].sum(axis=1)
+    return counts
+
+
+def dominant(counts: Sequence[int], candidates: Sequence[int]) -> int:
+    """在候選十神中取出現次數最多者，全為0時返回-1；並列時取靠前者"""
+    best = -1
+    best_count = 0
+    for god in candidates:
+        if counts[god] > best_count:
+            best = god
+            best_count = counts[god]
+    return best
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+真太陽時模組
+按出生地經度及時區把鐘錶時間換算為真太陽時：扣除時區偏移（含夏令時），
+加上經度時差及均時差。均時差按日預先算表，時區偏移按時區緩存
+"""
+
+import datetime
+import math
+from functools import lru_cache
+from typing import Optional, Tuple
+
+# 未指定時區時，鐘錶時間按北京時間（含1986–1991年夏令時）處理
+DEFAULT_TIMEZONE = 'Asia/Shanghai'
+
+# 經度每度相差4分鐘
+MINUTES_PER_DEGREE = 4.0
+
+# 時區偏移表覆蓋範圍，與干支曆表一致
+TABLE_START = datetime.date(1900, 1, 1)
+TABLE_END = datetime.date(2100, 12, 31)
+
+
+def _equation_of_time(day_of_year: int) -> float:
+    """均時差（分鐘），Spencer 1971 傅里葉近似，誤差約半分鐘"""
+    b = 2 * math.pi * (day_of_year - 1) / 365
+    return 229.18 * (0.000075 + 0.001868 * math.cos(b) - 0.032077 * math.sin(b)
+                     - 0.014615 * math.cos(2 * b) - 0.040849 * math.sin(2 * b))
+
+
+# 均時差表：EQUATION_OF_TIME[年內第幾日 - 1] -> 分鐘
+EQUATION_OF_TIME = tuple(_equation_of_time(n) for n in range(1, 367))
+
+
+@lru_cache(maxsize=None)
+def _zone(name: str):
+    """按名稱獲取時區對象（延遲導入 zoneinfo）"""
+    from zoneinfo import ZoneInfo
+
+    return ZoneInfo(name)
+
+
+@lru_cache(maxsize=65536)
+def zone_offset(name: str, ordinal: int, minute: int) -> Tuple[int, int]:
+    """當地鐘錶時間的 (UTC偏移, 夏令時偏移)，單位分鐘
+
+    ordinal 為公曆序數，minute 為當日第幾分鐘。重複時刻取較早的一次。
+    """
+    moment = datetime.datetime.fromordinal(ordinal) + datetime.timedelta(minutes=minute)
+    moment = moment.replace(tzinfo=_zone(name))
+    dst = moment.dst() or datetime.timedelta(0)
+    return int(moment.utcoffset().total_seconds()) // 60, int(dst.total_seconds()) // 60
+
+
+def _correction(ordinal: int, minute: int, longitude: Optional[float], timezone: str) -> float:
+    """鐘錶時間 -> 真太陽時的修正量（分鐘）"""
+    offset, dst = zone_offset(timezone, ordinal, minute)
+    if longitude is None:
+        # 無經度時以時區標準經線為準，只扣除夏令時及均時差
+        longitude = (offset - dst) / MINUTES_PER_DEGREE
+    day_of_year = datetime.date.fromordinal(ordinal).timetuple().tm_yday
+    return longitude * MINUTES_PER_DEGREE - offset + EQUATION_OF_TIME[day_of_year - 1]
+
+
+def true_solar_time(local: datetime.datetime, longitude: Optional[float] = None,
+                    timezone: Optional[str] = None) -> datetime.datetime:
+    """把出生地鐘錶時間換算為真太陽時
+
+    longitude: 出生地經度（東經為正），省略時取時區標準經線
+    timezone: IANA 時區名稱，省略時為北京時間
+    """
+    timezone = timezone or DEFAULT_TIMEZONE
+    minute = local.hour * 60 + local.minute
+    correction = _correction(local.toordinal(), minute, longitude, timezone)
+    return local + datetime.timedelta(minutes=correction)
+
+
+@lru_cache(maxsize=None)
+def _zone_day_table(name: str):
+    """時區逐日偏移表：(日初偏移, 日末偏移, 日初夏令時偏移)，單位分鐘
+
+    日末偏移取次日零時的偏移；與日初不同的日子為切換日（零時切換的前一日
+    亦計入，只是多查幾次），該日的記錄須逐個精確查詢。
+    """
+    import numpy as np
+
+    start, end = TABLE_START.toordinal(), TABLE_END.toordinal()
+    offsets = np.array([zone_offset.__wrapped__(name, ordinal, 0)
+                        for ordinal in range(start, end + 2)], dtype=np.int16)
+    return offsets[:-1, 0], offsets[1:, 0], offsets[:-1, 1]
+
+
+@lru_cache(maxsize=None)
+def _numpy_equation_of_time():
+    """NumPy 版均時差表"""
+    import numpy as np
+
+    return np.asarray(EQUATION_OF_TIME)
+
+
+def batch_true_solar_time(ordinals, minutes, longitudes=None, timezones=None):
+    """批量換算真太陽時
+
+    ordinals 為公曆序數數組，minutes 為當日第幾分鐘；longitudes 為經度數組
+    或單值（NaN 表示未知），timezones 為時區名稱數組或單值。
+    時區只解析一次，偏移取自逐日表，僅夏令時切換日逐個查詢。
+    返回換算後的 (ordinals, minutes) 數組，minutes 在 [0, 1440) 內。
+    """
+    import numpy as np
+
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    minutes = np.asarray(minutes, dtype=np.int64)
+    n = len(ordinals)
+    index = ordinals - TABLE_START.toordinal()
+    if n and (index.min() < 0 or index.max() > TABLE_END.toordinal() - TABLE_START.toordinal()):
+        raise ValueError("日期超出時區偏移表範圍")
+
+    if longitudes is None:
+        longitudes = np.full(n, np.nan)
+    longitudes = np.broadcast_to(np.asarray(longitudes, dtype=np.float64), (n,))
+    if timezones is None:
+        timezones = DEFAULT_TIMEZONE
+    zone_names, zone_ids = np.unique(np.broadcast_to(np.asarray(timezones), (n,)), return_inverse=True)
+    zone_ids = zone_ids.reshape(-1)
+
+    offset = np.empty(n, dtype=np.int64)
+    dst = np.empty(n, dtype=np.int64)
+    for zone_id, name in enumerate(zone_names.tolist()):
+        rows = np.flatnonzero(zone_ids == zone_id)
+        first, last, first_dst = _zone_day_table(name)
+        days = index[rows]
+        offset[rows] = first[days]
+        dst[rows] = first_dst[days]
+        # 切換日：按（日期, 分鐘）去重後逐個精確查詢
+        switching = rows[first[days] != last[days]]
+        if len(switching):
+            keys, inverse = np.unique(ordinals[switching] * 1440 + minutes[switching], return_inverse=True)
+            exact = np.array([zone_offset(name, int(k) // 1440, int(k) % 1440) for k in keys.tolist()])
+            offset[switching] = exact[inverse.reshape(-1), 0]
+            dst[switching] = exact[inverse.reshape(-1), 1]
+
+    longitudes = np.where(np.isnan(longitudes), (offset - dst) / MINUTES_PER_DEGREE, longitudes)
+    day_of_year = ordinals - _jan_first_ordinals(ordinals)
+    correction = (longitudes * MINUTES_PER_DEGREE - offset +
+                  _numpy_equation_of_time()[day_of_year])
+    total = ordinals * 1440 + minutes + np.floor(correction).astype(np.int64)
+    return total // 1440, total % 1440
+
+
+def _jan_first_ordinals(ordinals):
+    """各公曆序數所在年份元旦的公曆序數"""
+    import numpy as np
+
+    epoch = datetime.date(1970, 1, 1).toordinal()
+    dates = (ordinals - epoch).astype('datetime64[D]')
+    years = dates.astype('datetime64[Y]')
+    return years.astype('datetime64[D]').astype(np.int64) + epoch
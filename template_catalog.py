@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+內容模板目錄模組
+內容模板保存在外部 JSON 文件（{"version": 版本標記, "templates": {...}}），
+按語系轉換後編譯為二進制緩存（marshal），以內存映射讀取，同一台機器上的工作進程共用；
+模板文件更新後自動重新加載，新版本完整建立並通過檢查後才替換，進行中的報告繼續使用原版本
+"""
+
+import hashlib
+import json
+import marshal
+import mmap
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+from zh_convert import (CHARACTER_PAIRS, DEFAULT_LOCALE, LOCALES, PHRASES, convert, convert_data,
+                        normalize_locale)
+
+# 默認模板文件及二進制緩存目錄（可由 ASKBAZI_TEMPLATES / ASKBAZI_TEMPLATE_CACHE 指定）
+DEFAULT_TEMPLATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                     'templates', 'content_templates.json')
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'askbazi_templates')
+
+# 緩存文件格式：文件頭 + marshal 序列化的模板字典；格式變化時遞增
+CACHE_FORMAT = 1
+CACHE_MAGIC = b'ABZT%d\n' % CACHE_FORMAT
+
+# 檢查模板文件是否更新的最短間隔（秒）
+DEFAULT_CHECK_INTERVAL = 1.0
+
+
+class TemplateError(ValueError):
+    """模板文件格式錯誤"""
+
+
+def parse_templates(source: bytes) -> Dict:
+    """解析模板文件內容並檢查頂層結構，返回 {'version': ..., 'templates': {...}}"""
+    try:
+        document = json.loads(source.decode('utf-8'))
+    except (UnicodeDecodeError, ValueError) as e:
+        raise TemplateError(f"模板文件無法解析：{e}") from e
+    if not isinstance(document, dict) or not isinstance(document.get('version'), str):
+        raise TemplateError("模板文件缺少版本標記 version")
+    templates = document.get('templates')
+    if not isinstance(templates, dict):
+        raise TemplateError("模板文件缺少 templates")
+    return document
+
+
+class _Snapshot:
+    """某一版本模板文件的狀態：文件標記、內容雜湊及各語系已加載的模板"""
+
+    __slots__ = ('stamp', 'digest', 'source', 'version', 'locales')
+
+    def __init__(self, stamp: tuple, digest: str, source: bytes, version: str, locales: Dict[str, Dict]):
+        self.stamp = stamp
+        self.digest = digest
+        self.source = source
+        self.version = version
+        self.locales = locales
+
+
+class TemplateCatalog:
+    """內容模板目錄
+
+    templates(locale) 返回該語系當前版本的模板字典（只讀共用，勿就地修改）。
+    每個語系的模板首次使用時從二進制緩存加載，緩存不存在時解析 JSON、轉換語系並寫入緩存；
+    緩存文件名由模板內容、語系及編譯參數的雜湊決定，不同版本互不覆蓋，多個進程同時編譯也無衝突。
+    每個語系的模板（包括從緩存讀取的）都先經 validate 檢查，不通過時整個版本不被採用。
+    """
+
+    def __init__(self, path: str = DEFAULT_TEMPLATE_FILE, cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 check_interval: float = DEFAULT_CHECK_INTERVAL,
+                 terms: Optional[Callable[[], Iterable[str]]] = None,
+                 validate: Optional[Callable[[Dict], None]] = None):
+        """初始化模板目錄
+
+        path: 模板 JSON 文件
+        cache_dir: 二進制緩存目錄，為 None 時只在內存中編譯
+        check_interval: 檢查模板文件更新的最短間隔（秒），為 None 時不自動重新加載
+        terms: 返回其他模組名稱（神煞、柱位等）的函數，編譯時一併轉換為 templates['terms']
+        validate: 檢查模板字典的函數，內容不符使用方要求時拋出 ValueError
+        """
+        self.path = path
+        self.cache_dir = cache_dir
+        self.check_interval = check_interval
+        self._terms = terms
+        self._validate = validate
+        self._tables_digest = None
+        self._lock = threading.Lock()
+        self._snapshot: Optional[_Snapshot] = None
+        self._next_check = 0.0
+        self.cache_hits = 0
+        self.compiles = 0
+        self.reloads = 0
+
+    @property
+    def version(self) -> str:
+        """當前模板版本標記"""
+        return self._current().version
+
+    def templates(self, locale: str = DEFAULT_LOCALE) -> Dict:
+        """指定語系的當前模板"""
+        locale = normalize_locale(locale)
+        snapshot = self._current()
+        templates = snapshot.locales.get(locale)
+        if templates is None:
+            with self._lock:
+                templates = snapshot.locales.get(locale)
+                if templates is None:
+                    templates = self._build(snapshot.source, snapshot.digest, [locale])[locale]
+                    snapshot.locales[locale] = templates
+        return templates
+
+    def check(self) -> bool:
+        """檢查模板文件是否更新，有更新時重新加載，返回是否換用了新版本"""
+        snapshot = self._snapshot
+        try:
+            stamp = self._stamp()
+        except OSError as e:
+            if snapshot is None:
+                raise
+            print(f"模板文件無法讀取，繼續使用版本 {snapshot.version}：{e}")
+            return False
+        if snapshot is not None and stamp == snapshot.stamp:
+            return False
+        return self.reload()
+
+    def reload(self) -> bool:
+        """重新讀取模板文件，返回是否換用了新版本
+
+        已加載的語系全部在新版本下建立完成後才替換；新文件有錯誤時保留原版本。
+        """
+        with self._lock:
+            stamp = self._stamp()
+            with open(self.path, 'rb') as f:
+                source = f.read()
+            digest = hashlib.sha256(source).hexdigest()
+            old = self._snapshot
+            if old is not None and digest == old.digest:
+                old.stamp = stamp
+                return False
+
+            locales = list(old.locales) if old is not None else [DEFAULT_LOCALE]
+            try:
+                built = self._build(source, digest, locales)
+                version = built[locales[0]]['version']
+            except TemplateError as e:
+                if old is None:
+                    raise
+                old.stamp = stamp  # 文件再次修改前不再重試
+                print(f"模板文件有誤，繼續使用版本 {old.version}：{e}")
+                return False
+
+            self._snapshot = _Snapshot(stamp, digest, source, version, built)
+            if old is not None:
+                self.reloads += 1
+                print(f"內容模板已更新：{old.version} -> {version}")
+            return True
+
+    def compile_all(self, locales: Iterable[str] = LOCALES) -> Dict[str, str]:
+        """為各語系預先建立二進制緩存（部署時使用），返回 {語系: 緩存文件}"""
+        snapshot = self._current()
+        for locale in locales:
+            self.templates(locale)
+        return {locale: self._cache_path(snapshot.digest, locale) for locale in locales}
+
+    def stats(self) -> Dict:
+        """獲取加載統計"""
+        snapshot = self._snapshot
+        return {
+            'version': snapshot.version if snapshot else None,
+            'locales': sorted(snapshot.locales) if snapshot else [],
+            'cache_hits': self.cache_hits,
+            'compiles': self.compiles,
+            'reloads': self.reloads
+        }
+
+    def _current(self) -> _Snapshot:
+        """當前版本，到達檢查間隔時先檢查文件是否更新"""
+        if self._snapshot is None:
+            self.check()
+        elif self.check_interval is not None:
+            now = time.monotonic()
+            if now >= self._next_check:
+                self._next_check = now + self.check_interval
+                self.check()
+        return self._snapshot
+
+    def _stamp(self) -> tuple:
+        """模板文件標記：修改時間及大小"""
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def _term_list(self) -> List[str]:
+        return list(self._terms()) if self._terms else []
+
+    def _cache_path(self, digest: str, locale: str) -> Optional[str]:
+        """緩存文件路徑：模板內容、語系、名稱表、轉換字表詞表及編譯參數的雜湊"""
+        if not self.cache_dir:
+            return None
+        if self._tables_digest is None:
+            payload = json.dumps([self._term_list(), CHARACTER_PAIRS, PHRASES], ensure_ascii=False, sort_keys=True)
+            self._tables_digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+        key = hashlib.sha256('|'.join((
+            str(CACHE_FORMAT), str(marshal.version), sys.implementation.cache_tag,
+            locale, digest, self._tables_digest
+        )).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key[:32]}.bin")
+
+    def _build(self, source: bytes, digest: str, locales: List[str]) -> Dict[str, Dict]:
+        """加載或編譯並檢查各語系模板，JSON 只在緩存未命中時解析一次"""
+        document = None
+        built = {}
+        for locale in locales:
+            path = self._cache_path(digest, locale)
+            templates = _read_cache(path) if path else None
+            if templates is not None:
+                self._check_templates(templates, locale)
+                self.cache_hits += 1
+            else:
+                if document is None:
+                    document = parse_templates(source)
+                templates = self._compile(document, locale)
+                self._check_templates(templates, locale)
+                self.compiles += 1
+                if path:
+                    _write_cache(path, templates)
+            built[locale] = templates
+        return built
+
+    def _compile(self, document: Dict, locale: str) -> Dict:
+        """模板原文 -> 指定語系的模板字典，附版本標記及名稱表譯文"""
+        templates = convert_data(document['templates'], locale)
+        templates['version'] = document['version']
+        templates['terms'] = {term: convert(term, locale) for term in self._term_list()}
+        return templates
+
+    def _check_templates(self, templates: Dict, locale: str):
+        """以 validate 檢查模板，不通過時拋出 TemplateError"""
+        if self._validate is None:
+            return
+        try:
+            self._validate(templates)
+        except ValueError as e:
+            raise TemplateError(f"{locale} 模板不符要求：{e}") from e
+
+
+def _read_cache(path: str) -> Optional[Dict]:
+    """以內存映射讀取緩存文件，文件不存在或格式不符時返回None"""
+    try:
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm[:len(CACHE_MAGIC)] != CACHE_MAGIC:
+                    return None
+                with memoryview(mm) as view:
+                    return marshal.loads(view[len(CACHE_MAGIC):])
+    except (OSError, ValueError, EOFError, TypeError):
+        return None
+
+
+def _write_cache(path: str, templates: Dict):
+    """寫入緩存文件：先寫臨時文件再替換，避免並行進程讀到半寫入的文件"""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(CACHE_MAGIC)
+            marshal.dump(templates, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"模板緩存寫入失敗（僅在內存中使用）：{e}")
+
+
+def main(argv=None) -> int:
+    """命令行入口：檢查模板文件並預先編譯各語系緩存"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='檢查內容模板文件並編譯二進制緩存')
+    parser.add_argument('--templates', default=os.environ.get('ASKBAZI_TEMPLATES', DEFAULT_TEMPLATE_FILE),
+                        help='模板 JSON 文件')
+    parser.add_argument('--cache-dir', default=os.environ.get('ASKBAZI_TEMPLATE_CACHE', DEFAULT_CACHE_DIR),
+                        help='二進制緩存目錄')
+    args = parser.parse_args(argv)
+
+    from content_generator import external_terms, validate_templates
+
+    catalog = TemplateCatalog(args.templates, args.cache_dir, check_interval=None, terms=external_terms,
+                              validate=validate_templates)
+    try:
+        paths = catalog.compile_all()
+    except (OSError, TemplateError) as e:
+        print(f"模板編譯失敗：{e}")
+        return 1
+    print(f"模板版本：{catalog.version}")
+    for locale, path in paths.items():
+        print(f"{locale}：{path}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""批量重繪：同名客戶各自生成報告文件及記錄（python -m pytest 在倉庫根目錄運行）"""
+
+import datetime
+import os
+
+from chart_store import ChartStore
+from job_queue import JobQueue, ReportWorker, _enqueue_store
+
+
+def test_rerender_same_name_customers_get_distinct_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store_path = str(tmp_path / 'charts.db')
+    queue_path = str(tmp_path / 'jobs.db')
+    monkeypatch.setenv('ASKBAZI_DB', store_path)
+
+    with ChartStore(store_path) as store:
+        store.add_customer('王偉', '男', datetime.date(1985, 5, 29), datetime.time(14, 5))
+        store.add_customer('王偉', '男', datetime.date(1990, 3, 12), datetime.time(8, 30))
+
+    with JobQueue(queue_path) as queue:
+        assert _enqueue_store(queue, store_path, 'traditional') == 2
+
+    worker = ReportWorker(queue_path, heartbeat_interval=60.0)
+    try:
+        assert worker.run(stop_when_empty=True) == 2
+    finally:
+        worker.close()
+
+    with JobQueue(queue_path) as queue:
+        assert queue.stats()['counts']['bulk']['done'] == 2
+
+    files = sorted(name for name in os.listdir(tmp_path) if name.endswith('.pdf'))
+    assert len(files) == 2
+
+    with ChartStore(store_path) as store:
+        rows = store.conn.execute('SELECT customer_id, path FROM reports ORDER BY id').fetchall()
+    assert len(rows) == 2
+    assert len({row['customer_id'] for row in rows}) == 2
+    assert sorted(row['path'] for row in rows) == files
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+報告水印模組
+在已生成的報告PDF上加蓋收件人水印（姓名、訂單號），用於追查外洩。
+不重新渲染報告：以PDF增量更新的方式在文件末尾追加
+    - 一個共用的水印圖片 XObject（chinese_watermark.png，全部頁面引用同一對象）
+    - 每頁一段簡短的覆蓋內容流（圖片 + 斜向水印文字 + 頁腳追蹤信息）
+    - 改寫後的頁面對象及新的交叉引用表
+原文件字節保持不變，輸入輸出均為內存中的 bytes
+"""
+
+import argparse
+import math
+import os
+import re
+import zlib
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Tuple
+
+DEFAULT_WATERMARK = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chinese_watermark.png')
+
+# 水印圖片嵌入寬度（像素）
+DEFAULT_IMAGE_WIDTH = 480
+
+# 新增資源名稱，帶前綴以免與原有資源衝突
+IMAGE_NAME = 'AskbaziWmImg'
+IMAGE_STATE = 'AskbaziWmImgGS'
+TEXT_STATE = 'AskbaziWmTextGS'
+FONT_NAME = 'AskbaziWmF'
+
+
+class Ref(NamedTuple):
+    """間接引用 n g R"""
+    num: int
+    gen: int
+
+
+class Name(str):
+    """PDF 名稱（不含斜線，保留原始寫法）"""
+
+
+class Raw(bytes):
+    """原樣保留的記號：數字、布爾值、null 及字串"""
+
+
+_WHITESPACE = b' \t\r\n\f\x00'
+_REF = re.compile(rb'(\d+)\s+(\d+)\s+R(?![^\s()<>\[\]{}/%])')
+_TOKEN = re.compile(rb'[^\s()<>\[\]{}/%]+')
+_OBJ = re.compile(rb'\s*(\d+)\s+(\d+)\s+obj')
+_XREF_SECTION = re.compile(rb'\s*(\d+)\s+(\d+)')
+_XREF_ENTRY = re.compile(rb'\s*(\d{10})\s+(\d{5})\s+([nf])')
+
+
+def _skip(data: bytes, pos: int) -> int:
+    """跳過空白及注釋"""
+    while pos < len(data):
+        c = data[pos]
+        if c in _WHITESPACE:
+            pos += 1
+        elif c == 37:  # %
+            while pos < len(data) and data[pos] not in b'\r\n':
+                pos += 1
+        else:
+            break
+    return pos
+
+
+def parse_value(data: bytes, pos: int):
+    """從 pos 解析一個PDF對象，返回 (值, 結束位置)"""
+    pos = _skip(data, pos)
+    if data.startswith(b'<<', pos):
+        result, pos = {}, pos + 2
+        while True:
+            pos = _skip(data, pos)
+            if data.startswith(b'>>', pos):
+                return result, pos + 2
+            key, pos = parse_value(data, pos)
+            value, pos = parse_value(data, pos)
+            result[key] = value
+    c = data[pos:pos + 1]
+    if c == b'[':
+        result, pos = [], pos + 1
+        while True:
+            pos = _skip(data, pos)
+            if data.startswith(b']', pos):
+                return result, pos + 1
+            value, pos = parse_value(data, pos)
+            result.append(value)
+    if c == b'/':
+        m = _TOKEN.match(data, pos + 1)
+        end = m.end() if m else pos + 1
+        return Name(data[pos + 1:end].decode('latin-1')), end
+    if c == b'(':
+        depth, end = 0, pos
+        while True:
+            ch = data[end]
+            if ch == 92:  # 反斜線轉義
+                end += 2
+                continue
+            if ch == 40:
+                depth += 1
+            elif ch == 41:
+                depth -= 1
+                if depth == 0:
+                    return Raw(data[pos:end + 1]), end + 1
+            end += 1
+    if c == b'<':
+        end = data.index(b'>', pos)
+        return Raw(data[pos:end + 1]), end + 1
+    m = _REF.match(data, pos)
+    if m:
+        return Ref(int(m.group(1)), int(m.group(2))), m.end()
+    m = _TOKEN.match(data, pos)
+    if not m:
+        raise ValueError(f"無法解析的PDF內容，位置 {pos}")
+    return Raw(m.group()), m.end()
+
+
+def dump_value(value) -> bytes:
+    """PDF對象 -> bytes"""
+    if isinstance(value, Ref):
+        return b'%d %d R' % value
+    if isinstance(value, Name):
+        return b'/' + value.encode('latin-1')
+    if isinstance(value, dict):
+        items = b' '.join(dump_value(Name(k)) + b' ' + dump_value(v) for k, v in value.items())
+        return b'<< ' + items + b' >>'
+    if isinstance(value, list):
+        return b'[ ' + b' '.join(dump_value(v) for v in value) + b' ]'
+    if isinstance(value, bytes):
+        return bytes(value)
+    if isinstance(value, float):
+        return (b'%.4f' % value).rstrip(b'0').rstrip(b'.')
+    return str(value).encode('ascii')
+
+
+class PDFFile:
+    """只讀的PDF對象訪問（傳統 xref 表，支持增量更新鏈）"""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        tail = data.rfind(b'startxref')
+        if tail < 0:
+            raise ValueError("不是有效的PDF：找不到 startxref")
+        self.startxref = int(data[tail + 9:].split()[0])
+        self.offsets: Dict[int, int] = {}
+        self.trailer: Dict = {}
+        offset = self.startxref
+        while offset is not None:
+            trailer = self._read_xref(offset)
+            for key, value in trailer.items():
+                self.trailer.setdefault(key, value)
+            prev = trailer.get('Prev')
+            offset = int(prev) if prev is not None else None
+        self.size = int(self.trailer['Size'])
+        self._objects: Dict[int, object] = {}
+
+    def _read_xref(self, offset: int) -> Dict:
+        data = self.data
+        pos = _skip(data, offset)
+        if not data.startswith(b'xref', pos):
+            raise ValueError("只支持傳統 xref 表，不支持交叉引用流")
+        pos += 4
+        while True:
+            pos = _skip(data, pos)
+            if data.startswith(b'trailer', pos):
+                return parse_value(data, pos + 7)[0]
+            m = _XREF_SECTION.match(data, pos)
+            start, count = int(m.group(1)), int(m.group(2))
+            pos = m.end()
+            for i in range(count):
+                m = _XREF_ENTRY.match(data, pos)
+                pos = m.end()
+                if m.group(3) == b'n':
+                    # 較新的 xref 先讀，已有的不覆蓋
+                    self.offsets.setdefault(start + i, int(m.group(1)))
+
+    def get(self, ref: Ref):
+        """讀取間接對象（流對象只返回字典），結果緩存，調用者不應修改"""
+        value = self._objects.get(ref.num)
+        if value is None:
+            m = _OBJ.match(self.data, self.offsets[ref.num])
+            if not m or int(m.group(1)) != ref.num:
+                raise ValueError(f"交叉引用表與對象 {ref.num} 不符")
+            value = self._objects[ref.num] = parse_value(self.data, m.end())[0]
+        return value
+
+    def resolve(self, value):
+        return self.get(value) if isinstance(value, Ref) else value
+
+    def pages(self) -> List[Tuple[Ref, Dict]]:
+        """按順序返回 (頁面引用, 頁面字典)，可繼承的屬性已從父節點補入"""
+        root = self.get(self.trailer['Root'])
+        result = []
+
+        def walk(ref: Ref, inherited: Dict):
+            node = dict(self.get(ref))
+            if node.get('Type') == 'Pages':
+                inherit = dict(inherited)
+                for key in ('Resources', 'MediaBox', 'CropBox', 'Rotate'):
+                    if key in node:
+                        inherit[key] = node[key]
+                for kid in node['Kids']:
+                    walk(kid, inherit)
+            else:
+                for key, value in inherited.items():
+                    node.setdefault(key, value)
+                result.append((ref, node))
+
+        walk(root['Pages'], {})
+        return result
+
+
+@lru_cache(maxsize=8)
+def _image_streams(path: str, width: int) -> Tuple[int, int, bytes, bytes]:
+    """水印圖片縮放後的 (寬, 高, RGB 的 JPEG 數據, Alpha 壓縮數據)，每個進程只處理一次"""
+    import io
+    from PIL import Image
+
+    with Image.open(path) as image:
+        image = image.convert('RGBA')
+        height = max(1, round(image.height * width / image.width))
+        image = image.resize((width, height), Image.LANCZOS)
+    buffer = io.BytesIO()
+    image.convert('RGB').save(buffer, 'JPEG', quality=80)
+    alpha = zlib.compress(image.getchannel('A').tobytes(), 9)
+    return width, height, buffer.getvalue(), alpha
+
+
+def _stream(dictionary: Dict, content: bytes) -> bytes:
+    dictionary = dict(dictionary, Length=len(content))
+    return dump_value(dictionary) + b'\nstream\n' + content + b'\nendstream'
+
+
+def _escape_literal(data: bytes) -> bytes:
+    return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+class WatermarkStamper:
+    """收件人水印蓋印器
+
+    水印圖片在首次使用時縮放、壓縮並緩存；每次蓋印只需解析頁面對象、
+    生成每頁幾百字節的覆蓋內容流並追加到原文件末尾。
+    """
+
+    def __init__(self, image_path: str = DEFAULT_WATERMARK, image_width: int = DEFAULT_IMAGE_WIDTH,
+                 image_opacity: float = 0.18, text_opacity: float = 0.12, text_size: float = 26):
+        self.image_path = image_path
+        self.image_width = image_width
+        self.image_opacity = image_opacity
+        self.text_opacity = text_opacity
+        self.text_size = text_size
+
+    def stamp(self, pdf: bytes, name: str, order_id: str) -> bytes:
+        """返回加蓋水印後的PDF（原內容 + 增量更新）"""
+        source = PDFFile(pdf)
+        pages = source.pages()
+        next_num = source.size
+        objects: Dict[int, bytes] = {}
+
+        def add(body: bytes) -> Ref:
+            nonlocal next_num
+            ref = Ref(next_num, 0)
+            objects[next_num] = body
+            next_num += 1
+            return ref
+
+        # 共用對象：水印圖片（含 Alpha 蒙版）及包住原內容的 q
+        width, height, rgb, alpha = _image_streams(self.image_path, self.image_width)
+        image_dict = {'Type': Name('XObject'), 'Subtype': Name('Image'), 'Width': width, 'Height': height,
+                      'BitsPerComponent': 8}
+        mask_ref = add(_stream(dict(image_dict, ColorSpace=Name('DeviceGray'), Filter=Name('FlateDecode')), alpha))
+        image_ref = add(_stream(dict(image_dict, ColorSpace=Name('DeviceRGB'), Filter=Name('DCTDecode'),
+                                     SMask=mask_ref), rgb))
+        open_ref = add(_stream({}, b'q'))
+        states = {
+            IMAGE_STATE: {'Type': Name('ExtGState'), 'ca': self.image_opacity, 'CA': self.image_opacity},
+            TEXT_STATE: {'Type': Name('ExtGState'), 'ca': self.text_opacity, 'CA': self.text_opacity}
+        }
+        fallback_font = None
+
+        for index, (page_ref, page) in enumerate(pages):
+            resources = dict(source.resolve(page.get('Resources', {})))
+            fonts = dict(source.resolve(resources.get('Font', {})))
+            font, encoding = self._pick_font(source, fonts)
+            if font is None:
+                if fallback_font is None:
+                    fallback_font = add(dump_value({
+                        'Type': Name('Font'), 'Subtype': Name('Type1'),
+                        'BaseFont': Name('Helvetica'), 'Encoding': Name('WinAnsiEncoding')}))
+                font, encoding = FONT_NAME, 'latin'
+                fonts[FONT_NAME] = fallback_font
+                resources['Font'] = fonts
+            xobjects = dict(source.resolve(resources.get('XObject', {})))
+            xobjects[IMAGE_NAME] = image_ref
+            resources['XObject'] = xobjects
+            ext_states = dict(source.resolve(resources.get('ExtGState', {})))
+            ext_states.update(states)
+            resources['ExtGState'] = ext_states
+
+            box = [float(v) for v in source.resolve(page.get('MediaBox', [0, 0, 595.2756, 841.8898]))]
+            overlay = self._overlay(box, (width, height), font, encoding,
+                                    f"{name}  {order_id}", f"{name} · {order_id} · {index + 1}/{len(pages)}")
+            overlay_ref = add(_stream({}, overlay))
+
+            contents = page.get('Contents', [])
+            contents = list(contents) if isinstance(contents, list) else [contents]
+            page = dict(page, Resources=resources, Contents=[open_ref] + contents + [overlay_ref])
+            objects[page_ref.num] = dump_value(page)
+
+        return self._append(pdf, source, objects, next_num)
+
+    def _pick_font(self, source: PDFFile, fonts: Dict) -> Tuple:
+        """優先選用頁面已有的 UCS-2 編碼中文字體，其次 WinAnsi 西文字體"""
+        latin = None
+        for key, value in fonts.items():
+            font = source.resolve(value)
+            encoding = font.get('Encoding')
+            if isinstance(encoding, Name) and 'UCS2' in encoding:
+                return key, 'ucs2'
+            if latin is None and encoding == 'WinAnsiEncoding':
+                latin = key
+        return (latin, 'latin') if latin is not None else (None, None)
+
+    @staticmethod
+    def _encode(text: str, encoding: str) -> bytes:
+        if encoding == 'ucs2':
+            return b'<' + text.encode('utf-16-be').hex().encode('ascii') + b'>'
+        return b'(' + _escape_literal(text.encode('cp1252', 'replace')) + b')'
+
+    @staticmethod
+    def _text_width(text: str, size: float) -> float:
+        """估算文字寬度：全角字一個字號，其餘半個"""
+        return sum(1.0 if ord(ch) >= 0x2E80 else 0.5 for ch in text) * size
+
+    def _overlay(self, box: List[float], image_size: Tuple[int, int], font: str, encoding: str,
+                 diagonal: str, footer: str) -> bytes:
+        """生成一頁的覆蓋內容流"""
+        x0, y0, x1, y1 = box
+        page_width, page_height = x1 - x0, y1 - y0
+        cx, cy = x0 + page_width / 2, y0 + page_height / 2
+
+        # 水印圖片：寬度為頁寬的七成，置於頁面中央
+        draw_width = page_width * 0.7
+        draw_height = draw_width * image_size[1] / image_size[0]
+        image_x, image_y = cx - draw_width / 2, cy - draw_height / 2
+
+        # 斜向文字：以頁面中心為中點，沿對角線方向
+        angle = math.atan2(page_height, page_width)
+        cos, sin = math.cos(angle), math.sin(angle)
+        half = self._text_width(diagonal, self.text_size) / 2
+        text_x, text_y = cx - half * cos, cy - half * sin
+
+        footer_size = 7
+        footer_x = cx - self._text_width(footer, footer_size) / 2
+        footer_y = y0 + 0.6 * 72 / 2.54
+
+        f = dump_value
+        ops = [
+            b'Q q',
+            b'/%s gs' % IMAGE_STATE.encode(),
+            b'%s 0 0 %s %s %s cm' % (f(draw_width), f(draw_height), f(image_x), f(image_y)),
+            b'/%s Do' % IMAGE_NAME.encode(),
+            b'Q q',
+            b'/%s gs' % TEXT_STATE.encode(),
+            b'0.45 0.3 0.2 rg',
+            b'BT /%s %s Tf %s %s %s %s %s %s Tm %s Tj ET' % (
+                font.encode('latin-1'), f(self.text_size), f(cos), f(sin), f(-sin), f(cos),
+                f(text_x), f(text_y), self._encode(diagonal, encoding)),
+            b'Q q',
+            b'0.5 0.45 0.4 rg',
+            b'BT /%s %d Tf %s %s Td %s Tj ET' % (
+                font.encode('latin-1'), footer_size, f(footer_x), f(footer_y), self._encode(footer, encoding)),
+            b'Q'
+        ]
+        return b'\n'.join(ops)
+
+    @staticmethod
+    def _append(pdf: bytes, source: PDFFile, objects: Dict[int, bytes], size: int) -> bytes:
+        """把對象及新的 xref 段、trailer 追加到原文件末尾"""
+        parts = [pdf if pdf.endswith(b'\n') else pdf + b'\n']
+        offset = len(parts[0])
+        offsets = {}
+        for num in sorted(objects):
+            chunk = b'%d 0 obj\n%s\nendobj\n' % (num, objects[num])
+            offsets[num] = offset
+            parts.append(chunk)
+            offset += len(chunk)
+
+        # 按連續的對象號分段，首段為空閒鏈表頭（對象 0）
+        xref = [b'xref\n0 1\n0000000000 65535 f \n']
+        nums = sorted(offsets)
+        start = 0
+        while start < len(nums):
+            end = start
+            while end + 1 < len(nums) and nums[end + 1] == nums[end] + 1:
+                end += 1
+            xref.append(b'%d %d\n' % (nums[start], end - start + 1))
+            xref.extend(b'%010d 00000 n \n' % offsets[n] for n in nums[start:end + 1])
+            start = end + 1
+        trailer = {key: source.trailer[key] for key in ('Root', 'Info', 'ID') if key in source.trailer}
+        trailer.update(Size=size, Prev=source.startxref)
+        xref.append(b'trailer\n' + dump_value(trailer) + b'\nstartxref\n%d\n%%%%EOF\n' % offset)
+        return b''.join(parts + xref)
+
+
+_default_stamper = None
+
+
+def stamp_pdf(pdf: bytes, name: str, order_id: str) -> bytes:
+    """以默認設置加蓋水印"""
+    global _default_stamper
+    if _default_stamper is None:
+        _default_stamper = WatermarkStamper()
+    return _default_stamper.stamp(pdf, name, order_id)
+
+
+def main(argv=None) -> int:
+    """主函數"""
+    parser = argparse.ArgumentParser(description="為報告PDF加蓋收件人水印")
+    parser.add_argument('input', help="原報告PDF")
+    parser.add_argument('output', help="輸出文件")
+    parser.add_argument('--name', required=True, help="收件人姓名")
+    parser.add_argument('--order', required=True, help="訂單號")
+    args = parser.parse_args(argv)
+
+    with open(args.input, 'rb') as f:
+        data = f.read()
+    with open(args.output, 'wb') as f:
+        f.write(stamp_pdf(data, args.name, args.order))
+    print(f"已加蓋水印：{args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
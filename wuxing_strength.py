@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+五行強弱計算模組
+計入地支藏干權重及月令旺相休囚死，以一次矩陣乘法得出五行力量向量
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+from shishen import BRANCH_HIDDEN_STEMS, chart_codes
+
+# 五行順序，與 analyze_wuxing_balance 的 wuxing_count 一致
+WUXING = ['木', '火', '土', '金', '水']
+
+# 藏干權重：按藏干個數分配本氣、中氣、餘氣
+HIDDEN_STEM_WEIGHTS = {
+    1: (1.0,),
+    2: (0.7, 0.3),
+    3: (0.6, 0.3, 0.1)
+}
+
+# 旺相休囚死係數
+SEASON_FACTORS = {'旺': 1.5, '相': 1.2, '休': 1.0, '囚': 0.8, '死': 0.6}
+
+# 月支所屬季節五行（寅卯木、巳午火、申酉金、亥子水、辰戌丑未土）
+MONTH_SEASON_ELEMENT = (4, 2, 0, 0, 2, 1, 1, 2, 3, 3, 2, 4)
+
+
+def _season_state(season: int, element: int) -> str:
+    """判斷五行在某季節的旺衰狀態"""
+    relation = (element - season) % 5
+    # 0 同令為旺；1 令生我為相；4 我生令為休；3 我克令為囚；2 令克我為死
+    return ('旺', '相', '死', '囚', '休')[relation]
+
+
+# 月令係數表：SEASON_TABLE[月支] -> 五行係數
+SEASON_TABLE = tuple(
+    tuple(SEASON_FACTORS[_season_state(MONTH_SEASON_ELEMENT[zhi], e)] for e in range(5))
+    for zhi in range(12)
+)
+
+# 天干五行矩陣 10×5
+STEM_ELEMENT = tuple(
+    tuple(1.0 if gan // 2 == e else 0.0 for e in range(5))
+    for gan in range(10)
+)
+
+# 地支→藏干權重矩陣 12×10
+BRANCH_STEM_WEIGHTS = tuple(
+    tuple(
+        dict(zip(hidden, HIDDEN_STEM_WEIGHTS[len(hidden)])).get(gan, 0.0)
+        for gan in range(10)
+    )
+    for hidden in BRANCH_HIDDEN_STEMS
+)
+
+# 合併矩陣 22×5：前10行為天干，後12行為地支（藏干權重 × 天干五行）
+STRENGTH_MATRIX = STEM_ELEMENT + tuple(
+    tuple(sum(weights[gan] * STEM_ELEMENT[gan][e] for gan in range(10)) for e in range(5))
+    for weights in BRANCH_STEM_WEIGHTS
+)
+
+
+def strength_vector(stems: Sequence[int], branches: Sequence[int]) -> Tuple[float, ...]:
+    """計算單個八字的五行力量向量（木火土金水）
+
+    等價於 干支計數向量(22) × STRENGTH_MATRIX(22×5)，再乘以月令係數。
+    """
+    totals = [0.0] * 5
+    for gan in stems:
+        row = STRENGTH_MATRIX[gan]
+        for e in range(5):
+            totals[e] += row[e]
+    for zhi in branches:
+        row = STRENGTH_MATRIX[10 + zhi]
+        for e in range(5):
+            totals[e] += row[e]
+    season = SEASON_TABLE[branches[1]]
+    return tuple(totals[e] * season[e] for e in range(5))
+
+
+def favorable_elements(day_master: int, strength: Sequence[float]) -> List[int]:
+    """根據日主強弱取喜用神五行序號
+
+    日主及印星（生我者）力量不足總量一半為身弱，喜印、比；
+    否則為身強，喜官殺（克我者）、食傷（我生者）。
+    """
+    resource = (day_master - 1) % 5
+    support = strength[day_master] + strength[resource]
+    if support * 2 < sum(strength):
+        return [resource, day_master]
+    return [(day_master + 3) % 5, (day_master + 1) % 5]
+
+
+def chart_strength(bazi_info: Dict) -> Dict:
+    """計算八字的加權五行力量及喜用神"""
+    stems, branches = chart_codes(bazi_info)
+    strength = strength_vector(stems, branches)
+    favorable = favorable_elements(stems[2] // 2, strength)
+    return {
+        'wuxing_strength': {WUXING[e]: round(strength[e], 4) for e in range(5)},
+        'favorable_elements': [WUXING[e] for e in favorable]
+    }
+
+
+@lru_cache(maxsize=None)
+def _numpy_tables():
+    """NumPy 版矩陣，首次批量計算時建立"""
+    import numpy as np
+
+    return np.asarray(STRENGTH_MATRIX), np.asarray(SEASON_TABLE)
+
+
+def batch_strength(stem_codes, branch_codes):
+    """批量計算五行力量
+
+    stem_codes、branch_codes 為形狀 (N, 4) 的整數數組，返回 (N, 5) 數組。
+    先累加干支計數得到 (N, 22) 矩陣，再與 STRENGTH_MATRIX 相乘。
+    """
+    import numpy as np
+
+    matrix, season = _numpy_tables()
+    stems = np.asarray(stem_codes, dtype=np.intp)
+    branches = np.asarray(branch_codes, dtype=np.intp)
+    n = len(stems)
+
+    offsets = np.arange(n)[:, None] * 22
+    flat = np.concatenate([stems + offsets, branches + 10 + offsets], axis=1)
+    counts = np.bincount(flat.ravel(), minlength=n * 22).reshape(n, 22)
+    return (counts @ matrix) * season[branches[:, 1]]
+
+
+def batch_favorable(stem_codes, strength):
+    """批量計算喜用神，返回 (N, 2) 五行序號數組"""
+    import numpy as np
+
+    stems = np.asarray(stem_codes, dtype=np.intp)
+    day_master = stems[:, 2] // 2
+    resource = (day_master - 1) % 5
+    rows = np.arange(len(stems))
+    support = strength[rows, day_master] + strength[rows, resource]
+    weak = support * 2 < strength.sum(axis=1)
+    first = np.where(weak, resource, (day_master + 3) % 5)
+    second = np.where(weak, day_master, (day_master + 1) % 5)
+    return np.stack([first, second], axis=1)
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+繁簡轉換模組
+以字表及詞表把繁體文字轉為簡體：詞表先按最長匹配替換一詞多義或需保留原字的詞語，
+其餘逐字以 str.translate 查表；字表與詞表在首次使用時編譯一次。
+內容模板在載入時整體轉換並按語系緩存，生成報告時不再逐次轉換
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Tuple
+
+# 語系：繁體（模板原文）及簡體
+TRADITIONAL = 'zh-Hant'
+SIMPLIFIED = 'zh-Hans'
+DEFAULT_LOCALE = TRADITIONAL
+LOCALES = (TRADITIONAL, SIMPLIFIED)
+
+# 語系別名 -> 語系
+LOCALE_ALIASES = {
+    'zh-hant': TRADITIONAL, 'zh-tw': TRADITIONAL, 'zh-hk': TRADITIONAL, 'zh-mo': TRADITIONAL,
+    'traditional': TRADITIONAL, 'tc': TRADITIONAL, '繁體': TRADITIONAL,
+    'zh-hans': SIMPLIFIED, 'zh-cn': SIMPLIFIED, 'zh-sg': SIMPLIFIED, 'zh-my': SIMPLIFIED,
+    'simplified': SIMPLIFIED, 'sc': SIMPLIFIED, '簡體': SIMPLIFIED
+}
+
+# 繁簡一對一字表，每項為「繁簡」兩字，以空白分隔
+# 「乾」不入字表：乾造、乾卦等命理用語須保留，乾燥等詞見詞表
+CHARACTER_PAIRS = """
+丟丢 並并 亂乱 亙亘 亞亚 佇伫 佈布 佔占 併并 來来 侖仑 侶侣 侷局 俁俣 係系 俠侠 俬私 倀伥 倆俩 倉仓
+個个 們们 倖幸 倫伦 偉伟 側侧 偵侦 偽伪 傑杰 傖伧 傘伞 備备 傢家 傭佣 傯偬 傳传 傴伛 債债 傷伤 傾倾
+僂偻 僅仅 僉佥 僑侨 僕仆 僥侥 僨偾 僱雇 價价 儀仪 儂侬 億亿 儈侩 儉俭 儐傧 儔俦 儕侪 儘尽 償偿 優优
+儲储 儷俪 儺傩 儻傥 儼俨 兇凶 兌兑 兒儿 兗兖 內内 兩两 冊册 冑胄 冪幂 凈净 凍冻 凜凛 凱凯 別别 刪删
+剄刭 則则 剋克 剎刹 剛刚 剝剥 剮剐 剴剀 創创 剷铲 劃划 劇剧 劉刘 劊刽 劌刿 劍剑 劑剂 勁劲 動动 務务
+勛勋 勝胜 勞劳 勢势 勱劢 勳勋 勵励 勸劝 勻匀 匭匦 匯汇 匱匮 區区 協协 卹恤 卻却 厙厍 厤历 厭厌 厲厉
+厴厣 參参 叢丛 吒咤 吳吴 吶呐 呂吕 咼呙 員员 唄呗 唸念 問问 啞哑 啟启 喚唤 喪丧 喫吃 喬乔 單单 喲哟
+嗆呛 嗇啬 嗎吗 嗚呜 嗩唢 嗶哔 嘆叹 嘍喽 嘔呕 嘖啧 嘗尝 嘜唛 嘩哗 嘮唠 嘯啸 嘰叽 嘵哓 嘸呒 噁恶 噓嘘
+噠哒 噥哝 噦哕 噯嗳 噲哙 噴喷 噸吨 噹当 嚀咛 嚇吓 嚌哜 嚐尝 嚕噜 嚙啮 嚥咽 嚦呖 嚨咙 嚮向 嚳喾 嚴严
+嚶嘤 囀啭 囁嗫 囂嚣 囅冁 囈呓 囌苏 囑嘱 囪囱 圇囵 國国 圍围 園园 圓圆 圖图 團团 埡垭 埰采 執执 堅坚
+堊垩 堝埚 堯尧 報报 場场 塊块 塋茔 塏垲 塒埘 塗涂 塚冢 塢坞 塤埙 塵尘 塹堑 墊垫 墜坠 墮堕 墳坟 墾垦
+壇坛 壎埙 壓压 壘垒 壙圹 壚垆 壞坏 壟垄 壢坜 壩坝 壯壮 壺壶 壽寿 夠够 夢梦 夥伙 夾夹 奐奂 奧奥 奩奁
+奪夺 奮奋 奼姹 妝妆 姍姗 姦奸 娛娱 婁娄 婦妇 婭娅 媧娲 媯妫 媼媪 媽妈 嫋袅 嫗妪 嫵妩 嫻娴 嬈娆 嬋婵
+嬌娇 嬙嫱 嬡嫒 嬤嬷 嬪嫔 嬰婴 嬸婶 孃娘 孌娈 孫孙 學学 孿孪 宮宫 寀采 寢寝 實实 寧宁 審审 寫写 寬宽
+寵宠 寶宝 將将 專专 尋寻 對对 導导 尷尴 屆届 屍尸 屜屉 屢屡 層层 屨屦 屬属 岡冈 峴岘 島岛 峽峡 崍崃
+崑昆 崗岗 崙仑 崢峥 嵐岚 嶁嵝 嶄崭 嶇岖 嶗崂 嶠峤 嶧峄 嶸嵘 嶺岭 嶼屿 嶽岳 巋岿 巒峦 巔巅 巖岩 巰巯
+巹卺 帥帅 師师 帳帐 帶带 幀帧 幃帏 幗帼 幘帻 幟帜 幣币 幫帮 幬帱 幹干 幾几 庫库 廁厕 廂厢 廄厩 廈厦
+廕荫 廚厨 廝厮 廟庙 廠厂 廡庑 廢废 廣广 廩廪 廬庐 廳厅 弒弑 弔吊 弳弪 張张 強强 彆别 彈弹 彌弥 彎弯
+彔录 彙汇 彥彦 彫雕 彿佛 後后 徑径 從从 徠徕 復复 徵征 徹彻 恆恒 恥耻 悅悦 悵怅 悶闷 悽凄 惡恶 惱恼
+惲恽 惻恻 愛爱 愜惬 愨悫 愴怆 愷恺 愾忾 慄栗 態态 慍愠 慘惨 慚惭 慟恸 慣惯 慪怄 慫怂 慮虑 慳悭 慶庆
+慼戚 慾欲 憂忧 憊惫 憐怜 憑凭 憒愦 憚惮 憤愤 憫悯 憮怃 憲宪 憶忆 懇恳 應应 懌怿 懍懔 懞蒙 懟怼 懣懑
+懨恹 懲惩 懶懒 懷怀 懸悬 懺忏 懼惧 懾慑 戀恋 戇戆 戔戋 戧戗 戩戬 戰战 戲戏 戶户 拋抛 挾挟 捨舍 捫扪
+捱挨 捲卷 掃扫 掄抡 掙挣 掛挂 採采 揀拣 揚扬 換换 揮挥 損损 搖摇 搗捣 搶抢 摑掴 摜掼 摟搂 摯挚 摳抠
+摶抟 摺折 摻掺 撈捞 撐撑 撓挠 撟挢 撣掸 撥拨 撫抚 撲扑 撳揿 撻挞 撾挝 撿捡 擁拥 擄掳 擇择 擊击 擋挡
+擔担 據据 擠挤 擣捣 擬拟 擯摈 擰拧 擱搁 擲掷 擴扩 擷撷 擺摆 擻擞 擼撸 擾扰 攄摅 攆撵 攏拢 攔拦 攖撄
+攙搀 攛撺 攜携 攝摄 攢攒 攣挛 攤摊 攪搅 攬揽 敗败 敘叙 敵敌 數数 斂敛 斃毙 斕斓 斬斩 斷断 於于 旂旗
+昇升 時时 晉晋 晝昼 暈晕 暉晖 暢畅 暫暂 曄晔 曆历 曇昙 曉晓 曏向 曖暧 曠旷 曬晒 書书 會会 朧胧 朮术
+東东 枴拐 柵栅 柺拐 桿杆 梔栀 條条 梟枭 棄弃 棖枨 棗枣 棟栋 棧栈 棲栖 椏桠 楊杨 楓枫 楨桢 業业 極极
+榦干 榪杩 榮荣 榿桤 構构 槍枪 槓杠 槧椠 槨椁 槳桨 樁桩 樂乐 樅枞 樑梁 樓楼 標标 樞枢 樣样 樸朴 樹树
+樺桦 橈桡 橋桥 機机 橢椭 橫横 檁檩 檉柽 檔档 檜桧 檢检 檣樯 檯台 檳槟 檸柠 檻槛 櫃柜 櫓橹 櫚榈 櫛栉
+櫝椟 櫞橼 櫟栎 櫥橱 櫧槠 櫨栌 櫪枥 櫫橥 櫬榇 櫱蘖 櫳栊 櫸榉 櫻樱 欄栏 權权 欏椤 欒栾 欖榄 欞棂 欽钦
+歎叹 歐欧 歟欤 歡欢 歲岁 歷历 歸归 歿殁 殘残 殞殒 殤殇 殫殚 殭僵 殮殓 殯殡 殲歼 殺杀 殼壳 毀毁 毆殴
+毿毵 氂牦 氈毡 氌氇 氣气 氫氢 氬氩 氳氲 氾泛 汎泛 汙污 決决 沒没 沖冲 況况 泝溯 洩泄 洶汹 浹浃 涇泾
+涼凉 淒凄 淚泪 淥渌 淨净 淩凌 淪沦 淵渊 淶涞 淺浅 渙涣 減减 渦涡 測测 渾浑 湊凑 湞浈 湧涌 湯汤 溈沩
+準准 溝沟 溫温 溼湿 滄沧 滅灭 滌涤 滎荥 滬沪 滯滞 滲渗 滷卤 滸浒 滾滚 滿满 漁渔 漚沤 漢汉 漣涟 漬渍
+漲涨 漵溆 漸渐 漿浆 潁颍 潑泼 潔洁 潛潜 潤润 潯浔 潰溃 潷滗 潿涠 澀涩 澆浇 澇涝 澗涧 澠渑 澤泽 澩泶
+澮浍 澱淀 濁浊 濃浓 濕湿 濘泞 濛蒙 濟济 濤涛 濫滥 濰潍 濱滨 濺溅 濼泺 濾滤 瀅滢 瀆渎 瀉泻 瀋沈 瀏浏
+瀕濒 瀘泸 瀝沥 瀟潇 瀠潆 瀦潴 瀧泷 瀨濑 瀰弥 瀲潋 瀾澜 灃沣 灄滠 灑洒 灕漓 灘滩 灝灏 灣湾 灤滦 灩滟
+災灾 為为 烏乌 烴烃 無无 煉炼 煒炜 煙烟 煢茕 煥焕 煩烦 煬炀 熒荧 熗炝 熱热 熾炽 燁烨 燈灯 燉炖 燒烧
+燙烫 燜焖 營营 燦灿 燬毁 燭烛 燴烩 燻熏 燼烬 燾焘 爍烁 爐炉 爛烂 爭争 爺爷 爾尔 牆墙 牘牍 牽牵 犖荦
+犛牦 犢犊 犧牺 狀状 狹狭 狽狈 猙狰 猶犹 猻狲 獃呆 獄狱 獅狮 獎奖 獨独 獪狯 獫猃 獰狞 獲获 獵猎 獷犷
+獸兽 獺獭 獻献 獼猕 玀猡 現现 琱雕 琺珐 琿珲 瑋玮 瑣琐 瑤瑶 瑩莹 瑪玛 璉琏 璣玑 璦瑷 環环 璽玺 璿璇
+瓊琼 瓏珑 瓔璎 瓚瓒 甌瓯 甕瓮 產产 甦苏 甯宁 畝亩 畢毕 畫画 異异 當当 疇畴 疊叠 痙痉 痠酸 痾疴 瘋疯
+瘍疡 瘓痪 瘞瘗 瘡疮 瘧疟 瘺瘘 療疗 癆痨 癇痫 癉瘅 癒愈 癘疠 癟瘪 癡痴 癢痒 癤疖 癥症 癩癞 癬癣 癭瘿
+癮瘾 癰痈 癱瘫 癲癫 發发 皁皂 皚皑 皰疱 皸皲 皺皱 盃杯 盜盗 盞盏 盡尽 監监 盤盘 盧卢 盪荡 眥眦 眾众
+睏困 睜睁 睞睐 瞞瞒 瞼睑 矇蒙 矚瞩 矯矫 硃朱 硤硖 硨砗 硯砚 碩硕 碭砀 確确 碼码 磚砖 磣碜 磧碛 磯矶
+磽硗 礎础 礙碍 礦矿 礪砺 礫砾 礬矾 礱砻 祕秘 祿禄 禍祸 禎祯 禦御 禪禅 禮礼 禰祢 禱祷 禿秃 秈籼 稅税
+稈秆 稜棱 稟禀 種种 稱称 穀谷 穌稣 積积 穎颖 穡穑 穢秽 穩稳 穫获 窩窝 窪洼 窮穷 窯窑 窶窭 窺窥 竄窜
+竅窍 竇窦 竊窃 競竞 筆笔 筍笋 筧笕 箇个 箋笺 箏筝 節节 範范 築筑 篋箧 篤笃 篩筛 篳筚 簀箦 簍篓 簑蓑
+簞箪 簡简 簣篑 簫箫 簽签 簾帘 籃篮 籌筹 籜箨 籟籁 籠笼 籤签 籩笾 籪簖 籬篱 籮箩 籲吁 粵粤 糝糁 糞粪
+糧粮 糰团 糲粝 糴籴 糶粜 糾纠 紀纪 紂纣 約约 紅红 紆纡 紇纥 紈纨 紉纫 紋纹 納纳 紐纽 紓纾 純纯 紕纰
+紗纱 紙纸 級级 紛纷 紜纭 紡纺 紮扎 細细 紱绂 紲绁 紳绅 紹绍 紺绀 紼绋 紿绐 絀绌 終终 絃弦 組组 絆绊
+絎绗 結结 絕绝 絛绦 絞绞 絡络 絢绚 給给 絨绒 統统 絲丝 絳绛 絹绢 綁绑 綃绡 綆绠 綈绨 綏绥 綑捆 經经
+綜综 綞缍 綠绿 綢绸 綣绻 綬绶 維维 綰绾 綱纲 網网 綴缀 綵彩 綸纶 綹绺 綺绮 綻绽 綽绰 綾绫 綿绵 緄绲
+緇缁 緊紧 緋绯 緒绪 緗缃 緘缄 緙缂 線线 緝缉 緞缎 締缔 緡缗 緣缘 緦缌 編编 緩缓 緬缅 緯纬 緱缑 緲缈
+練练 緶缏 緹缇 緻致 縈萦 縉缙 縊缢 縋缒 縐绉 縑缣 縛缚 縝缜 縞缟 縟缛 縣县 縫缝 縭缡 縮缩 縱纵 縲缧
+縴纤 縵缦 縶絷 縷缕 縹缥 總总 績绩 繃绷 繅缫 繆缪 繒缯 織织 繕缮 繚缭 繞绕 繡绣 繢缋 繩绳 繪绘 繫系
+繭茧 繯缳 繰缲 繳缴 繹绎 繼继 繽缤 繾缱 纈缬 纊纩 續续 纍累 纏缠 纓缨 纔才 纖纤 纘缵 纜缆 缽钵 罈坛
+罌罂 罰罚 罵骂 罷罢 羅罗 羆罴 羈羁 羋芈 羥羟 羨羡 義义 羶膻 習习 翫玩 翹翘 耬耧 聖圣 聞闻 聯联 聰聪
+聲声 聳耸 聵聩 聶聂 職职 聹聍 聽听 聾聋 肅肃 脅胁 脈脉 脛胫 脣唇 脩修 脫脱 脹胀 腎肾 腡脶 腦脑 腫肿
+腳脚 腸肠 膃腽 膚肤 膠胶 膩腻 膽胆 膾脍 膿脓 臉脸 臍脐 臏膑 臘腊 臚胪 臟脏 臠脔 臥卧 臨临 臺台 與与
+興兴 舉举 舊旧 艙舱 艤舣 艦舰 艫舻 艱艰 艷艳 芻刍 苧苎 茲兹 荊荆 莊庄 莖茎 莢荚 莧苋 華华 菴庵 菸烟
+萇苌 萊莱 萬万 萵莴 葉叶 葒荭 葦苇 葯药 葷荤 蒐搜 蒔莳 蒞莅 蒼苍 蓀荪 蓆席 蓋盖 蓮莲 蓯苁 蓴莼 蓽荜
+蔔卜 蔘参 蔞蒌 蔣蒋 蔥葱 蔦茑 蔭荫 蕁荨 蕆蒇 蕎荞 蕓芸 蕕莸 蕘荛 蕢蒉 蕩荡 蕪芜 蕭萧 蕷蓣 薈荟 薊蓟
+薌芗 薑姜 薔蔷 薟莶 薦荐 薩萨 薹苔 薺荠 藍蓝 藎荩 藝艺 藥药 藪薮 藶苈 藹蔼 藺蔺 蘄蕲 蘆芦 蘇苏 蘊蕴
+蘋苹 蘚藓 蘞蔹 蘢茏 蘭兰 蘺蓠 蘿萝 處处 虛虚 虜虏 號号 虧亏 虯虬 蛺蛱 蛻蜕 蜆蚬 蝕蚀 蝟猬 蝦虾 蝨虱
+蝸蜗 螄蛳 螞蚂 螢萤 螻蝼 蟄蛰 蟈蝈 蟣虮 蟬蝉 蟯蛲 蟲虫 蟶蛏 蟻蚁 蠅蝇 蠆虿 蠍蝎 蠐蛴 蠑蝾 蠔蚝 蠟蜡
+蠣蛎 蠱蛊 蠶蚕 蠻蛮 衊蔑 術术 衕同 衚胡 衛卫 衝冲 袞衮 裊袅 補补 裝装 裡里 製制 複复 褲裤 褳裢 褸褛
+褻亵 襉裥 襖袄 襝裣 襠裆 襤褴 襪袜 襬摆 襯衬 襲袭 覈核 見见 規规 覓觅 視视 覘觇 覡觋 覦觎 親亲 覬觊
+覯觏 覲觐 覷觑 覺觉 覽览 覿觌 觀观 觴觞 觶觯 觸触 訂订 訃讣 計计 訊讯 訌讧 討讨 訐讦 訓训 訕讪 訖讫
+託托 記记 訛讹 訝讶 訟讼 訣诀 訥讷 訪访 設设 許许 訴诉 訶诃 診诊 註注 証证 詁诂 詆诋 詎讵 詐诈 詒诒
+詔诏 評评 詘诎 詛诅 詞词 詠咏 詡诩 詢询 詣诣 試试 詩诗 詫诧 詬诟 詭诡 詮诠 詰诘 話话 該该 詳详 詵诜
+詼诙 詿诖 誄诔 誅诛 誆诓 誇夸 誌志 認认 誑诳 誒诶 誕诞 誘诱 誚诮 語语 誠诚 誡诫 誣诬 誤误 誥诰 誦诵
+誨诲 說说 誰谁 課课 誶谇 誹诽 誼谊 調调 諂谄 諄谆 談谈 諉诿 請请 諍诤 諏诹 諑诼 諒谅 論论 諗谂 諛谀
+諜谍 諞谝 諡谥 諢诨 諤谔 諦谛 諧谐 諫谏 諭谕 諮咨 諱讳 諳谙 諶谌 諷讽 諸诸 諺谚 諼谖 諾诺 謀谋 謁谒
+謂谓 謄誊 謅诌 謊谎 謎谜 謐谧 謔谑 謖谡 謗谤 謙谦 謚谥 講讲 謝谢 謠谣 謨谟 謫谪 謬谬 謳讴 謹谨 謾谩
+譁哗 證证 譎谲 譏讥 譖谮 識识 譙谯 譚谭 譜谱 譟噪 譫谵 譭毁 譯译 議议 譴谴 護护 譽誉 譾谫 讀读 變变
+讎雠 讒谗 讓让 讕谰 讖谶 讚赞 讜谠 讞谳 豈岂 豎竖 豐丰 豔艳 豬猪 貓猫 貝贝 貞贞 負负 財财 貢贡 貧贫
+貨货 販贩 貪贪 貫贯 責责 貯贮 貰贳 貲赀 貳贰 貴贵 貶贬 買买 貸贷 貺贶 費费 貼贴 貽贻 貿贸 賀贺 賁贲
+賂赂 賃赁 賄贿 賅赅 資资 賈贾 賊贼 賑赈 賒赊 賓宾 賕赇 賚赉 賜赐 賞赏 賠赔 賡赓 賢贤 賣卖 賤贱 賦赋
+賧赕 質质 賬账 賭赌 賴赖 賺赚 賻赙 購购 賽赛 賾赜 贄贽 贅赘 贈赠 贊赞 贍赡 贏赢 贐赆 贓赃 贖赎 贗赝
+贛赣 趕赶 趙赵 趨趋 趲趱 跡迹 踐践 踰逾 踴踊 蹌跄 蹕跸 蹟迹 蹠跖 蹣蹒 蹤踪 蹺跷 躉趸 躊踌 躋跻 躍跃
+躑踯 躒跞 躓踬 躕蹰 躚跹 躡蹑 躥蹿 躦躜 躪躏 軀躯 車车 軋轧 軌轨 軍军 軒轩 軔轫 軛轭 軟软 軫轸 軸轴
+軹轵 軺轺 軻轲 軼轶 軾轼 較较 輅辂 輇辁 載载 輊轾 輒辄 輓挽 輔辅 輕轻 輛辆 輜辎 輝辉 輞辋 輟辍 輥辊
+輦辇 輩辈 輪轮 輯辑 輳辏 輸输 輻辐 輾辗 輿舆 轂毂 轄辖 轅辕 轆辘 轉转 轍辙 轎轿 轔辚 轟轰 轡辔 轢轹
+轤轳 辦办 辭辞 辮辫 辯辩 農农 迴回 逕迳 這这 連连 週周 進进 遊游 運运 過过 達达 違违 遙遥 遜逊 遞递
+遠远 適适 遲迟 遷迁 選选 遺遗 遼辽 邁迈 還还 邇迩 邊边 邏逻 邐逦 郟郏 郵邮 鄆郓 鄉乡 鄒邹 鄔邬 鄖郧
+鄧邓 鄭郑 鄰邻 鄲郸 鄴邺 鄶郐 鄺邝 酈郦 醃腌 醜丑 醞酝 醣糖 醫医 醬酱 釀酿 釁衅 釃酾 釅酽 釋释 釐厘
+釓钆 釔钇 釕钌 釗钊 釘钉 釙钋 針针 釣钓 釤钐 釦扣 釧钏 釩钒 釵钗 釷钍 釹钕 鈀钯 鈁钫 鈄钭 鈅钥 鈉钠
+鈍钝 鈐钤 鈑钣 鈔钞 鈕钮 鈞钧 鈣钙 鈥钬 鈦钛 鈧钪 鈮铌 鈰铈 鈳钶 鈴铃 鈷钴 鈸钹 鈹铍 鈺钰 鈽钸 鈾铀
+鈿钿 鉀钾 鉅巨 鉆钻 鉈铊 鉉铉 鉍铋 鉑铂 鉗钳 鉚铆 鉛铅 鉞钺 鉤钩 鉦钲 鉬钼 鉭钽 鉸铰 鉺铒 鉻铬 鉿铪
+銀银 銃铳 銅铜 銑铣 銓铨 銖铢 銘铭 銚铫 銜衔 銠铑 銣铷 銥铱 銦铟 銨铵 銩铥 銪铕 銫铯 銬铐 銳锐 銷销
+銻锑 銼锉 鋁铝 鋃锒 鋅锌 鋇钡 鋌铤 鋏铗 鋒锋 鋝锊 鋟锓 鋤锄 鋦锔 鋨锇 鋪铺 鋮铖 鋯锆 鋰锂 鋱铽 鋸锯
+鋼钢 錁锞 錄录 錆锖 錈锩 錐锥 錒锕 錕锟 錘锤 錙锱 錚铮 錛锛 錟锬 錠锭 錢钱 錦锦 錨锚 錫锡 錮锢 錯错
+錳锰 錶表 錸铼 錼镎 鍆钔 鍇锴 鍊炼 鍋锅 鍍镀 鍔锷 鍘铡 鍛锻 鍤锸 鍥锲 鍬锹 鍰锾 鍵键 鍶锶 鍺锗 鍼针
+鍾钟 鎂镁 鎊镑 鎌镰 鎖锁 鎘镉 鎚锤 鎢钨 鎣蓥 鎦镏 鎧铠 鎩铩 鎪锼 鎬镐 鎮镇 鎰镒 鎳镍 鎵镓 鏃镞 鏇旋
+鏈链 鏌镆 鏍镙 鏑镝 鏗铿 鏘锵 鏜镗 鏝镘 鏞镛 鏟铲 鏡镜 鏢镖 鏤镂 鏨錾 鏵铧 鏷镤 鏹镪 鏽锈 鐃铙 鐋铴
+鐐镣 鐒铹 鐓镦 鐔镡 鐘钟 鐙镫 鐠镨 鐨镄 鐫镌 鐮镰 鐲镯 鐳镭 鐵铁 鐸铎 鐺铛 鐿镱 鑄铸 鑊镬 鑌镔 鑑鉴
+鑒鉴 鑠铄 鑣镳 鑭镧 鑰钥 鑲镶 鑷镊 鑼锣 鑽钻 鑾銮 鑿凿 钁镢 長长 門门 閂闩 閃闪 閆闫 閉闭 開开 閌闶
+閎闳 閏闰 閑闲 閒闲 間间 閔闵 閘闸 閡阂 閣阁 閤合 閥阀 閨闺 閩闽 閫阃 閬阆 閭闾 閱阅 閶阊 閹阉 閻阎
+閼阏 閽阍 閾阈 閿阌 闃阒 闆板 闇暗 闈闱 闊阔 闋阕 闌阑 闐阗 闔阖 闕阙 闖闯 關关 闞阚 闡阐 闢辟 闥闼
+陘陉 陝陕 陞升 陣阵 陰阴 陳陈 陸陆 陽阳 隉陧 隊队 階阶 隕陨 際际 隨随 險险 隱隐 隴陇 隸隶 隻只 雋隽
+雖虽 雙双 雛雏 雜杂 雞鸡 離离 難难 雲云 電电 霑沾 霧雾 霽霁 靂雳 靄霭 靈灵 靚靓 靜静 靦腼 靨靥 鞏巩
+鞝绱 鞦秋 韁缰 韃鞑 韆千 韉鞯 韋韦 韌韧 韓韩 韙韪 韜韬 韝鞲 韞韫 韻韵 響响 頁页 頂顶 頃顷 項项 順顺
+頇顸 須须 頊顼 頌颂 頎颀 頏颃 預预 頑顽 頒颁 頓顿 頗颇 領领 頜颌 頡颉 頤颐 頦颏 頭头 頰颊 頷颔 頸颈
+頹颓 頻频 顆颗 題题 額额 顎颚 顏颜 顓颛 願愿 顙颡 顛颠 類类 顢颟 顥颢 顧顾 顫颤 顯显 顰颦 顱颅 顳颞
+顴颧 風风 颮飑 颯飒 颱台 颳刮 颶飓 颼飕 飄飘 飆飙 飛飞 飢饥 飩饨 飪饪 飫饫 飭饬 飯饭 飲饮 飴饴 飼饲
+飽饱 飾饰 餃饺 餅饼 餈糍 餉饷 養养 餌饵 餑饽 餒馁 餓饿 餘余 餚肴 餛馄 餞饯 餡馅 館馆 餬糊 餱糇 餳饧
+餵喂 餼饩 餾馏 餿馊 饃馍 饅馒 饈馐 饉馑 饋馈 饌馔 饑饥 饒饶 饗飨 饜餍 饞馋 馬马 馭驭 馮冯 馱驮 馳驰
+馴驯 駁驳 駐驻 駑驽 駒驹 駔驵 駕驾 駘骀 駙驸 駛驶 駝驼 駟驷 駢骈 駭骇 駱骆 駿骏 騁骋 騅骓 騍骒 騎骑
+騏骐 騖骛 騙骗 騫骞 騭骘 騮骝 騰腾 騶驺 騷骚 騸骟 騾骡 驀蓦 驁骜 驂骖 驃骠 驄骢 驅驱 驊骅 驍骁 驏骣
+驕骄 驗验 驚惊 驛驿 驟骤 驢驴 驤骧 驥骥 驪骊 骯肮 髏髅 髒脏 體体 髕髌 髖髋 髮发 鬆松 鬍胡 鬚须 鬢鬓
+鬥斗 鬧闹 鬨哄 鬩阋 鬮阄 鬱郁 魎魉 魘魇 魚鱼 魯鲁 魴鲂 魷鱿 鮐鲐 鮑鲍 鮒鲋 鮚鲒 鮞鲕 鮪鲔 鮫鲛 鮭鲑
+鮮鲜 鯀鲧 鯁鲠 鯇鲩 鯉鲤 鯊鲨 鯔鲻 鯖鲭 鯗鲞 鯛鲷 鯡鲱 鯢鲵 鯤鲲 鯧鲳 鯨鲸 鯪鲮 鯫鲰 鯰鲶 鯽鲫 鰈鲽
+鰉鳇 鰍鳅 鰒鳆 鰓鳃 鰣鲥 鰥鳏 鰨鳎 鰩鳐 鰭鳍 鰱鲢 鰲鳌 鰳鳓 鰷鲦 鰹鲣 鰻鳗 鰾鳔 鱈鳕 鱉鳖 鱒鳟 鱔鳝
+鱖鳜 鱗鳞 鱘鲟 鱟鲎 鱧鳢 鱭鲚 鱷鳄 鱸鲈 鱺鲡 鳥鸟 鳧凫 鳩鸠 鳳凤 鳴鸣 鳶鸢 鴆鸩 鴇鸨 鴉鸦 鴕鸵 鴛鸳
+鴝鸲 鴟鸱 鴣鸪 鴦鸯 鴨鸭 鴯鸸 鴰鸹 鴻鸿 鴿鸽 鵂鸺 鵑鹃 鵒鹆 鵓鹁 鵜鹈 鵝鹅 鵠鹄 鵡鹉 鵪鹌 鵬鹏 鵯鹎
+鵰雕 鵲鹊 鶇鸫 鶉鹑 鶘鹕 鶚鹗 鶩鹜 鶯莺 鶴鹤 鶻鹘 鶼鹣 鶿鹚 鷂鹞 鷓鹧 鷗鸥 鷙鸷 鷚鹨 鷥鸶 鷦鹪 鷯鹩
+鷲鹫 鷳鹇 鷴鹇 鷸鹬 鷹鹰 鷺鹭 鸕鸬 鸚鹦 鸛鹳 鸝鹂 鸞鸾 鹵卤 鹹咸 鹺鹾 鹼碱 鹽盐 麗丽 麥麦 麩麸 麴曲
+麵面 麼么 黃黄 黌黉 點点 黨党 黲黪 黴霉 黷黩 黽黾 黿鼋 鼉鼍 鼕冬 鼴鼹 齊齐 齋斋 齎赍 齏齑 齒齿 齔龀
+齙龅 齜龇 齟龃 齠龆 齡龄 齣出 齦龈 齧啮 齪龊 齬龉 齲龋 齶腭 齷龌 龍龙 龐庞 龔龚 龕龛 龜龟
+"""
+
+# 詞表：字表逐字轉換不正確或須保留原字的詞語
+PHRASES: Dict[str, str] = {
+    '乾燥': '干燥', '乾淨': '干净', '乾杯': '干杯', '餅乾': '饼干', '乾涸': '干涸', '乾旱': '干旱',
+    '瞭解': '了解', '明瞭': '明了', '一目瞭然': '一目了然',
+    '藉口': '借口', '憑藉': '凭借', '藉助': '借助',
+    '反覆': '反复', '回覆': '回复', '答覆': '答复',
+    '項鍊': '项链', '手鍊': '手链',
+    '彷彿': '仿佛', '傢俱': '家具',
+    '宮商角徵羽': '宫商角徵羽', '徵音': '徵音',
+    # 「著」作動態助詞及「着落」義時簡體作「着」，著名、著作、顯著等仍作「著」
+    '扮演著': '扮演着', '隨著': '随着', '有著': '有着', '意味著': '意味着', '帶著': '带着', '接著': '接着',
+    '沿著': '沿着', '朝著': '朝着', '向著': '向着', '跟著': '跟着', '順著': '顺着', '憑著': '凭着',
+    '藉著': '借着', '本著': '本着', '試著': '试着', '活著': '活着', '看著': '看着', '等著': '等着',
+    '為著': '为着', '對著': '对着', '圍繞著': '围绕着', '存在著': '存在着', '影響著': '影响着',
+    '著急': '着急', '著想': '着想', '著手': '着手', '著重': '着重', '著眼': '着眼', '著迷': '着迷',
+    '著落': '着落', '著實': '着实', '著涼': '着凉', '著陸': '着陆', '執著': '执着', '沉著': '沉着',
+    '穿著': '穿着', '衣著': '衣着'
+}
+
+
+@lru_cache(maxsize=None)
+def _compiled() -> Tuple[Dict[int, str], 're.Pattern']:
+    """編譯字表（str.translate 用）及詞表正則（長詞優先）"""
+    table = {ord(pair[0]): pair[1] for pair in CHARACTER_PAIRS.split()}
+    pattern = re.compile('|'.join(sorted(map(re.escape, PHRASES), key=len, reverse=True)))
+    return table, pattern
+
+
+def normalize_locale(locale: str = None) -> str:
+    """語系代碼或別名 -> zh-Hant / zh-Hans，無法識別時拋出 ValueError"""
+    if not locale:
+        return DEFAULT_LOCALE
+    normalized = LOCALE_ALIASES.get(locale.replace('_', '-').lower())
+    if normalized is None:
+        raise ValueError(f"不支持的語系：{locale}")
+    return normalized
+
+
+def to_simplified(text: str) -> str:
+    """繁體 -> 簡體"""
+    table, pattern = _compiled()
+    parts = pattern.split(text)
+    if len(parts) == 1:
+        return text.translate(table)
+    phrases = pattern.findall(text)
+    out = [parts[0].translate(table)]
+    for phrase, part in zip(phrases, parts[1:]):
+        out.append(PHRASES[phrase])
+        out.append(part.translate(table))
+    return ''.join(out)
+
+
+def convert(text: str, locale: str = DEFAULT_LOCALE) -> str:
+    """把繁體原文轉為指定語系"""
+    if normalize_locale(locale) == SIMPLIFIED:
+        return to_simplified(text)
+    return text
+
+
+def convert_data(data, locale: str = DEFAULT_LOCALE):
+    """轉換嵌套的 dict / list / tuple 中的全部字串值
+
+    字典的鍵是程式內部的查表鍵（如五行、十神名稱），保持原文不轉換。
+    """
+    if normalize_locale(locale) == TRADITIONAL:
+        return data
+    if isinstance(data, str):
+        return to_simplified(data)
+    if isinstance(data, dict):
+        return {key: convert_data(value, locale) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return type(data)(convert_data(value, locale) for value in data)
+    return data
+
+
+def main(argv=None) -> int:
+    """命令行入口：轉換文本文件或標準輸入"""
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description='繁體中文轉簡體中文')
+    parser.add_argument('input', nargs='?', help='輸入文件（默認讀取標準輸入）')
+    parser.add_argument('--output', help='輸出文件（默認輸出到標準輸出）')
+    args = parser.parse_args(argv)
+
+    if args.input:
+        with open(args.input, 'r', encoding='utf-8') as f:
+            text = f.read()
+    else:
+        text = sys.stdin.read()
+    result = to_simplified(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(result)
+    else:
+        sys.stdout.write(result)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())